@@ -0,0 +1,774 @@
+#!/usr/bin/env python3
+"""
+Shared A4 formatting engine used by all format_* scripts.
+Resizes images to 2480x3508px (A4 @ 300 DPI) and saves them as high quality
+JPEGs. Other print profiles (A3, Letter, ...), quarter-size proofs and wall
+preview thumbnails are all resampled from the same decoded image through a
+size pyramid. Batches are fanned out to a process pool so a full rebuild
+uses every core, and results come back in the same order as the jobs.
+With a memory limit, jobs are only started while their estimated image
+buffers fit in the budget, and every image is closed as soon as it is done.
+Very large sources are converted and resampled in horizontal bands, so no
+RGB copy or full-height resampling buffer of them is ever made, and large
+PNG scans are reduced band by band while they are decoded.
+Each stage is timed with stage_trace spans when a script runs with --trace.
+"""
+
+import io
+import math
+import os
+import resource
+import shutil
+import struct
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from PIL import Image
+
+from a4_manifest import BASE_DIR, file_sha256, manifest_key, needs_rebuild, record_build
+from events import add_report_arguments
+from image_header import read_image_header
+from png_draft import draft_factor, draft_png
+from print_profiles import (
+    DEFAULT_PROFILE, PROFILES, get_profile, profile_comment, profile_output_path,
+)
+from stage_trace import add_trace_argument, drain, merge, span, tracing
+
+# A4 dimensions at 300 DPI for high-quality printing (see print_profiles.py)
+A4_PROFILE = PROFILES[DEFAULT_PROFILE]
+A4_WIDTH_PX, A4_HEIGHT_PX = A4_PROFILE.size   # 210x297mm at 300 DPI
+A4_DPI = (A4_PROFILE.dpi, A4_PROFILE.dpi)
+JPEG_QUALITY = A4_PROFILE.quality
+
+# How a non-A4 source is fitted to the page (see a4_fit.py)
+FIT_MODES = ["stretch", "cover", "contain", "pad"]
+FOCUS_METHODS = ["saliency", "entropy"]
+DEFAULT_FIT = "stretch"
+DEFAULT_FOCUS = "saliency"
+
+# Everything that affects the output bytes; stored in the build manifest
+OUTPUT_PARAMS = dict(A4_PROFILE.params, resample="lanczos")
+
+# Reduced copies of the A4 page, as divisors of the A4 size
+DERIVATIVES = {"proof": 4, "thumb": 10}
+DERIVATIVE_SIZES = {
+    name: (A4_WIDTH_PX // divisor, A4_HEIGHT_PX // divisor)
+    for name, divisor in DERIVATIVES.items()
+}
+DERIVATIVE_QUALITY = 85
+
+# Proofs mirror the collection under prints/proofs; thumbnails go into the
+# wall preview cache, keyed by the content hash of their A4 image
+PROOF_DIR = BASE_DIR / "prints" / "proofs"
+THUMB_CACHE_DIR = BASE_DIR / ".thumb_cache"
+THUMB_SIZE = DERIVATIVE_SIZES["thumb"]
+
+# Job fields after (input_path, output_path) that may be left out
+JOB_DEFAULTS = (DEFAULT_FIT, DEFAULT_FOCUS, (DEFAULT_PROFILE,), ())
+
+# Skip reason of jobs refused by plan_jobs(min_dpi=...)
+LOW_RESOLUTION = "low resolution"
+
+# Skip reason of jobs whose output another source would also write
+OUTPUT_CONFLICT = "output conflict"
+
+# Environment variable that overrides the default worker count
+WORKERS_ENV = "A4_WORKERS"
+
+# Environment variable with the default memory limit in MB (unset: no limit)
+MEMORY_LIMIT_ENV = "A4_MEMORY_LIMIT"
+
+# Resident memory of an idle worker (interpreter, Pillow, NumPy), in MB
+WORKER_OVERHEAD_MB = 60
+
+MB = 1024 * 1024
+
+# JPEG sources with more decoded pixels than this (about 5000x7000) are
+# resampled in bands of BAND_ROWS output rows instead of in one piece. Draft
+# decoding keeps A4-shaped JPEGs below it, so in practice this catches long
+# panoramas and decodes without draft. PNGs are never banded here: large
+# 8-bit ones are reduced band by band while decoding (see png_draft.py).
+# TIFF and 16-bit PNG are decoded whole, so their memory grows with size.
+BANDED_PIXELS = 4 * A4_WIDTH_PX * A4_HEIGHT_PX
+BAND_ROWS = 128
+
+# Source pixels on each side of an output row that LANCZOS reads, per unit of scale
+LANCZOS_SUPPORT = 3
+
+# Scans of up to 16k x 16k px are expected; Pillow's decompression bomb
+# check would refuse anything over ~179 megapixels
+Image.MAX_IMAGE_PIXELS = 20000 * 20000
+
+
+def decode(input_path, draft=True, size=(A4_WIDTH_PX, A4_HEIGHT_PX)):
+    """
+    Open the source image.
+    Oversized JPEGs are decoded with libjpeg DCT scaling (Image.draft) at the
+    smallest 1/2, 1/4 or 1/8 scale that is still at least size in both
+    dimensions, so the full-resolution frame is never materialised. Oversized
+    8-bit PNGs are reduced the same way, by the largest integer factor that
+    still covers size, one band of rows at a time (see png_draft.py). The
+    LANCZOS resample then brings it to the exact output size.
+    """
+    with span("decode"):
+        img = Image.open(input_path)
+        if draft and img.format == 'JPEG':
+            img.draft('RGB', size)
+        elif draft and img.format == 'PNG':
+            reduced = draft_png(img, size)
+            if reduced is not None:
+                img.close()
+                img = reduced
+        if tracing():
+            # Decode now so the span covers the pixels, not just the header
+            img.load()
+    return img
+
+
+def banded(size, image_format):
+    """True if a decoded source of this pixel size and format is resampled in bands."""
+    return image_format == "JPEG" and size[0] * size[1] > BANDED_PIXELS
+
+
+def convert_to_rgb(img, fit=None):
+    """
+    Convert to RGB if necessary (for JPEG compatibility). Large JPEG
+    sources (CMYK, greyscale) fitted with stretch are returned as they are:
+    resize_bands converts them one band at a time.
+    """
+    if img.mode != 'RGB' and not (fit == "stretch" and banded(img.size, img.format)):
+        with span("convert", mode=img.mode):
+            img = img.convert('RGB')
+    return img
+
+
+def resize_bands(img, size, box=None, band_rows=BAND_ROWS):
+    """
+    img.resize(size, LANCZOS, box=box) as RGB, computed band_rows output
+    rows at a time. Each band crops the source rows it covers plus the
+    kernel overlap, converts only those to RGB and resamples them, so no
+    RGB copy or full-height intermediate of the source is made. The decoded
+    source itself stays whole: memory is only bounded by the output size for
+    JPEGs that draft decoding has already reduced. Rounding of the band
+    offsets can move a few pixel values by one level compared with a single
+    resize.
+    """
+    left, top, right, bottom = box or (0, 0, img.width, img.height)
+    scale = (bottom - top) / size[1]
+    overlap = LANCZOS_SUPPORT * max(scale, 1.0) + 1
+    page = Image.new("RGB", size)
+    for row in range(0, size[1], band_rows):
+        rows = min(band_rows, size[1] - row)
+        band_top = top + row * scale
+        band_bottom = top + (row + rows) * scale
+        first = max(0, math.floor(band_top - overlap))
+        last = min(img.height, math.ceil(band_bottom + overlap))
+        band = img.crop((0, first, img.width, last))
+        rgb = convert_to_rgb(band)
+        resized = rgb.resize((size[0], rows), Image.Resampling.LANCZOS,
+                             box=(left, band_top - first, right, band_bottom - first))
+        page.paste(resized, (0, row))
+        _close(band, rgb if rgb is not band else None, resized)
+    return page
+
+
+def resize_lanczos(img, size, box=None):
+    """LANCZOS resize of an RGB image (or of a large JPEG source in any mode) to size."""
+    if banded(img.size, img.format):
+        return resize_bands(img, size, box)
+    return img.resize(size, Image.Resampling.LANCZOS, box=box)
+
+
+def output_params(fit=DEFAULT_FIT, focus=DEFAULT_FOCUS, profile=DEFAULT_PROFILE):
+    """
+    Build manifest parameters for a print profile and fit mode. A4 stretch
+    gives the plain OUTPUT_PARAMS, so outputs recorded before profiles and
+    fit modes existed stay valid.
+    """
+    params = dict(get_profile(profile).params, resample="lanczos")
+    if fit != "stretch":
+        params["fit"] = fit
+        if fit == "cover":
+            params["focus"] = focus
+    return params
+
+
+def expand_job(job):
+    """(input, output, fit, focus, profiles, derivatives) of a job, filling in defaults."""
+    return tuple(job) + JOB_DEFAULTS[len(job) - 2:]
+
+
+def thumb_cache_path(a4_sha256, size=THUMB_SIZE):
+    """Wall preview thumbnail of the A4 image with the given content hash."""
+    return THUMB_CACHE_DIR / f"{a4_sha256}_{size[0]}x{size[1]}.jpg"
+
+
+def derivative_path(a4_output_path, name, a4_sha256=None):
+    """
+    Where a derivative of an A4 output is stored. Thumbnails need the A4
+    image's hash (read from the file if not given); returns None if the A4
+    image does not exist yet.
+    """
+    a4_output_path = Path(a4_output_path)
+    if name == "thumb":
+        if a4_sha256 is None:
+            if not a4_output_path.exists():
+                return None
+            a4_sha256 = file_sha256(a4_output_path)
+        return thumb_cache_path(a4_sha256)
+    relative = manifest_key(a4_output_path)
+    if relative.startswith(".."):
+        relative = a4_output_path.name
+    return PROOF_DIR / relative
+
+
+def _missing_derivatives(manifest, output_path, derivatives):
+    """Derivatives of an up-to-date A4 output that do not exist yet."""
+    entry = manifest["outputs"].get(manifest_key(output_path), {})
+    missing = []
+    for name in derivatives:
+        path = derivative_path(output_path, name, entry.get("output_sha256"))
+        if path is None or not path.exists():
+            missing.append(name)
+    return tuple(missing)
+
+
+def job_outputs(job):
+    """(profile name, output path, manifest params) for every output of a job."""
+    _, output_path, fit, focus, profiles, _ = expand_job(job)
+    return [
+        (name, profile_output_path(output_path, get_profile(name)),
+         output_params(fit, focus, name))
+        for name in profiles
+    ]
+
+
+def source_size(input_path):
+    """Pixel size of a source from its header, without decoding it."""
+    try:
+        header = read_image_header(input_path)
+        return header.width, header.height
+    except (OSError, ValueError, struct.error):
+        with Image.open(input_path) as img:
+            return img.size
+
+
+def effective_dpi(size, fit=DEFAULT_FIT, profile=A4_PROFILE):
+    """
+    Print resolution of a source of the given pixel size on the profile's
+    page. stretch and cover are limited by the tighter axis, contain and pad
+    shrink the image onto the page so the looser axis decides.
+    """
+    ratios = (size[0] / profile.size[0], size[1] / profile.size[1])
+    ratio = max(ratios) if fit in ("contain", "pad") else min(ratios)
+    return profile.dpi * ratio
+
+
+def job_dpi(job):
+    """Lowest effective DPI of a job's source over its print profiles."""
+    input_path, _, fit, _, profiles, _ = expand_job(job)
+    size = source_size(input_path)
+    return min(effective_dpi(size, fit, get_profile(name)) for name in profiles)
+
+
+def skip_outcome(reason):
+    """Event outcome of a plan_jobs skip reason: refused, conflict or up to date."""
+    if reason.startswith(LOW_RESOLUTION):
+        return "refused"
+    if reason.startswith(OUTPUT_CONFLICT):
+        return "conflict"
+    return "up to date"
+
+
+def output_conflicts(jobs):
+    """
+    Map each output path written by more than one source to those sources.
+    Building them would overwrite each other's output on every run.
+    """
+    sources = {}
+    for job in jobs:
+        for _, path, _ in job_outputs(job):
+            sources.setdefault(path, {}).setdefault(Path(job[0]), None)
+    return {path: list(inputs) for path, inputs in sources.items() if len(inputs) > 1}
+
+
+def plan_jobs(manifest, jobs, force=False, min_dpi=None):
+    """
+    Drop the outputs of each job that are up to date in the build manifest.
+    Returns (jobs, skipped): jobs keep only their stale profiles (and the
+    derivatives that are missing or whose A4 page is rebuilt), skipped is a
+    list of ((input, output, fit, focus, (profile,)), reason). With min_dpi,
+    jobs whose source would print below it are refused (reason "low
+    resolution ...") instead of being upscaled. Jobs whose output another
+    source also maps to are never built (reason "output conflict with ...").
+    """
+    with span("stat", jobs=len(jobs)):
+        return _plan_jobs(manifest, jobs, force, min_dpi)
+
+
+def _plan_jobs(manifest, jobs, force, min_dpi):
+    planned = []
+    skipped = []
+    conflicts = output_conflicts(jobs)
+    for job in jobs:
+        input_path, output_path, fit, focus, profiles, derivatives = expand_job(job)
+        others = [other for _, path, _ in job_outputs(job)
+                  for other in conflicts.get(path, ()) if other != Path(input_path)]
+        if others:
+            names = ", ".join(dict.fromkeys(other.name for other in others))
+            skipped.append(((input_path, output_path, fit, focus, profiles),
+                            f"{OUTPUT_CONFLICT} with {names}"))
+            continue
+        stale = []
+        for name, path, params in job_outputs(job):
+            if force:
+                stale.append(name)
+                continue
+            rebuild, reason = needs_rebuild(manifest, input_path, path, params)
+            if rebuild:
+                stale.append(name)
+            else:
+                skipped.append(((input_path, path, fit, focus, (name,)), reason))
+        if DEFAULT_PROFILE not in stale:
+            derivatives = _missing_derivatives(manifest, output_path, derivatives)
+        if not stale and not derivatives:
+            continue
+        job = (input_path, output_path, fit, focus, tuple(stale), derivatives)
+        dpi = job_dpi(job) if min_dpi and stale else None
+        if dpi is not None and dpi < min_dpi:
+            skipped.append(((input_path, output_path, fit, focus, tuple(stale)),
+                            f"{LOW_RESOLUTION} ({dpi:.0f} dpi < {min_dpi})"))
+            continue
+        planned.append(job)
+    return planned, skipped
+
+
+def record_job(manifest, job, seconds=None):
+    """
+    Record every output of a finished job in the build manifest. The job's
+    seconds are shared between its outputs.
+    """
+    outputs = job_outputs(job)
+    share = seconds / len(outputs) if seconds is not None and outputs else None
+    for _, path, params in outputs:
+        record_build(manifest, job[0], path, params, share)
+
+
+def resample(img, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS, size=(A4_WIDTH_PX, A4_HEIGHT_PX)):
+    """
+    Resize to the output size (A4 by default). stretch fills the page
+    regardless of aspect ratio; cover, contain and pad keep the proportions
+    (see a4_fit.py).
+    """
+    if fit == "stretch":
+        return resize_lanczos(img, size)
+    if fit not in FIT_MODES:
+        raise ValueError(f"unknown fit mode: {fit}")
+    from a4_fit import fit_image  # NumPy is only needed for the other modes
+    return fit_image(img, fit, focus, size)
+
+
+def encode(img, output_path, profile=A4_PROFILE, params=None):
+    """
+    Save as JPEG with the profile's quality, subsampling and DPI tag.
+    The manifest parameters are stored in the JPEG comment so a stale output
+    can be recognised even without the build manifest. The file is written
+    next to output_path and renamed over it, so an interrupted run never
+    leaves a truncated output and a hardlinked hold/ copy keeps its bytes.
+    """
+    params = params or dict(profile.params, resample="lanczos")
+    options = dict(profile.save_options, comment=profile_comment(params))
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        if not tracing():
+            img.save(tmp_path, 'JPEG', **options)
+        else:
+            # Traced runs encode to memory first so compression and disk time show separately
+            buffer = io.BytesIO()
+            with span("encode", profile=profile.name):
+                img.save(buffer, 'JPEG', **options)
+            with span("write", bytes=buffer.tell()):
+                with open(tmp_path, "wb") as f:
+                    f.write(buffer.getbuffer())
+        os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _same_aspect(a, b):
+    return abs(a[0] * b[1] - b[0] * a[1]) <= 0.01 * a[1] * b[1]
+
+
+def _close(*images):
+    """Release image buffers now instead of waiting for garbage collection."""
+    for img in images:
+        if img is not None:
+            img.close()
+
+
+def build_pyramid(img, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS, sizes=()):
+    """
+    Resample one decoded RGB image to every size in sizes.
+    Levels are made largest first. Each comes from the smallest level already
+    built that covers it with the same aspect ratio, and only falls back to
+    fitting the decoded source when there is none. Levels upscaled from a
+    small source are never used as a base. Returns {size: image}.
+    """
+    levels = {}
+    bases = []
+    for size in sorted(set(sizes), key=lambda s: s[0] * s[1], reverse=True):
+        covering = [
+            base for base in bases
+            if base[0] >= size[0] and base[1] >= size[1] and _same_aspect(base, size)
+        ]
+        with span("resample", size=f"{size[0]}x{size[1]}"):
+            if covering:
+                base = min(covering, key=lambda s: s[0] * s[1])
+                levels[size] = levels[base].resize(size, Image.Resampling.LANCZOS)
+            else:
+                levels[size] = resample(img, fit, focus, size)
+        if img.width >= size[0] and img.height >= size[1]:
+            bases.append(size)
+    return levels
+
+
+def _save_derivative(img, path):
+    """Write a proof or thumbnail atomically (the preview may be reading it)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with span("encode", derivative=path.name):
+        img.save(tmp_path, 'JPEG', quality=DERIVATIVE_QUALITY, optimize=True)
+    os.replace(tmp_path, path)
+
+
+def render_outputs(img, output_path, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS,
+                   profiles=(DEFAULT_PROFILE,), derivatives=()):
+    """
+    Resample one decoded RGB image through a single pyramid and encode it
+    for every profile, then write the requested derivatives (proof, thumb)
+    of the A4 page. Returns the written file names.
+    """
+    output_path = Path(output_path)
+    sizes = [get_profile(name).size for name in profiles]
+    sizes += [DERIVATIVE_SIZES[name] for name in derivatives]
+    pyramid = build_pyramid(img, fit, focus, sizes)
+
+    names = []
+    try:
+        for name in profiles:
+            profile = get_profile(name)
+            path = profile_output_path(output_path, profile)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            encode(pyramid[profile.size], path, profile, output_params(fit, focus, name))
+            names.append(path.name)
+
+        for name in derivatives:
+            path = derivative_path(output_path, name)
+            if path is not None:
+                _save_derivative(pyramid[DERIVATIVE_SIZES[name]], path)
+                names.append(name)
+    finally:
+        _close(*pyramid.values())
+    return names
+
+
+def decode_size(profiles, derivatives=()):
+    """Smallest size that covers every output (the draft decode target)."""
+    sizes = [get_profile(name).size for name in profiles]
+    sizes += [DERIVATIVE_SIZES[name] for name in derivatives]
+    return max(width for width, _ in sizes), max(height for _, height in sizes)
+
+
+def share_jobs(jobs, leaders):
+    """
+    Split jobs into (jobs to run, [(job, leader job)]) using leaders, a map
+    of duplicate source -> the source it can share outputs with (see
+    find_duplicates.cluster_leaders). A job is only shared when its leader is
+    in the same batch with the same settings.
+    """
+    by_source = {job[0]: expand_job(job) for job in jobs}
+    run = []
+    shared = []
+    for job in jobs:
+        leader = by_source.get(leaders.get(job[0]))
+        if leader is not None and leader[2:] == expand_job(job)[2:]:
+            shared.append((job, leader))
+        else:
+            run.append(job)
+    return run, shared
+
+
+def _copy_file(source, dest):
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    with span("copy", file=dest.name):
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, dest)
+
+
+def copy_outputs(job, leader):
+    """
+    Give job copies of the outputs already rendered for leader instead of
+    resampling the same pixels again. Thumbnails are keyed by content and
+    need no copy. Returns (success, message) like format_image.
+    """
+    try:
+        names = []
+        for (_, source, _), (_, dest, _) in zip(job_outputs(leader), job_outputs(job)):
+            _copy_file(source, dest)
+            names.append(dest.name)
+        if "proof" in expand_job(job)[5]:
+            _copy_file(derivative_path(leader[1], "proof"), derivative_path(job[1], "proof"))
+            names.append("proof")
+        return True, ", ".join(names)
+    except OSError as e:
+        return False, f"Error: {str(e)}"
+
+
+def format_image(input_path, output_path, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS,
+                 profiles=(DEFAULT_PROFILE,), derivatives=(), draft=True):
+    """
+    Resize one image with the given fit mode and save it for each print
+    profile (A4 to output_path, others next to it) plus any derivatives,
+    decoding it only once.
+    Returns (True, output filenames) on success, (False, error message) otherwise.
+    """
+    try:
+        with decode(input_path, draft, decode_size(profiles, derivatives)) as source:
+            img = convert_to_rgb(source, fit)
+            try:
+                names = render_outputs(img, output_path, fit, focus, profiles, derivatives)
+            finally:
+                if img is not source:
+                    _close(img)
+        return True, ", ".join(names)
+    except Exception as e:
+        return False, f"Error: {e}"
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Peak resident set size of this process (or its children), in MB (ru_maxrss is KB on Linux)."""
+    peak = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":
+        peak /= 1024
+    return peak / 1024
+
+
+def _run_job(func, job):
+    """
+    Process pool entry point: call func with the job's arguments. Returns
+    its result, the worker's pid and peak RSS, the seconds taken and the
+    trace spans recorded (None unless tracing).
+    """
+    start = time.perf_counter()
+    with span(func.__name__, file=os.path.relpath(job[0], BASE_DIR)):
+        result = func(*job)
+    return result, os.getpid(), peak_rss_mb(), time.perf_counter() - start, drain()
+
+
+def job_bytes(job):
+    """(source bytes, bytes of the outputs now on disk) of a format job."""
+    bytes_out = 0
+    for _, path, _ in job_outputs(job):
+        try:
+            bytes_out += os.stat(path).st_size
+        except FileNotFoundError:
+            pass
+    return os.stat(job[0]).st_size, bytes_out
+
+
+def default_workers():
+    """Worker count from A4_WORKERS, falling back to the number of CPUs."""
+    value = os.environ.get(WORKERS_ENV)
+    if value:
+        return max(1, int(value))
+    return os.cpu_count() or 1
+
+
+def default_memory_limit():
+    """Memory limit in MB from A4_MEMORY_LIMIT, or None for no limit."""
+    value = os.environ.get(MEMORY_LIMIT_ENV)
+    return int(value) if value else None
+
+
+def _decoded_size(input_path, target):
+    """Pixel size, bytes per pixel and format of input_path once decoded for target."""
+    try:
+        header = read_image_header(input_path)
+        width, height, channels = header.width, header.height, max(header.components, 3)
+    except (OSError, ValueError, struct.error):
+        with Image.open(input_path) as img:
+            return img.size, 4, img.format
+
+    if header.format == "JPEG":
+        # Image.draft picks the smallest DCT scale that still covers target
+        for scale in (8, 4, 2):
+            if -(-width // scale) >= target[0] and -(-height // scale) >= target[1]:
+                return (-(-width // scale), -(-height // scale)), channels, header.format
+    if header.format == "PNG" and header.bits == 8 and not header.progressive:
+        # draft_png reduces by the largest integer factor that still covers target
+        factor = draft_factor((width, height), target)
+        if factor > 1:
+            return (-(-width // factor), -(-height // factor)), 3, header.format
+    return (width, height), channels, header.format
+
+
+def job_memory(job):
+    """
+    Estimated peak bytes of image buffers for one job: the decoded source,
+    its RGB copy, the resampling intermediate and every pyramid level.
+    Banded JPEG sources need no RGB copy (with stretch) and only one band
+    of intermediate.
+    """
+    input_path, _, fit, _, profiles, derivatives = expand_job(job)
+    sizes = [get_profile(name).size for name in profiles]
+    sizes += [DERIVATIVE_SIZES[name] for name in derivatives]
+    target = decode_size(profiles, derivatives)
+
+    (width, height), channels, image_format = _decoded_size(input_path, target)
+    source = width * height * channels
+    rgb = width * height * 3 if channels != 3 else 0
+    intermediate = target[0] * height * 3
+    if banded((width, height), image_format):
+        band_height = (BAND_ROWS + 2 * LANCZOS_SUPPORT) * height // target[1] + 2
+        intermediate = width * band_height * (channels + 3) + target[0] * band_height * 3
+        if fit == "stretch":
+            rgb = 0
+    levels = sum(w * h * 3 for w, h in sizes)
+    return source + rgb + intermediate + levels
+
+
+def format_batch(jobs, workers=None, func=format_image, memory_limit=None, stats=None,
+                 estimate=job_memory, timings=None):
+    """
+    Format a list of (input_path, output_path[, fit[, focus[, profiles[, derivatives]]]])
+    jobs.
+    Work is spread over a process pool; yields (job, (success, message))
+    in the same order as the jobs were given. func must be a module-level
+    function taking the job's arguments (format_image by default).
+
+    memory_limit (MB, default $A4_MEMORY_LIMIT) caps the whole batch: worker
+    overhead is subtracted (dropping workers if needed) and the rest is the
+    budget for image buffers. A job only starts while the estimated buffers
+    of the jobs in flight, plus its own, fit the budget; a job that is larger
+    than the budget on its own runs alone. If stats is a dict it receives
+    {worker pid: peak RSS in MB}. If timings is a list, the seconds each job
+    took in its worker are appended as the job is yielded.
+    """
+    jobs = list(jobs)
+    if workers is None:
+        workers = default_workers()
+    if memory_limit is None:
+        memory_limit = default_memory_limit()
+    workers = max(1, min(workers, len(jobs) or 1))
+    if stats is None:
+        stats = {}
+    if timings is None:
+        timings = []
+
+    budget = float("inf")
+    if memory_limit:
+        workers = max(1, min(workers, memory_limit // WORKER_OVERHEAD_MB - 1))
+        budget = (memory_limit - (workers + 1) * WORKER_OVERHEAD_MB) * MB
+
+    if workers == 1:
+        for job in jobs:
+            result, pid, peak, seconds, spans = _run_job(func, job)
+            merge(spans)
+            stats[pid] = max(stats.get(pid, 0), peak)
+            timings.append(seconds)
+            yield job, result
+        return
+
+    costs = [estimate(job) if memory_limit else 0 for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        finished = {}
+        in_flight = 0
+        next_job = 0
+        for index in range(len(jobs)):
+            # Admit jobs in order while they fit the budget (always at least one)
+            while next_job < len(jobs) and len(running) < workers and (
+                    not running or in_flight + costs[next_job] <= budget):
+                future = pool.submit(_run_job, func, jobs[next_job])
+                running[future] = next_job
+                in_flight += costs[next_job]
+                next_job += 1
+
+            while index not in finished:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position = running.pop(future)
+                    in_flight -= costs[position]
+                    result, pid, peak, seconds, spans = future.result()
+                    merge(spans)
+                    stats[pid] = max(stats.get(pid, 0), peak)
+                    finished[position] = result, seconds
+
+            result, seconds = finished.pop(index)
+            timings.append(seconds)
+            yield jobs[index], result
+
+
+def memory_report(stats):
+    """One line summarising peak memory per worker from format_batch stats."""
+    if not stats:
+        return "Peak memory: -"
+    peaks = ", ".join(f"{peak:.0f} MB" for _, peak in sorted(stats.items()))
+    return f"Peak memory per worker: {peaks} (max {max(stats.values()):.0f} MB)"
+
+
+def add_engine_arguments(parser):
+    """Add the shared engine options to a script's argument parser."""
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help=f"number of worker processes (default: ${WORKERS_ENV} or CPU count)",
+    )
+    parser.add_argument(
+        "--fit", choices=FIT_MODES, default=None,
+        help="how to fit non-A4 sources: stretch, cover (crop around the focal point), "
+             "contain (blurred fill) or pad (default: per poster in wall_layout.json, "
+             f"else {DEFAULT_FIT})",
+    )
+    parser.add_argument(
+        "--focus", choices=FOCUS_METHODS, default=DEFAULT_FOCUS,
+        help=f"focal point detection for --fit cover (default: {DEFAULT_FOCUS})",
+    )
+    parser.add_argument(
+        "--profile", dest="profiles", action="append", choices=list(PROFILES), default=None,
+        help=f"print profile to produce, repeatable; all are rendered from one decode "
+             f"(default: {DEFAULT_PROFILE})",
+    )
+    parser.add_argument(
+        "--derivative", dest="derivatives", action="append", choices=list(DERIVATIVES),
+        default=None,
+        help="also write a quarter-size proof (prints/proofs/) or a wall preview thumbnail "
+             "from the same decode, repeatable",
+    )
+    parser.add_argument(
+        "--min-dpi", type=int, default=None, metavar="DPI",
+        help="refuse to format sources that would print below this resolution "
+             "(see source_quality.py)",
+    )
+    parser.add_argument(
+        "--memory-limit", type=int, default=None, metavar="MB",
+        help=f"memory ceiling for the whole batch; limits how many images are decoded "
+             f"at once (default: ${MEMORY_LIMIT_ENV} or no limit)",
+    )
+    add_report_arguments(parser)
+    add_trace_argument(parser)
+    return parser
+
+
+def selected_profiles(args):
+    """Profiles chosen with --profile, as a tuple for job tuples."""
+    return tuple(dict.fromkeys(args.profiles or [DEFAULT_PROFILE]))
+
+
+def selected_derivatives(args):
+    """Derivatives chosen with --derivative, as a tuple for job tuples."""
+    return tuple(dict.fromkeys(args.derivatives or []))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Aspect-aware fitting of an image onto the A4 page.
+  stretch - resize straight to A4 (the original behaviour, distorts non-A4 art)
+  cover   - fill the page and crop the overflow around a focal point
+  contain - whole image on a blurred, enlarged copy of itself
+  pad     - whole image on a plain border
+The cover focal point is found on a ~128px copy of the image with vectorised
+NumPy (saliency or local entropy plus an integral-image window search), so it
+adds only a few milliseconds per image.
+"""
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from a4_engine import A4_HEIGHT_PX, A4_WIDTH_PX, resize_lanczos
+
+# Long edge of the copy used for the focal point search
+ANALYSIS_SIZE = 128
+
+# Aspect ratios closer than this are treated as already A4
+ASPECT_TOLERANCE = 0.005
+
+PAD_COLOR = (0, 0, 0)
+BLUR_SCALE = 16    # contain background is blurred at 1/16 of A4
+BLUR_RADIUS = 6
+
+
+def _analysis_copy(img):
+    """Small greyscale and RGB arrays of img for the focal point search."""
+    scale = ANALYSIS_SIZE / max(img.size)
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    small = img.resize(size, Image.Resampling.BOX, reducing_gap=2.0)
+    rgb = np.asarray(small, dtype=np.float32)
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return gray, rgb
+
+
+def _box_blur(values, radius):
+    """Mean filter of a 2-D array with an integral image (edge padded)."""
+    padded = np.pad(values, radius + 1, mode="edge")
+    integral = padded.cumsum(0).cumsum(1)
+    k = 2 * radius + 1
+    height, width = values.shape
+    window = (integral[k:k + height, k:k + width] - integral[:height, k:k + width]
+              - integral[k:k + height, :width] + integral[:height, :width])
+    return window / (k * k)
+
+
+def saliency_map(gray, rgb):
+    """
+    Edge energy plus colour distinctness (distance from the mean colour),
+    smoothed so the crop follows regions rather than single edges.
+    """
+    gy, gx = np.gradient(gray)
+    edges = np.hypot(gx, gy)
+    distinct = np.linalg.norm(rgb - rgb.reshape(-1, 3).mean(axis=0), axis=2)
+    saliency = edges / (edges.max() or 1) + distinct / (distinct.max() or 1)
+    return _box_blur(saliency, max(1, min(gray.shape) // 32))
+
+
+def entropy_map(gray, block=8, levels=32):
+    """Shannon entropy of grey levels in block x block tiles, per pixel."""
+    height, width = gray.shape
+    rows, cols = max(1, height // block), max(1, width // block)
+    tiles = gray[:rows * block, :cols * block]
+    quantised = np.minimum(tiles * (levels / 256), levels - 1).astype(np.int64)
+
+    # Histogram of every tile at once: bin = tile_id * levels + level
+    tile_ids = np.arange(rows)[:, None] * cols + np.arange(cols)[None, :]
+    tile_ids = np.repeat(np.repeat(tile_ids, block, axis=0), block, axis=1)
+    counts = np.bincount((tile_ids * levels + quantised).ravel(),
+                         minlength=rows * cols * levels).reshape(rows * cols, levels)
+    p = counts / counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = -np.nansum(p * np.log2(p), axis=1).reshape(rows, cols)
+
+    # Back to pixel resolution (edge rows/columns take the nearest tile)
+    row_index = np.minimum(np.arange(height) // block, rows - 1)
+    col_index = np.minimum(np.arange(width) // block, cols - 1)
+    return entropy[row_index[:, None], col_index[None, :]]
+
+
+FOCUS_MAPS = {"saliency": saliency_map, "entropy": lambda gray, rgb: entropy_map(gray)}
+
+
+def focal_crop(img, aspect, focus="saliency"):
+    """
+    Crop box (left, top, right, bottom) of the given aspect ratio (w/h)
+    covering the most interesting part of an RGB image. Windows of that
+    aspect are scored by summed saliency/entropy with a slight pull towards
+    the centre.
+    """
+    gray, rgb = _analysis_copy(img)
+    weights = FOCUS_MAPS[focus](gray, rgb)
+    height, width = weights.shape
+
+    if width / height > aspect:
+        win_h, win_w = height, max(1, min(width, round(height * aspect)))
+    else:
+        win_w, win_h = width, max(1, min(height, round(width / aspect)))
+
+    # Sum of every win_w x win_h window from the integral image
+    integral = np.zeros((height + 1, width + 1), dtype=np.float64)
+    integral[1:, 1:] = weights.cumsum(0).cumsum(1)
+    sums = (integral[win_h:, win_w:] - integral[:-win_h, win_w:]
+            - integral[win_h:, :-win_w] + integral[:-win_h, :-win_w])
+
+    ys, xs = np.indices(sums.shape)
+    centre_y, centre_x = (sums.shape[0] - 1) / 2, (sums.shape[1] - 1) / 2
+    distance = np.hypot((ys - centre_y) / max(height, 1), (xs - centre_x) / max(width, 1))
+    score = sums * (1 - 0.25 * distance)
+    top, left = np.unravel_index(np.argmax(score), score.shape)
+
+    # Map the window back to full resolution
+    if img.width / img.height > aspect:
+        crop_h, crop_w = img.height, img.height * aspect
+    else:
+        crop_w, crop_h = img.width, img.width / aspect
+    x = min(left / width * img.width, img.width - crop_w)
+    y = min(top / height * img.height, img.height - crop_h)
+    return (x, y, x + crop_w, y + crop_h)
+
+
+def _contained_size(img, size):
+    scale = min(size[0] / img.width, size[1] / img.height)
+    return max(1, round(img.width * scale)), max(1, round(img.height * scale))
+
+
+def fit_image(img, fit="stretch", focus="saliency", size=(A4_WIDTH_PX, A4_HEIGHT_PX)):
+    """Fit an RGB image to size using one of the fit modes."""
+    aspect = size[0] / size[1]
+    if fit == "stretch" or abs(img.width / img.height / aspect - 1) < ASPECT_TOLERANCE:
+        return resize_lanczos(img, size)
+
+    if fit == "cover":
+        box = focal_crop(img, aspect, focus)
+        return resize_lanczos(img, size, box)
+
+    if fit == "contain":
+        # Centre crop at a tiny size, blur, and blow it back up as the backdrop
+        small = (max(1, size[0] // BLUR_SCALE), max(1, size[1] // BLUR_SCALE))
+        if img.width / img.height > aspect:
+            crop_w = img.height * aspect
+            box = ((img.width - crop_w) / 2, 0, (img.width + crop_w) / 2, img.height)
+        else:
+            crop_h = img.width / aspect
+            box = (0, (img.height - crop_h) / 2, img.width, (img.height + crop_h) / 2)
+        with img.resize(small, Image.Resampling.BOX, box=box) as backdrop, \
+                backdrop.filter(ImageFilter.GaussianBlur(BLUR_RADIUS)) as blurred:
+            page = blurred.resize(size, Image.Resampling.BICUBIC)
+    elif fit == "pad":
+        page = Image.new("RGB", size, PAD_COLOR)
+    else:
+        raise ValueError(f"unknown fit mode: {fit}")
+
+    with resize_lanczos(img, _contained_size(img, size)) as content:
+        page.paste(content, ((size[0] - content.width) // 2, (size[1] - content.height) // 2))
+    return page
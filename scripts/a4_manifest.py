@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Build manifest for incremental A4 regeneration.
+Records, for every A4 output, the source it was built from (size, mtime and
+content hash), the output parameters and the output hash. An output is only
+rebuilt when its source or parameters changed, so replacing an original with
+a better quality image is picked up automatically and a no-op run costs a
+single JSON load plus a stat per file.
+"""
+
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+
+from image_header import read_image_header
+from paths import BASE_DIR
+from print_profiles import parse_profile_comment
+
+MANIFEST_PATH = BASE_DIR / ".a4_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path):
+    """Content hash of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_key(path):
+    """Manifest keys are paths relative to the repository root."""
+    return os.path.relpath(Path(path).resolve(), BASE_DIR)
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Load the manifest, or start an empty one if missing or unreadable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "outputs": {}}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """Write the manifest atomically so an interrupted run never corrupts it."""
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _stat_matches(entry, prefix, st):
+    return entry.get(f"{prefix}_size") == st.st_size and \
+        entry.get(f"{prefix}_mtime_ns") == st.st_mtime_ns
+
+
+def _embedded_params(output):
+    """Parameters recorded in an output's JPEG comment, if any."""
+    try:
+        return parse_profile_comment(read_image_header(output).comment)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def needs_rebuild(manifest, source, output, params):
+    """
+    Decide whether output must be (re)built from source with params.
+    Returns (rebuild, reason). Only hashes a file when its size or mtime
+    changed since the last recorded build.
+    """
+    output = Path(output)
+    if not output.exists():
+        return True, "missing"
+
+    entry = manifest["outputs"].get(manifest_key(output))
+    source_st = os.stat(source)
+    output_st = output.stat()
+
+    if entry is None:
+        # Output predates the manifest: trust it unless the source is newer
+        # or its embedded print profile says it was built differently
+        if source_st.st_mtime_ns > output_st.st_mtime_ns:
+            return True, "source newer than output"
+        if _embedded_params(output) not in (None, params):
+            return True, "profile changed"
+        record_build(manifest, source, output, params)
+        return False, "adopted"
+
+    if entry.get("source") != manifest_key(source):
+        return True, "different source"
+    if entry.get("params") != params:
+        return True, "parameters changed"
+
+    if not _stat_matches(entry, "source", source_st):
+        if file_sha256(source) != entry.get("source_sha256"):
+            return True, "source changed"
+        entry["source_size"] = source_st.st_size
+        entry["source_mtime_ns"] = source_st.st_mtime_ns
+
+    if not _stat_matches(entry, "output", output_st):
+        if file_sha256(output) != entry.get("output_sha256"):
+            return True, "output modified"
+        entry["output_size"] = output_st.st_size
+        entry["output_mtime_ns"] = output_st.st_mtime_ns
+
+    return False, "up to date"
+
+
+def record_build(manifest, source, output, params, seconds=None):
+    """
+    Store the source, parameters and output hash of a finished build, and
+    the seconds it took if known (used to estimate what a skip saves).
+    """
+    source_st = os.stat(source)
+    output_st = os.stat(output)
+    entry = manifest["outputs"][manifest_key(output)] = {
+        "source": manifest_key(source),
+        "source_size": source_st.st_size,
+        "source_mtime_ns": source_st.st_mtime_ns,
+        "source_sha256": file_sha256(source),
+        "params": params,
+        "output_size": output_st.st_size,
+        "output_mtime_ns": output_st.st_mtime_ns,
+        "output_sha256": file_sha256(output),
+    }
+    if seconds is not None:
+        entry["build_seconds"] = round(seconds, 3)
+
+
+def move_output(manifest, output, new_output, source=None):
+    """
+    Re-key the entry of an output renamed on disk (pointing it at source
+    too, if its original was renamed with it), so it is not rebuilt.
+    """
+    entry = manifest["outputs"].pop(manifest_key(output), None)
+    if entry is None:
+        return
+    if source is not None:
+        entry["source"] = manifest_key(source)
+    manifest["outputs"][manifest_key(new_output)] = entry
+
+
+def build_seconds(manifest, output):
+    """Recorded build time of an output, or None if unknown."""
+    entry = manifest["outputs"].get(manifest_key(output))
+    return entry and entry.get("build_seconds")
+
+
+def refresh_output(manifest, output):
+    """
+    Record new output bytes for an existing entry after a lossless rewrite
+    (e.g. optimize_jpegs.py), so the output is not seen as modified.
+    """
+    entry = manifest["outputs"].get(manifest_key(output))
+    if entry is None:
+        return
+    output_st = os.stat(output)
+    entry["output_size"] = output_st.st_size
+    entry["output_mtime_ns"] = output_st.st_mtime_ns
+    entry["output_sha256"] = file_sha256(output)
+
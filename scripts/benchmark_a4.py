@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark the A4 formatting pipeline.
+Generates synthetic source images in several sizes, colour modes (RGB, RGBA,
+P, CMYK) and aspect ratios, runs each through the shared a4_engine stages
+(decode, convert to RGB, LANCZOS resample, JPEG encode) and then through
+format_batch. Per-stage timings, throughput and peak RSS are written as JSON
+so runs can be compared against a saved baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import PIL
+from PIL import Image
+
+from a4_engine import (
+    A4_HEIGHT_PX, A4_WIDTH_PX, DEFAULT_FIT, FIT_MODES, convert_to_rgb, decode,
+    default_workers, encode, format_batch, output_params, peak_rss_mb, resample,
+)
+
+# Long edge of the generated sources, relative to the A4 long edge
+SIZES = {"small": 0.5, "a4": 1.0, "large": 2.0}
+
+# width / height
+ASPECTS = {"portrait": A4_WIDTH_PX / A4_HEIGHT_PX, "square": 1.0, "landscape": 16 / 9}
+
+MODES = ["RGB", "RGBA", "P", "CMYK"]
+
+# Modes that JPEG can hold are written as JPEG, the rest as PNG
+SOURCE_FORMATS = {"RGB": "JPEG", "CMYK": "JPEG", "RGBA": "PNG", "P": "PNG"}
+
+STAGES = ["decode", "convert", "resample", "encode"]
+
+# A case only counts as slower than the baseline if its total grew by at
+# least this much too, so timer noise on fast cases never fails a run
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def source_size(size_name, aspect_name):
+    """Pixel size for a size/aspect combination."""
+    long_edge = round(A4_HEIGHT_PX * SIZES[size_name])
+    aspect = ASPECTS[aspect_name]
+    if aspect >= 1:
+        return long_edge, round(long_edge / aspect)
+    return round(long_edge * aspect), long_edge
+
+
+def make_source(path, size, mode):
+    """Write a synthetic image with gradients and noise in the given mode."""
+    small = (max(1, size[0] // 8), max(1, size[1] // 8))
+    gradient = Image.linear_gradient("L").resize(small)
+    noise = Image.effect_noise(small, 64)
+    base = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.Transpose.ROTATE_180)))
+    img = base.resize(size, Image.Resampling.BICUBIC)
+
+    if mode == "RGBA":
+        img.putalpha(gradient.resize(size))
+    elif mode == "P":
+        img = img.quantize(256)
+    elif mode == "CMYK":
+        img = img.convert("CMYK")
+
+    file_format = SOURCE_FORMATS[mode]
+    path = path.with_suffix(".jpg" if file_format == "JPEG" else ".png")
+    img.save(path, file_format, **({"quality": 95} if file_format == "JPEG" else {}))
+    return path
+
+
+def time_stages(source, output, repeat, fit=DEFAULT_FIT):
+    """Best-of-repeat seconds for each pipeline stage of one image."""
+    best = {stage: float("inf") for stage in STAGES}
+    for _ in range(repeat):
+        timings = {}
+
+        start = time.perf_counter()
+        img = decode(source)
+        img.load()
+        timings["decode"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        img = convert_to_rgb(img)
+        timings["convert"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        img = resample(img, fit)
+        timings["resample"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        encode(img, output)
+        timings["encode"] = time.perf_counter() - start
+
+        for stage, seconds in timings.items():
+            best[stage] = min(best[stage], seconds)
+
+    best["total"] = sum(best[stage] for stage in STAGES)
+    return {stage: round(seconds, 4) for stage, seconds in best.items()}
+
+
+def run_benchmark(sizes, modes, aspects, repeat=3, workers=None, work_dir=None,
+                  fit=DEFAULT_FIT, memory_limit=None):
+    """Run the stage and batch benchmarks and return the results as a dict."""
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        tmp = Path(tmp)
+        cases = []
+        for size_name in sizes:
+            for aspect_name in aspects:
+                for mode in modes:
+                    size = source_size(size_name, aspect_name)
+                    name = f"{size_name}_{aspect_name}_{mode}"
+                    source = make_source(tmp / name, size, mode)
+                    cases.append((name, size_name, aspect_name, mode, size, source))
+
+        results = []
+        for name, size_name, aspect_name, mode, size, source in cases:
+            timings = time_stages(source, tmp / f"{name}_A4.jpeg", repeat, fit)
+            results.append({
+                "name": name,
+                "size": size_name,
+                "aspect": aspect_name,
+                "mode": mode,
+                "width": size[0],
+                "height": size[1],
+                "source_bytes": source.stat().st_size,
+                "seconds": timings,
+                "images_per_second": round(1 / timings["total"], 2),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+            })
+            print(f"⏱️  {name:28} {timings['total']:.3f}s", file=sys.stderr)
+
+        # Whole set through the process pool, as the format_* scripts run it
+        workers = workers or default_workers()
+        jobs = [(source, tmp / f"{name}_batch_A4.jpeg", fit) for name, *_, source in cases]
+        stats = {}
+        start = time.perf_counter()
+        failures = [job for job, (success, _) in format_batch(jobs, workers, memory_limit=memory_limit,
+                                                               stats=stats) if not success]
+        batch_seconds = time.perf_counter() - start
+        megapixels = sum(w * h for *_, (w, h), _ in cases) / 1e6
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "params": output_params(fit),
+        "repeat": repeat,
+        "cases": results,
+        "batch": {
+            "images": len(jobs),
+            "workers": workers,
+            "memory_limit_mb": memory_limit,
+            "failures": len(failures),
+            "seconds": round(batch_seconds, 3),
+            "images_per_second": round(len(jobs) / batch_seconds, 2),
+            "source_megapixels_per_second": round(megapixels / batch_seconds, 2),
+            # With one worker the batch runs in this process (see peak_rss_mb)
+            "peak_rss_mb_workers": (round(peak_rss_mb(resource.RUSAGE_CHILDREN), 1)
+                                    if workers > 1 else None),
+            "peak_rss_mb_per_worker": sorted(round(peak, 1) for peak in stats.values()),
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    Compare per-case totals and batch throughput with a baseline report.
+    Returns a list of regression messages: cases whose total time per image
+    grew by more than tolerance and by at least MIN_REGRESSION_SECONDS
+    (naming the stage that grew most), and a batch that got slower.
+    """
+    regressions = []
+    old_cases = {case["name"]: case for case in baseline.get("cases", [])}
+    for case in report["cases"]:
+        old = old_cases.get(case["name"])
+        if old is None:
+            continue
+        seconds, old_seconds = case["seconds"]["total"], old["seconds"].get("total")
+        if (not old_seconds or seconds <= old_seconds * (1 + tolerance)
+                or seconds - old_seconds < MIN_REGRESSION_SECONDS):
+            continue
+        stage = max(STAGES, key=lambda name: case["seconds"][name] - old["seconds"].get(name, 0))
+        regressions.append(f"{case['name']}: {old_seconds:.3f}s → {seconds:.3f}s "
+                           f"(mostly {stage}: {old['seconds'].get(stage, 0):.3f}s → "
+                           f"{case['seconds'][stage]:.3f}s)")
+
+    old_rate = baseline.get("batch", {}).get("images_per_second")
+    new_rate = report["batch"]["images_per_second"]
+    if old_rate and new_rate < old_rate / (1 + tolerance):
+        regressions.append(f"batch: {old_rate:.2f} → {new_rate:.2f} images/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--aspects", nargs="+", choices=list(ASPECTS), default=list(ASPECTS))
+    parser.add_argument("--fit", choices=FIT_MODES, default=DEFAULT_FIT,
+                        help=f"fit mode to benchmark (default: {DEFAULT_FIT})")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions per stage")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process pool size for the batch run (default: CPU count)")
+    parser.add_argument("--memory-limit", type=int, default=None, metavar="MB",
+                        help="memory ceiling for the batch run (default: $A4_MEMORY_LIMIT)")
+    parser.add_argument("-o", "--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--baseline", type=Path,
+                        help="earlier JSON report; exit with status 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed slowdown of each image's total time and of the batch "
+                             "vs the baseline (default: 0.15 = 15%%; a case must also be "
+                             f"{MIN_REGRESSION_SECONDS * 1000:.0f} ms slower)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes, args.modes, args.aspects, args.repeat, args.workers,
+                           fit=args.fit, memory_limit=args.memory_limit)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+        print(f"📊 Report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    batch = report["batch"]
+    print(f"📈 Batch: {batch['images']} images in {batch['seconds']}s "
+          f"({batch['images_per_second']} images/s, {batch['workers']} workers), "
+          f"peak RSS {report['peak_rss_mb']} MB", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"❌ Regression: {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
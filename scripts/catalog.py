@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+SQLite catalog of every image in the collection.
+Each image is stored with its role (primarch, legionnaire/1, legionnaire/4,
+wall), legion or wall slot, dimensions, mode, byte size, content hash and,
+for originals, the state of its A4 version. The slots table lists every
+place an original is expected, so gaps are a query too.
+
+  catalog.py refresh                 update the catalog from the tree
+  catalog.py report missing          legions or posters without an original
+  catalog.py report no-a4            originals without an A4 version
+  catalog.py report stale            A4 versions built from an older original
+  catalog.py report small            originals under --min-height pixels
+  catalog.py report summary          images and A4 states per role
+  catalog.py sql "SELECT ..."        any read-only query
+
+A refresh walks the tree once and only opens files whose size or mtime
+changed since the last one. Reports read the catalog alone (add --refresh
+to update it first), so they never walk the tree.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from a4_manifest import file_sha256, load_manifest
+from image_header import read_image_header
+from image_index import LEGIONS_PATH, scan_collection
+from paths import BASE_DIR
+from wall_layout import load_layout
+
+CATALOG_PATH = BASE_DIR / ".catalog.sqlite"
+CATALOG_VERSION = 1
+
+LEGIONNAIRE_POSES = ("1", "4")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    role TEXT,
+    legion TEXT,
+    wall TEXT,
+    row INTEGER,
+    spot INTEGER,
+    poster TEXT,
+    width INTEGER,
+    height INTEGER,
+    mode TEXT,
+    bytes INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    a4_path TEXT,
+    a4_status TEXT
+);
+CREATE TABLE IF NOT EXISTS slots (
+    folder TEXT PRIMARY KEY,
+    role TEXT NOT NULL,
+    legion TEXT,
+    wall TEXT,
+    row INTEGER,
+    spot INTEGER,
+    poster TEXT
+);
+CREATE INDEX IF NOT EXISTS images_folder ON images (folder, kind);
+CREATE INDEX IF NOT EXISTS images_role ON images (kind, role, legion);
+CREATE INDEX IF NOT EXISTS images_height ON images (kind, height);
+CREATE INDEX IF NOT EXISTS images_a4_status ON images (kind, a4_status);
+CREATE INDEX IF NOT EXISTS images_sha256 ON images (sha256);
+"""
+
+IMAGE_COLUMNS = ("path", "folder", "kind", "role", "legion", "wall", "row", "spot", "poster",
+                 "width", "height", "mode", "bytes", "mtime_ns", "sha256", "a4_path", "a4_status")
+
+# (format, components) from the image header -> Pillow mode
+HEADER_MODES = {
+    ("JPEG", 1): "L", ("JPEG", 3): "RGB", ("JPEG", 4): "CMYK",
+    ("PNG", 2): "LA", ("PNG", 3): "RGB", ("PNG", 4): "RGBA",
+}
+
+# A4 state of an original: built from the current original, built from an
+# older one, present but never recorded in the build manifest, waiting in a
+# *_A4_formatted folder for reorganize_images.py, or not there at all
+A4_STATES = ("current", "stale", "unrecorded", "formatted", "missing")
+
+REPORTS = {
+    "missing": (
+        "Slots without an original",
+        """SELECT s.role, coalesce(s.legion, s.wall) AS place, s.row, s.spot, s.poster, s.folder
+           FROM slots s
+           WHERE NOT EXISTS (SELECT 1 FROM images i WHERE i.folder = s.folder AND i.kind = 'original')
+           {and_filters}
+           ORDER BY s.role, place, s.row, s.spot""",
+    ),
+    "no-a4": (
+        "Originals without an A4 version",
+        """SELECT s.role, coalesce(s.legion, s.wall) AS place, s.a4_status, s.path
+           FROM images s
+           WHERE s.kind = 'original' AND s.a4_status IN ('missing', 'formatted') {and_filters}
+           ORDER BY s.role, place, s.path""",
+    ),
+    "stale": (
+        "A4 versions built from an older original",
+        """SELECT s.role, coalesce(s.legion, s.wall) AS place, s.path, s.a4_path
+           FROM images s
+           WHERE s.kind = 'original' AND s.a4_status = 'stale' {and_filters}
+           ORDER BY s.role, place, s.path""",
+    ),
+    "small": (
+        "Originals under the minimum height",
+        """SELECT s.height, s.width, s.mode, s.role, coalesce(s.legion, s.wall) AS place, s.path
+           FROM images s
+           WHERE s.kind = 'original' AND s.height < :min_height {and_filters}
+           ORDER BY s.height, s.path""",
+    ),
+    "summary": (
+        "Images per role",
+        """SELECT coalesce(s.role, '-') AS role, s.kind, count(*) AS images,
+                  sum(s.a4_status = 'current') AS a4_current, sum(s.a4_status = 'stale') AS stale,
+                  sum(s.a4_status = 'unrecorded') AS unrecorded,
+                  sum(s.a4_status IN ('missing', 'formatted')) AS no_a4,
+                  round(sum(s.bytes) / 1e6, 1) AS mb
+           FROM images s
+           WHERE 1 {and_filters}
+           GROUP BY s.role, s.kind
+           ORDER BY s.role, s.kind""",
+    ),
+}
+
+
+def _relative(path):
+    return os.path.relpath(path, BASE_DIR)
+
+
+def connect(path=CATALOG_PATH, readonly=False):
+    """Open the catalog, creating (or recreating, after a schema change) it if needed."""
+    if readonly:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"no catalog yet at {path}, run catalog.py refresh")
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn = sqlite3.connect(path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+        conn.executescript("DROP TABLE IF EXISTS images; DROP TABLE IF EXISTS slots;")
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+    return conn
+
+
+def collection_slots(index, layout):
+    """
+    Every folder an original is expected in:
+    {folder: (role, legion, wall, row, spot, poster)}.
+    """
+    slots = {}
+    for legion_path in index.subfolders(LEGIONS_PATH):
+        legion = legion_path.name
+        for pose in LEGIONNAIRE_POSES:
+            folder = _relative(legion_path / "legionnaire" / pose)
+            slots[folder] = (f"legionnaire/{pose}", legion, None, None, None, None)
+        slots[_relative(legion_path / "primarch")] = ("primarch", legion, None, None, None, None)
+    for poster in layout.posters():
+        slots[poster.folder] = ("wall", None, poster.wall, poster.row, poster.spot, poster.name)
+    return slots
+
+
+def probe(path):
+    """(width, height, mode) of an image, from its header when possible."""
+    try:
+        header = read_image_header(path)
+        mode = HEADER_MODES.get((header.format, header.components))
+        if mode is not None:
+            return header.width, header.height, mode
+    except (OSError, ValueError):
+        pass
+    # Palette PNGs and anything the header reader does not know
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            return img.width, img.height, img.mode
+    except OSError:
+        return None, None, None
+
+
+def expected_a4(path, role, layout):
+    """Where the A4 version of an original ends up."""
+    if role == "wall":
+        return layout.by_folder(_relative(path.parent)).a4_output_path(path)
+    if role and role.startswith("legionnaire"):
+        return path.parent / f"{path.stem}_A4{path.suffix}"
+    return path.parent / f"{path.stem}_A4.jpeg"
+
+
+def a4_status(path, role, sha256, a4_path, present, manifest):
+    """A4_STATES entry of an original."""
+    if _relative(a4_path) not in present:
+        formatted = path.parent.with_name(f"{path.parent.name}_A4_formatted") / path.name
+        if role and role.startswith("legionnaire") and _relative(formatted) in present:
+            return "formatted"
+        return "missing"
+    entry = manifest["outputs"].get(_relative(a4_path))
+    if entry is None:
+        return "unrecorded"
+    return "current" if entry.get("source_sha256") == sha256 else "stale"
+
+
+def refresh(conn, index=None):
+    """
+    Bring the catalog in line with the tree. Files whose size and mtime match
+    their row keep their stored dimensions and hash; only new or changed
+    files are opened. Returns {"added", "changed", "removed", "unchanged"}.
+    """
+    index = index or scan_collection()
+    layout = load_layout()
+    manifest = load_manifest()
+    slots = collection_slots(index, layout)
+    stored = {row[0]: row for row in conn.execute(
+        "SELECT path, bytes, mtime_ns, width, height, mode, sha256 FROM images")}
+
+    files = []
+    for folder in index.folders():
+        kind_of = [(path, "original") for path in index.originals(folder)]
+        kind_of += [(path, "a4") for path in index.a4_outputs(folder)]
+        kind_of += [(path, "output") for path in index.other_outputs(folder)]
+        for path, kind in kind_of:
+            if folder.name.endswith("_A4_formatted"):
+                kind = "formatted"
+            files.append((path, kind))
+    present = {_relative(path) for path, _ in files}
+
+    counts = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+    rows = []
+    for path, kind in files:
+        key = _relative(path)
+        folder = _relative(path.parent)
+        st = os.stat(path)
+        row = stored.get(key)
+        if row and row[1:3] == (st.st_size, st.st_mtime_ns):
+            width, height, mode, sha256 = row[3:]
+            counts["unchanged"] += 1
+        else:
+            width, height, mode = probe(path)
+            sha256 = file_sha256(path)
+            counts["changed" if row else "added"] += 1
+
+        slot_folder = folder.removesuffix("_A4_formatted")
+        role, legion, wall, row_number, spot, poster = slots.get(slot_folder, (None,) * 6)
+        a4_path = status = None
+        if kind == "original" and role:
+            a4_path = expected_a4(path, role, layout)
+            status = a4_status(path, role, sha256, a4_path, present, manifest)
+            a4_path = _relative(a4_path)
+        rows.append((key, folder, kind, role, legion, wall, row_number, spot, poster,
+                     width, height, mode, st.st_size, st.st_mtime_ns, sha256, a4_path, status))
+    counts["removed"] = len(set(stored) - present)
+
+    with conn:
+        conn.execute("DELETE FROM images")
+        conn.executemany(f"INSERT INTO images VALUES ({', '.join('?' * len(IMAGE_COLUMNS))})",
+                         rows)
+        conn.execute("DELETE FROM slots")
+        conn.executemany("INSERT INTO slots VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         [(folder, *slot) for folder, slot in slots.items()])
+    return counts
+
+
+def report_query(name, role=None, legion=None):
+    """SQL and parameters of a named report, with optional role/legion filters."""
+    _, sql = REPORTS[name]
+    filters = []
+    params = {}
+    if role:
+        filters.append("s.role LIKE :role || '%'")
+        params["role"] = role
+    if legion:
+        filters.append("s.legion = :legion")
+        params["legion"] = legion
+    return sql.format(and_filters="".join(f" AND {f}" for f in filters)), params
+
+
+def print_rows(cursor):
+    """Print a cursor's rows as a table. Returns the row count."""
+    rows = cursor.fetchall()
+    columns = [column[0] for column in cursor.description]
+    cells = [["" if value is None else str(value) for value in row] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)).rstrip())
+    print("-" * min(sum(widths) + 2 * len(widths), 100))
+    for row in cells:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("refresh", help="update the catalog from the tree")
+    report = commands.add_parser("report", help="run a named report")
+    report.add_argument("name", choices=list(REPORTS))
+    report.add_argument("--role", help="only this role (prefix, e.g. legionnaire or legionnaire/1)")
+    report.add_argument("--legion", help="only this legion (e.g. 'Blood Angels')")
+    report.add_argument("--min-height", type=int, default=2000,
+                        help="height limit of the small report (default: 2000)")
+    report.add_argument("--refresh", action="store_true", help="refresh the catalog first")
+    sql = commands.add_parser("sql", help="run a read-only SQL query")
+    sql.add_argument("query")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "refresh" or getattr(args, "refresh", False):
+        with connect() as conn:
+            counts = refresh(conn)
+        conn.close()
+        print(f"Catalog refreshed: {counts['added']} added, {counts['changed']} changed, "
+              f"{counts['removed']} removed, {counts['unchanged']} unchanged "
+              f"({(time.perf_counter() - start) * 1000:.0f}ms)")
+        if args.command == "refresh":
+            return
+
+    start = time.perf_counter()
+    try:
+        conn = connect(readonly=True)
+        if args.command == "report":
+            title, _ = REPORTS[args.name]
+            query, params = report_query(args.name, args.role, args.legion)
+            params["min_height"] = args.min_height
+            print(title)
+            print("="*60)
+            cursor = conn.execute(query, params)
+        else:
+            cursor = conn.execute(args.query)
+        count = print_rows(cursor)
+    except (OSError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"\n{count} rows ({(time.perf_counter() - start) * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
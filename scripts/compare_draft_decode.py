@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Compare draft-mode decoding (JPEG DCT scaling, PNG band reduction) against
+a full-resolution decode.
+Formats each image both ways and reports time, peak image buffer size and
+how far the draft result is from the full decode (PSNR and max pixel error).
+Without arguments a synthetic oversized JPEG is generated and used.
+"""
+
+import argparse
+import math
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+
+from a4_engine import A4_HEIGHT_PX, A4_WIDTH_PX, convert_to_rgb, decode, resample
+
+
+def make_synthetic_jpeg(path, size=(7440, 10524)):
+    """Write a detailed test JPEG (3x A4 by default) to path."""
+    small = Image.effect_mandelbrot((size[0] // 8, size[1] // 8), (-2.2, -1.6, 1.0, 1.6), 200)
+    noise = Image.effect_noise(small.size, 48)
+    base = Image.merge("RGB", (small, noise, ImageChops.invert(small)))
+    img = base.resize(size, Image.Resampling.BICUBIC).filter(ImageFilter.DETAIL)
+    img.save(path, "JPEG", quality=95)
+    return path
+
+
+def run_path(input_path, draft):
+    """Format one image and return (A4 image, seconds, decoded size)."""
+    start = time.perf_counter()
+    img = decode(input_path, draft)
+    img.load()
+    decoded_size = img.size
+    result = resample(convert_to_rgb(img))
+    return result, time.perf_counter() - start, decoded_size
+
+
+def psnr(a, b):
+    """Peak signal-to-noise ratio between two RGB images, in dB."""
+    rms = ImageStat.Stat(ImageChops.difference(a, b)).rms
+    mse = sum(value * value for value in rms) / len(rms)
+    if mse == 0:
+        return math.inf
+    return 10 * math.log10(255 * 255 / mse)
+
+
+def compare(input_path, repeat=3):
+    """Print the speed and quality comparison for one image."""
+    full_times = []
+    draft_times = []
+    for _ in range(repeat):
+        full, seconds, full_size = run_path(input_path, draft=False)
+        full_times.append(seconds)
+        drafted, seconds, draft_size = run_path(input_path, draft=True)
+        draft_times.append(seconds)
+
+    max_error = max(high for _, high in ImageChops.difference(full, drafted).getextrema())
+    full_mb = full_size[0] * full_size[1] * 3 / 1e6
+    draft_mb = draft_size[0] * draft_size[1] * 3 / 1e6
+
+    print(f"📄 {Path(input_path).name}")
+    print(f"  Full decode:  {full_size[0]}x{full_size[1]} ({full_mb:.0f} MB) "
+          f"→ {min(full_times):.2f}s")
+    print(f"  Draft decode: {draft_size[0]}x{draft_size[1]} ({draft_mb:.0f} MB) "
+          f"→ {min(draft_times):.2f}s")
+    print(f"  Speed-up: {min(full_times) / min(draft_times):.2f}x")
+    print(f"  PSNR vs full decode: {psnr(full, drafted):.1f} dB, max pixel error {max_error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", nargs="*", help="JPEG images to compare")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("DRAFT DECODE COMPARISON")
+    print(f"Target: {A4_WIDTH_PX}x{A4_HEIGHT_PX}px")
+    print("=" * 60)
+
+    if args.images:
+        for image in args.images:
+            compare(image, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in (2, 3, 4):
+            size = (A4_WIDTH_PX * scale, A4_HEIGHT_PX * scale)
+            path = make_synthetic_jpeg(Path(tmp) / f"synthetic_{scale}x.jpeg", size)
+            compare(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Per-file events and progress display for the batch scripts.
+A Reporter receives one event per file: stage, path, outcome, seconds and
+bytes in and out. Depending on the output mode it prints the familiar line
+per file, keeps one live status line (images/s, MB/s, ETA) or stays quiet
+until the summary. With --events PATH every event and a final summary
+record are also appended to PATH as JSON lines, for other tools to read;
+--events - writes them to stdout and keeps everything else off it.
+"""
+
+import json
+import os
+import sys
+import time
+
+from paths import BASE_DIR
+
+OUTPUT_MODES = ["lines", "progress", "quiet"]
+
+# --events value that sends the JSON lines to stdout
+EVENTS_STDOUT = "-"
+
+# Seconds between redraws of the progress line
+PROGRESS_INTERVAL = 0.25
+
+
+def default_output():
+    """Live progress on a terminal, a line per file when output is redirected."""
+    return "progress" if sys.stdout.isatty() else "lines"
+
+
+class Reporter:
+    """
+    Counts outcomes and bytes for one stage of a run and shows progress.
+    total is the number of files expected through event(), for the ETA.
+    Banners and summaries go through info() and report() so that -q and
+    --events - decide what reaches stdout.
+    """
+
+    def __init__(self, stage, total=0, output=None, events_path=None):
+        self.stage = stage
+        self.total = total
+        # JSON lines on stdout leave no room for anything else there
+        self.output = "quiet" if events_path == EVENTS_STDOUT else output or default_output()
+        self.counts = {}
+        self.done = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.start = time.perf_counter()
+        self._drawn = 0.0
+        self.events_path = events_path
+        self._events = None
+
+    def _write(self, record):
+        if not self.events_path:
+            return
+        if self._events is None:
+            self._events = (sys.stdout if self.events_path == EVENTS_STDOUT
+                            else open(self.events_path, "a", encoding="utf-8"))
+        self._events.write(json.dumps(record) + "\n")
+
+    def _record(self, path, outcome, fields):
+        # Steps of another stage (the pipeline's rename, hold, ...) count as "stage outcome"
+        stage = fields.pop("stage", self.stage)
+        key = outcome if stage == self.stage else f"{stage} {outcome}"
+        self.counts[key] = self.counts.get(key, 0) + 1
+        record = {"event": "file", "stage": stage,
+                  "path": os.path.relpath(path, BASE_DIR), "outcome": outcome}
+        record.update((key, value) for key, value in fields.items() if value is not None)
+        self._write(record)
+
+    def event(self, path, outcome, seconds=None, bytes_in=None, bytes_out=None, line=None,
+              **fields):
+        """
+        One file went through the stage. outcome is a short word ("formatted",
+        "copied", "error", ...), line what "lines" mode prints for it.
+        """
+        self.done += 1
+        self.bytes_in += bytes_in or 0
+        self.bytes_out += bytes_out or 0
+        self._record(path, outcome, dict(
+            fields, seconds=seconds and round(seconds, 4), bytes_in=bytes_in,
+            bytes_out=bytes_out))
+        if self.output == "lines":
+            if line:
+                print(line)
+        elif self.output == "progress":
+            self._draw()
+
+    def note(self, path, outcome, line=None, **fields):
+        """A file that was looked at but not processed (up to date, refused, ...)."""
+        self._record(path, outcome, fields)
+        self.say(line)
+
+    def say(self, line):
+        """A line for the terminal that is not part of the progress display."""
+        if line and self.output == "lines":
+            print(line)
+
+    def info(self, line=""):
+        """Banners, headings and hints: everything but the summary, silent with -q."""
+        if self.output != "quiet":
+            print(line)
+
+    def report(self, line=""):
+        """A summary line: printed in every mode, unless stdout carries the events."""
+        if self.events_path != EVENTS_STDOUT:
+            print(line)
+
+    def warn(self, line):
+        """A problem the user should see whatever the mode; goes to stderr."""
+        print(line, file=sys.stderr)
+
+    def count(self, *outcomes):
+        """Number of events with any of the outcomes."""
+        return sum(self.counts.get(outcome, 0) for outcome in outcomes)
+
+    def _draw(self, final=False):
+        now = time.perf_counter()
+        if not final and now - self._drawn < PROGRESS_INTERVAL:
+            return
+        self._drawn = now
+        elapsed = max(now - self.start, 1e-9)
+        rate = self.done / elapsed
+        eta = (self.total - self.done) / rate if rate and self.total > self.done else 0
+        errors = self.counts.get("error", 0)
+        text = (f"{self.stage}: {self.done}/{self.total or '?'}  {rate:.1f} img/s  "
+                f"{self.bytes_in / 1e6 / elapsed:.1f} MB/s  ETA {eta:.0f}s"
+                + (f"  ✗ {errors}" if errors else ""))
+        sys.stdout.write(f"\r{text:<78}")
+        sys.stdout.flush()
+
+    def summary(self):
+        """Machine-readable totals of the stage so far."""
+        elapsed = time.perf_counter() - self.start
+        return {
+            "stage": self.stage,
+            "files": self.done,
+            "outcomes": dict(sorted(self.counts.items())),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "seconds": round(elapsed, 3),
+            "images_per_second": round(self.done / elapsed, 2) if elapsed else 0,
+            "mb_per_second": round(self.bytes_in / 1e6 / elapsed, 2) if elapsed else 0,
+        }
+
+    def close(self, **extra):
+        """End the progress line and write the summary record. Returns the summary."""
+        if self.output == "progress" and self.done:
+            self._draw(final=True)
+            print()
+        summary = self.summary()
+        summary.update(extra)
+        if self.events_path:
+            self._write(dict(event="summary", **summary))
+            if self._events is sys.stdout:
+                sys.stdout.flush()
+            else:
+                self._events.close()
+            self._events = None
+        return summary
+
+
+def add_report_arguments(parser):
+    """Add the output mode and --events options to an argument parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-q", "--quiet", dest="output", action="store_const", const="quiet",
+                       help="print only the summary")
+    group.add_argument("--progress", dest="output", action="store_const", const="progress",
+                       help="one live line with images/s, MB/s and ETA "
+                            "(default on a terminal)")
+    group.add_argument("-v", "--verbose", dest="output", action="store_const", const="lines",
+                       help="a line per file (default when output is redirected)")
+    parser.add_argument("--events", metavar="PATH", default=None,
+                        help="append every per-file event and the summary to PATH as JSON "
+                             "lines (- for stdout, with no other output there)")
+    return parser
+
+
+def reporter_for(args, stage, total=0):
+    """Reporter configured from add_report_arguments options."""
+    return Reporter(stage, total, getattr(args, "output", None), getattr(args, "events", None))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Export a wall as one print-ready multi-page A4 PDF.
+Pages follow the wall layout (row by row, spot by spot). Each page embeds the
+poster's existing *_A4.jpeg bytes directly as a DCTDecode image filling the
+A4 page at 300 DPI - nothing is decoded or re-encoded, and the JPEG data is
+streamed straight from disk so memory stays flat however many pages there are.
+"""
+
+import argparse
+import shutil
+from pathlib import Path
+
+from image_header import read_image_header
+from image_index import scan_collection
+from wall_layout import BASE_DIR, load_layout
+
+EXPORT_DIR = BASE_DIR / "prints"
+
+# A4 in PDF points (1/72 inch)
+A4_WIDTH_PT = 595.276
+A4_HEIGHT_PT = 841.890
+
+JPEG_COLOR_SPACES = {1: "/DeviceGray", 3: "/DeviceRGB", 4: "/DeviceCMYK"}
+
+
+class PdfWriter:
+    """Minimal streaming PDF writer: objects are written as they are added."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        self.next_id = 1
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data):
+        self.f.write(data)
+
+    def reserve(self):
+        """Reserve an object number to be written later."""
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def begin(self, object_id):
+        self.offsets[object_id] = self.f.tell()
+        self._write(f"{object_id} 0 obj\n".encode())
+
+    def add(self, body, object_id=None):
+        """Write a dictionary (or other) object; returns its number."""
+        object_id = object_id or self.reserve()
+        self.begin(object_id)
+        self._write(body.encode() + b"\nendobj\n")
+        return object_id
+
+    def add_stream(self, dictionary, data=None, source=None, length=None):
+        """Write a stream object from bytes or by copying an open file."""
+        object_id = self.reserve()
+        self.begin(object_id)
+        length = len(data) if data is not None else length
+        self._write(f"<< {dictionary} /Length {length} >>\nstream\n".encode())
+        if data is not None:
+            self._write(data)
+        else:
+            shutil.copyfileobj(source, self.f, 1 << 20)
+        self._write(b"\nendstream\nendobj\n")
+        return object_id
+
+    def close(self, root_id, info_id=None):
+        """Write the cross-reference table and trailer."""
+        xref_offset = self.f.tell()
+        self._write(f"xref\n0 {self.next_id}\n".encode())
+        self._write(b"0000000000 65535 f \n")
+        for object_id in range(1, self.next_id):
+            self._write(f"{self.offsets[object_id]:010d} 00000 n \n".encode())
+        info = f" /Info {info_id} 0 R" if info_id else ""
+        self._write(f"trailer\n<< /Size {self.next_id} /Root {root_id} 0 R{info} >>\n"
+                    f"startxref\n{xref_offset}\n%%EOF\n".encode())
+
+
+def add_jpeg_page(pdf, pages_id, image_path):
+    """Append one A4 page showing image_path edge to edge; returns the page id."""
+    header = read_image_header(image_path)
+    if header.format != "JPEG":
+        raise ValueError(f"{image_path.name} is not a JPEG")
+
+    color_space = JPEG_COLOR_SPACES.get(header.components)
+    if color_space is None:
+        raise ValueError(f"{image_path.name}: unsupported JPEG with {header.components} components")
+    decode = " /Decode [1 0 1 0 1 0 1 0]" if header.components == 4 and header.adobe else ""
+
+    with open(image_path, "rb") as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        image_id = pdf.add_stream(
+            f"/Type /XObject /Subtype /Image /Width {header.width} /Height {header.height} "
+            f"/ColorSpace {color_space} /BitsPerComponent {header.bits}{decode} "
+            f"/Filter /DCTDecode",
+            source=f, length=size,
+        )
+
+    content = f"q {A4_WIDTH_PT} 0 0 {A4_HEIGHT_PT} 0 0 cm /Im0 Do Q".encode()
+    content_id = pdf.add_stream("", data=content)
+    return pdf.add(
+        f"<< /Type /Page /Parent {pages_id} 0 R "
+        f"/MediaBox [0 0 {A4_WIDTH_PT} {A4_HEIGHT_PT}] "
+        f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> "
+        f"/Contents {content_id} 0 R >>"
+    )
+
+
+def write_pdf(image_paths, output_path, title=None):
+    """Write image_paths as consecutive A4 pages of one PDF."""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+
+    with open(tmp_path, "wb") as f:
+        pdf = PdfWriter(f)
+        pages_id = pdf.reserve()
+        page_ids = [add_jpeg_page(pdf, pages_id, path) for path in image_paths]
+
+        kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+        pdf.add(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>", pages_id)
+        root_id = pdf.add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>")
+        info_id = pdf.add(f"<< /Title ({title}) >>") if title else None
+        pdf.close(root_id, info_id)
+
+    tmp_path.replace(output_path)
+    return len(page_ids)
+
+
+def wall_images(layout, index, wall):
+    """A4 images of a wall in layout order, plus the posters that have none."""
+    images = []
+    missing = []
+    for poster in layout.posters(wall):
+        a4_image = poster.find_a4(index)
+        if a4_image is None:
+            missing.append(poster)
+        else:
+            images.append(a4_image)
+    return images, missing
+
+
+def export_wall(wall, output_path=None, layout=None, index=None):
+    """Export one wall to a PDF; returns (output path, pages, missing posters)."""
+    layout = layout or load_layout()
+    index = index or scan_collection()
+    output_path = Path(output_path or EXPORT_DIR / f"{wall}.pdf")
+
+    images, missing = wall_images(layout, index, wall)
+    pages = write_pdf(images, output_path, title=wall)
+    return output_path, pages, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("walls", nargs="*", help="walls to export (default: all)")
+    parser.add_argument("-o", "--output", type=Path,
+                        help="output PDF (single wall only; default: prints/<wall>.pdf)")
+    args = parser.parse_args()
+
+    layout = load_layout()
+    walls = args.walls or list(layout.walls)
+    if args.output and len(walls) > 1:
+        parser.error("--output needs exactly one wall")
+
+    index = scan_collection()
+
+    print("Wall PDF Export")
+    print("="*60)
+    for wall in walls:
+        if wall not in layout.walls:
+            print(f"❌ Unknown wall: {wall}")
+            continue
+        output_path, pages, missing = export_wall(wall, args.output, layout, index)
+        info = layout.walls[wall]
+        print(f"📄 {wall} ({info.columns}x{info.rows}): {pages} pages → {output_path}")
+        for poster in missing:
+            print(f"   ⚠️  No A4 image for row {poster.row} spot {poster.spot}: {poster.name}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
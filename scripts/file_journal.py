@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Crash-safe file moves for the rename and reorganize scripts.
+A FilePlan collects every move, delete and folder removal up front and
+checks each one against the in-memory ImageIndex (plus the plan's own
+earlier operations), so planning - and a --dry-run over the whole tree -
+never touches the disk. Applying writes the plan to an append-only journal
+in .journal/, performs each operation with os.replace and appends a line
+once it is done. Deleted files go to a trash folder until the whole plan
+has been applied, so an interrupted run can be finished (--resume) or
+undone (--rollback) from its journal.
+"""
+
+import errno
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from image_index import BASE_DIR
+
+JOURNAL_DIR = BASE_DIR / ".journal"
+TRASH_DIR = JOURNAL_DIR / "trash"
+
+# Final status line of a journal
+COMMITTED = "committed"
+ROLLED_BACK = "rolled back"
+
+
+def _relative(path):
+    """Journal paths are relative to the repository root."""
+    return os.path.relpath(os.path.abspath(path), BASE_DIR)
+
+
+def _key(path):
+    return os.path.abspath(path)
+
+
+class FilePlan:
+    """
+    Ordered file operations planned against an ImageIndex.
+    Operations are (op, source, target) with op "move", "delete" (target is
+    filled in with a trash path when the journal is written) or "rmdir".
+    """
+
+    def __init__(self, index, name):
+        self.index = index
+        self.name = name
+        self.operations = []
+        self._added = {}
+        self._removed = set()
+
+    def exists(self, path):
+        """True if path exists once the operations planned so far are applied."""
+        key = _key(path)
+        if key in self._removed:
+            return False
+        return key in self._added or self.index.contains(path)
+
+    def listdir(self, folder):
+        """Images and sub-folders of folder once the planned operations are applied."""
+        entries = [path for path in (self.index.images(folder) + self.index.other_outputs(folder)
+                                     + self.index.subfolders(folder))
+                   if _key(path) not in self._removed]
+        entries += [path for path in self._added.values()
+                    if _key(path.parent) == _key(folder)]
+        return entries
+
+    def _remove(self, path):
+        self._removed.add(_key(path))
+        self._added.pop(_key(path), None)
+
+    def move(self, source, target):
+        """Plan renaming source to target. Returns False, planning nothing, if target exists."""
+        if self.exists(target):
+            return False
+        self.operations.append(("move", Path(source), Path(target)))
+        self._remove(source)
+        self._removed.discard(_key(target))
+        self._added[_key(target)] = Path(target)
+        return True
+
+    def delete(self, path):
+        """Plan deleting path."""
+        self.operations.append(("delete", Path(path), None))
+        self._remove(path)
+
+    def rmdir(self, folder):
+        """Plan removing folder. Returns False, planning nothing, if it would not be empty."""
+        if self.listdir(folder):
+            return False
+        self.operations.append(("rmdir", Path(folder), None))
+        self._remove(folder)
+        return True
+
+    def __len__(self):
+        return len(self.operations)
+
+
+def _append(journal_path, record):
+    """Append one record and make sure it reached the disk."""
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_journal(plan):
+    """Write plan to a new journal and return its path. Nothing is moved yet."""
+    JOURNAL_DIR.mkdir(exist_ok=True)
+    journal_path = JOURNAL_DIR / f"{plan.name}-{datetime.now():%Y%m%d-%H%M%S-%f}.jsonl"
+    trash = TRASH_DIR / journal_path.stem
+    operations = []
+    for op, source, target in plan.operations:
+        if op == "delete":
+            target = trash / _relative(source)
+        operations.append([op, _relative(source), target and _relative(target)])
+    with open(journal_path, "x", encoding="utf-8") as f:
+        f.write(json.dumps({"name": plan.name, "created": datetime.now().isoformat(),
+                            "operations": operations}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return journal_path
+
+
+def load_journal(journal_path):
+    """
+    (operations, state, status) of a journal: state maps an operation's
+    index to "done", "skipped" or "undone", status is COMMITTED,
+    ROLLED_BACK or None while the run is unfinished.
+    """
+    records = []
+    with open(journal_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A line torn by a crash; its operation is treated as pending
+                break
+    state = {}
+    status = None
+    for record in records[1:]:
+        if "status" in record:
+            status = record["status"]
+        else:
+            state[record["index"]] = record["state"]
+    return records[0]["operations"], state, status
+
+
+def pending_journals(name):
+    """Journals of name that were neither committed nor rolled back, oldest first."""
+    return [path for path in sorted(JOURNAL_DIR.glob(f"{name}-*.jsonl"))
+            if load_journal(path)[2] is None]
+
+
+def apply_journal(journal_path):
+    """
+    Perform the pending operations of a journal in order, then empty its
+    trash and mark it committed. A folder that turns out not to be empty is
+    skipped with a warning; any other error stops the run with the journal
+    left pending.
+    """
+    operations, state, status = load_journal(journal_path)
+    if status is not None:
+        return
+    if "undone" in state.values():
+        raise ValueError(f"{journal_path.name} is half rolled back, finish with --rollback")
+
+    first = True
+    for i, (op, source, target) in enumerate(operations):
+        if i in state:
+            continue
+        source = BASE_DIR / source
+        target = target and BASE_DIR / target
+        if op == "rmdir":
+            try:
+                os.rmdir(source)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"  ⚠️  Not removing {_relative(source)}: {e.strerror}", file=sys.stderr)
+                _append(journal_path, {"index": i, "state": "skipped"})
+                continue
+        elif first and not os.path.lexists(source) and os.path.lexists(target):
+            # Moved just before an interruption, but not journaled yet
+            pass
+        else:
+            if os.path.lexists(target):
+                raise FileExistsError(errno.EEXIST, "Target already exists", str(target))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, target)
+        first = False
+        _append(journal_path, {"index": i, "state": "done"})
+
+    shutil.rmtree(TRASH_DIR / journal_path.stem, ignore_errors=True)
+    _append(journal_path, {"status": COMMITTED})
+
+
+def rollback_journal(journal_path):
+    """Undo the done operations of an unfinished journal, newest first."""
+    operations, state, status = load_journal(journal_path)
+    if status == COMMITTED:
+        raise ValueError(f"{journal_path.name} is committed, its deleted files are gone")
+    if status == ROLLED_BACK:
+        return
+
+    first = True
+    for i in reversed(range(len(operations))):
+        if state.get(i) != "done":
+            continue
+        op, source, target = operations[i]
+        source = BASE_DIR / source
+        target = target and BASE_DIR / target
+        if op == "rmdir":
+            source.mkdir(exist_ok=True)
+        elif first and os.path.lexists(source) and not os.path.lexists(target):
+            # Undone just before an interruption, but not journaled yet
+            pass
+        else:
+            if os.path.lexists(source):
+                raise FileExistsError(errno.EEXIST, "Original path is taken", str(source))
+            os.replace(target, source)
+        first = False
+        _append(journal_path, {"index": i, "state": "undone"})
+
+    shutil.rmtree(TRASH_DIR / journal_path.stem, ignore_errors=True)
+    _append(journal_path, {"status": ROLLED_BACK})
+
+
+def add_journal_arguments(parser, dry_run=True):
+    """Add the --resume and --rollback options, and --dry-run unless dry_run is False."""
+    group = parser.add_mutually_exclusive_group()
+    if dry_run:
+        group.add_argument("--dry-run", action="store_true",
+                           help="plan and list every operation without touching any file")
+    group.add_argument("--resume", action="store_true",
+                       help="finish an interrupted run from its journal")
+    group.add_argument("--rollback", action="store_true",
+                       help="undo an interrupted run from its journal")
+
+
+def run_plan(plan, dry_run=False):
+    """
+    Journal and apply plan (unless dry_run). Returns True on success; on
+    failure the journal is left for --resume or --rollback.
+    """
+    if dry_run or not plan.operations:
+        return True
+    journal_path = write_journal(plan)
+    try:
+        apply_journal(journal_path)
+    except OSError as e:
+        print(f"\n❌ Stopped: {e}", file=sys.stderr)
+        print(f"   Journal: {_relative(journal_path)}", file=sys.stderr)
+        print("   Fix the problem and run again with --resume, or undo with --rollback",
+              file=sys.stderr)
+        return False
+    return True
+
+
+def finish_pending(name, rollback=False):
+    """Resume or roll back every unfinished journal of name. Returns True on success."""
+    journals = pending_journals(name)
+    if not journals:
+        print("No interrupted run to finish")
+        return True
+    for journal_path in (reversed(journals) if rollback else journals):
+        operations, state, _ = load_journal(journal_path)
+        action = "Rolling back" if rollback else "Resuming"
+        print(f"{action} {journal_path.name}: {len(state)} of {len(operations)} operations done")
+        try:
+            if rollback:
+                rollback_journal(journal_path)
+            else:
+                apply_journal(journal_path)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return False
+    print("✓ Done")
+    return True
+
+
+def refuse_if_pending(name):
+    """Print a hint and return True if name has an unfinished run."""
+    journals = pending_journals(name)
+    if journals:
+        print(f"❌ An earlier run was interrupted ({journals[-1].name})", file=sys.stderr)
+        print("   Run again with --resume to finish it or --rollback to undo it", file=sys.stderr)
+    return bool(journals)
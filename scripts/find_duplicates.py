@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Find duplicate and near-duplicate originals across the collection.
+Every original gets a 64-bit dHash (gradient) and pHash (low DCT
+frequencies), computed with NumPy from one small copy of the image; JPEGs
+are draft-decoded so even large files cost a few milliseconds. Both hashes are
+greyscale, so an 8x8 mean colour grid is kept too: the legionnaire poses are
+the same art recoloured per legion and must not count as duplicates.
+Hashes are cached by content hash in .image_hashes.json, and an unchanged
+file (same size and mtime) is not even re-read. Images whose hashes are
+within --threshold bits of each other and whose colours match are grouped
+into clusters.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from a4_manifest import BASE_DIR, file_sha256
+from image_index import scan_collection
+
+CACHE_PATH = BASE_DIR / ".image_hashes.json"
+CACHE_VERSION = 2
+
+HASH_SIZE = 8      # 8x8 = 64-bit hashes
+PHASH_SIZE = 32    # pHash takes the top-left 8x8 of a 32x32 DCT
+
+COLOR_GRID = 8
+
+# Side of the one small RGB copy every hash is derived from
+BASE_SIZE = 64
+
+# Max differing bits (of 64) in both dHash and pHash for a near-duplicate
+DEFAULT_THRESHOLD = 10
+
+# Folders holding primarch art: the legion primarch folders, the two primarch
+# rows of the main wall and the traitor primarchs. Each holds a different
+# painting of its primarch, so --check expects no cluster among them.
+PRIMARCH_FOLDER_NAMES = ("primarch", "row_1_primarchs", "row_3_primarchs", "traitor_primarchs")
+
+# Max colour difference (0-255, worst grid cell) for a near-duplicate. Resized
+# or recompressed copies stay under ~13, recoloured legion art starts around
+# 28. Cropped copies lose their edge cells (even a 1% crop reaches ~28), so
+# they are not matched; --check shows the current margins.
+COLOR_TOLERANCE = 20
+
+
+def _gray(img, size):
+    """Greyscale float array of img resized to size (w, h)."""
+    small = img.convert("L").resize(size, Image.Resampling.BOX)
+    return np.asarray(small, dtype=np.float32)
+
+
+def _pack(bits):
+    """64 booleans -> int."""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II matrix, so the 2-D DCT of x is D @ x @ D.T."""
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+DCT = _dct_matrix(PHASH_SIZE)
+
+
+def dhash(gray):
+    """Horizontal gradient hash of a HASH_SIZE x (HASH_SIZE + 1) greyscale array."""
+    return _pack(gray[:, 1:] > gray[:, :-1])
+
+
+def phash(gray):
+    """DCT hash of a PHASH_SIZE x PHASH_SIZE greyscale array."""
+    low = (DCT @ gray @ DCT.T)[:HASH_SIZE, :HASH_SIZE]
+    return _pack(low > np.median(low.ravel()[1:]))
+
+
+def color_grid(img):
+    """Mean colour of each cell of a COLOR_GRID x COLOR_GRID grid, as bytes."""
+    return img.convert("RGB").resize((COLOR_GRID, COLOR_GRID), Image.Resampling.BOX).tobytes()
+
+
+def hashes_of(img):
+    """
+    (dhash, phash, colour grid) of an opened image. It is decoded once (a
+    JPEG at the smallest draft scale of at least BASE_SIZE) and reduced to
+    one BASE_SIZE x BASE_SIZE RGB copy that all three are derived from.
+    """
+    if img.format == "JPEG":
+        img.draft("RGB", (BASE_SIZE, BASE_SIZE))
+    base = img.convert("RGB").resize((BASE_SIZE, BASE_SIZE), Image.Resampling.BOX,
+                                     reducing_gap=2.0)
+    return (dhash(_gray(base, (HASH_SIZE + 1, HASH_SIZE))),
+            phash(_gray(base, (PHASH_SIZE, PHASH_SIZE))), color_grid(base))
+
+
+def image_hashes(path):
+    """(dhash, phash, colour grid, width, height) of an image file."""
+    with Image.open(path) as img:
+        width, height = img.size
+        return (*hashes_of(img), width, height)
+
+
+class HashCache:
+    """
+    Perceptual hashes keyed by file content hash.
+    "files" maps each original (relative path) to its size, mtime and
+    SHA-256; "hashes" maps a SHA-256 to its dHash, pHash, colour grid and
+    pixel size.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                raise ValueError("old cache")
+            self.files, self.hashes = data["files"], data["hashes"]
+        except (OSError, ValueError, KeyError):
+            self.files, self.hashes = {}, {}
+
+    def sha256(self, path):
+        """Content hash of path, reusing the cached one while size and mtime match."""
+        key = os.path.relpath(Path(path).resolve(), BASE_DIR)
+        st = os.stat(path)
+        entry = self.files.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["sha256"]
+        digest = file_sha256(path)
+        self.files[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        self._dirty = True
+        return digest
+
+    def lookup(self, path):
+        """(sha256, dhash, phash, colour grid, width, height) of path, computed on a miss."""
+        digest = self.sha256(path)
+        entry = self.hashes.get(digest)
+        if entry is None:
+            self.misses += 1
+            d, p, colors, width, height = image_hashes(path)
+            entry = {"dhash": f"{d:016x}", "phash": f"{p:016x}", "colors": colors.hex(),
+                     "size": [width, height]}
+            self.hashes[digest] = entry
+            self._dirty = True
+        else:
+            self.hits += 1
+        return (digest, int(entry["dhash"], 16), int(entry["phash"], 16),
+                bytes.fromhex(entry["colors"]), *entry["size"])
+
+    def save(self):
+        """Write the cache atomically if it changed, dropping files that are gone."""
+        if not self._dirty:
+            return
+        self.files = {key: entry for key, entry in self.files.items()
+                      if (BASE_DIR / key).exists()}
+        live = {entry["sha256"] for entry in self.files.values()}
+        self.hashes = {digest: entry for digest, entry in self.hashes.items() if digest in live}
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "files": self.files, "hashes": self.hashes},
+                      f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def collection_originals(index):
+    """Every original image in the collection (not outputs, not *_A4_formatted)."""
+    return [path for folder in index.folders() if not folder.name.endswith("_A4_formatted")
+            for path in index.originals(folder)]
+
+
+def hamming_matrix(hashes):
+    """Pairwise differing bits between 64-bit hashes, as an n x n array."""
+    values = np.array(hashes, dtype=np.uint64)
+    xor = values[:, None] ^ values[None, :]
+    bits = np.unpackbits(xor.view(np.uint8).reshape(len(values), len(values), 8), axis=2)
+    return bits.sum(axis=2)
+
+
+def color_distance_matrix(grids):
+    """
+    Pairwise colour difference as an n x n array: the largest mean absolute
+    channel difference of any grid cell, so a recoloured region stands out.
+    """
+    values = np.array([np.frombuffer(grid, dtype=np.uint8).reshape(-1, 3) for grid in grids],
+                      dtype=np.int16)
+    return np.abs(values[:, None] - values[None, :]).mean(axis=3).max(axis=2)
+
+
+def find_clusters(entries, threshold=DEFAULT_THRESHOLD, color_tolerance=COLOR_TOLERANCE):
+    """
+    Group (path, sha256, dhash, phash, colour grid, width, height) entries.
+    Two images are linked when their content is identical, or both hash
+    distances are within threshold and their colour grids are within
+    color_tolerance; clusters are the connected groups.
+    Returns a list of (kind, members) with kind "exact" when every member
+    has the same content, else "near"; members are sorted largest first.
+    """
+    if not entries:
+        return []
+    d_distance = hamming_matrix([entry[2] for entry in entries])
+    p_distance = hamming_matrix([entry[3] for entry in entries])
+    c_distance = color_distance_matrix([entry[4] for entry in entries])
+    digests = np.array([entry[1] for entry in entries])
+    linked = ((d_distance <= threshold) & (p_distance <= threshold)
+              & (c_distance <= color_tolerance)) | (digests[:, None] == digests[None, :])
+
+    parent = list(range(len(entries)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(linked, 1))):
+        parent[root(i)] = root(j)
+
+    groups = {}
+    for i in range(len(entries)):
+        groups.setdefault(root(i), []).append(entries[i])
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda entry: (-entry[5] * entry[6], str(entry[0])))
+        kind = "exact" if len({entry[1] for entry in members}) == 1 else "near"
+        clusters.append((kind, members))
+    clusters.sort(key=lambda cluster: str(cluster[1][0][0]))
+    return clusters
+
+
+def scan_duplicates(paths, cache=None, threshold=DEFAULT_THRESHOLD):
+    """Hash paths (through the cache) and return their clusters."""
+    cache = cache or HashCache()
+    try:
+        entries = [(path, *cache.lookup(path)) for path in paths]
+    finally:
+        cache.save()
+    return find_clusters(entries, threshold)
+
+
+def cluster_leaders(paths, cache=None, threshold=DEFAULT_THRESHOLD, near=False):
+    """
+    Map each duplicate in paths to the cluster member it can share an output
+    with: the largest image of its cluster. Only exact clusters unless near.
+    """
+    leaders = {}
+    for kind, members in scan_duplicates(paths, cache, threshold):
+        if kind == "exact" or near:
+            for entry in members[1:]:
+                leaders[entry[0]] = members[0][0]
+    return leaders
+
+
+def primarch_art(paths):
+    """The originals in paths that sit under one of PRIMARCH_FOLDER_NAMES."""
+    return [path for path in paths
+            if any(part in PRIMARCH_FOLDER_NAMES for part in Path(path).parent.parts)]
+
+
+def _copies(img):
+    """(name, image) copies of img that must still count as the same art."""
+    width, height = img.size
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=70)
+    buffer.seek(0)
+    return [
+        ("half size", img.resize((width // 2, height // 2), Image.Resampling.LANCZOS)),
+        ("JPEG q70", Image.open(buffer)),
+    ]
+
+
+def _linked(a, b, threshold, color_tolerance):
+    """(linked, dhash bits, phash bits, colour difference) of two (d, p, colours) hashes."""
+    d = bin(a[0] ^ b[0]).count("1")
+    p = bin(a[1] ^ b[1]).count("1")
+    c = int(color_distance_matrix([a[2], b[2]])[0, 1])
+    return d <= threshold and p <= threshold and c <= color_tolerance, d, p, c
+
+
+def check_thresholds(paths, threshold=DEFAULT_THRESHOLD, color_tolerance=COLOR_TOLERANCE):
+    """
+    Check the thresholds against the primarch art of the collection: a
+    resized or recompressed copy of every primarch image must be
+    linked to it, and no two different primarch images may be. Prints the
+    margins and every failure; returns True if all checks pass.
+    """
+    art = primarch_art(paths)
+    hashes = []
+    misses = []
+    worst = (0, 0, 0)
+    for path in art:
+        with Image.open(path) as img:
+            img = img.convert("RGB")
+        original = hashes_of(img)
+        hashes.append(original)
+        for name, copy in _copies(img):
+            linked, *distance = _linked(original, hashes_of(copy), threshold, color_tolerance)
+            worst = tuple(max(pair) for pair in zip(worst, distance))
+            if not linked:
+                misses.append((path, name, distance))
+
+    false_matches = []
+    closest = None
+    for i in range(len(art)):
+        for j in range(i + 1, len(art)):
+            linked, *distance = _linked(hashes[i], hashes[j], threshold, color_tolerance)
+            if closest is None or max(distance[:2]) < max(closest[:2]):
+                closest = distance
+            if linked:
+                false_matches.append((art[i], art[j], distance))
+
+    print(f"Primarch images: {len(art)} (threshold {threshold} bits, "
+          f"colour tolerance {color_tolerance})")
+    print(f"Copies: worst dHash {worst[0]}, pHash {worst[1]}, colour {worst[2]}")
+    if closest:
+        print(f"Different art: closest dHash {closest[0]}, pHash {closest[1]}, "
+              f"colour {closest[2]}")
+    for path, name, (d, p, c) in misses:
+        print(f"❌ {os.path.relpath(path, BASE_DIR)} - {name} copy not matched "
+              f"(dHash {d}, pHash {p}, colour {c})")
+    for a, b, (d, p, c) in false_matches:
+        print(f"❌ {os.path.relpath(a, BASE_DIR)} ≈ {os.path.relpath(b, BASE_DIR)} "
+              f"(dHash {d}, pHash {p}, colour {c})")
+    if not misses and not false_matches:
+        print("✓ Every copy matched, no two primarch paintings did")
+    return not misses and not false_matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD,
+                        help=f"max differing bits for a near-duplicate (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--json", action="store_true", help="print the clusters as JSON")
+    parser.add_argument("--check", action="store_true",
+                        help="check the thresholds against the primarch art and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        paths = collection_originals(scan_collection())
+        sys.exit(0 if check_thresholds(paths, args.threshold) else 1)
+
+    start = time.perf_counter()
+    cache = HashCache()
+    paths = collection_originals(scan_collection())
+    clusters = scan_duplicates(paths, cache, args.threshold)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps([
+            {"kind": kind, "members": [
+                {"path": os.path.relpath(path, BASE_DIR), "sha256": digest,
+                 "size": [width, height]}
+                for path, digest, _, _, _, width, height in members]}
+            for kind, members in clusters
+        ], indent=2))
+        return
+
+    print("Duplicate Finder")
+    print("="*60)
+    for kind, members in clusters:
+        print(f"\n{'🟰' if kind == 'exact' else '≈'}  {kind} ({len(members)} images)")
+        for path, _, _, _, _, width, height in members:
+            print(f"   {os.path.relpath(path, BASE_DIR)}  ({width}x{height})")
+    print("\n" + "="*60)
+    print(f"Originals: {len(paths)}")
+    print(f"Exact duplicate clusters: {sum(1 for kind, _ in clusters if kind == 'exact')}")
+    print(f"Near-duplicate clusters: {sum(1 for kind, _ in clusters if kind == 'near')}")
+    print(f"Redundant images: {sum(len(members) - 1 for _, members in clusters)}")
+    print(f"Hashes: {cache.hits} cached, {cache.misses} computed")
+    print(f"Time: {elapsed:.2f}s")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
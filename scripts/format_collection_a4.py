@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Rebuild A4 versions for the whole collection in one parallel batch.
+Covers legionnaires, legion primarchs, main_wall, wall_1_right and wall_2_left.
+Byte-identical originals (and, with --share-near-duplicates, near-duplicates
+found by find_duplicates.py) are resampled once and the outputs copied.
+Run from the repository root like the other scripts.
+"""
+
+import argparse
+import time
+
+from a4_engine import (
+    DEFAULT_FIT, DEFAULT_FOCUS, DEFAULT_PROFILE, add_engine_arguments,
+    copy_outputs, default_workers, format_batch, job_bytes, memory_report, plan_jobs,
+    record_job, selected_derivatives, selected_profiles, share_jobs, skip_outcome,
+)
+from a4_manifest import load_manifest, save_manifest
+from events import Reporter, reporter_for
+from find_duplicates import cluster_leaders
+from format_for_a4_printing import collect_legionnaire_jobs
+from format_new_images_a4 import (
+    TARGET_FOLDERS, a4_output_path, collect_folder_images, poster_fit,
+)
+from format_primarchs_a4 import collect_primarch_jobs
+from image_index import LEGIONS_PATH, WALL_DIRS, scan_collection
+
+
+def collect_wall_jobs(manifest, index, force=False, fit=None, focus=DEFAULT_FOCUS,
+                      profiles=(DEFAULT_PROFILE,), derivatives=(), min_dpi=None, reporter=None):
+    """
+    Build (input, output, fit, focus, profiles, derivatives) jobs for every
+    wall poster with a missing or stale output. Without fit each poster's
+    own fit mode is used. Missing or empty folders are warned about on reporter.
+    """
+    reporter = reporter or Reporter("format")
+    pairs = [
+        (img_file, a4_output_path(img_file), poster_fit(img_file, fit), focus, profiles,
+         derivatives)
+        for target in TARGET_FOLDERS
+        for img_file in collect_folder_images(target, index, reporter)
+    ]
+    return plan_jobs(manifest, pairs, force, min_dpi)
+
+
+def format_collection(workers=None, force=False, fit=None, focus=DEFAULT_FOCUS,
+                      profiles=(DEFAULT_PROFILE,), derivatives=(), memory_limit=None,
+                      share_near=False, min_dpi=None, reporter=None):
+    """
+    Format every pending image in the collection with a single process pool.
+    Per-file events go to reporter (by default a line per file or a live
+    progress line); returns its summary.
+    """
+    base_path = LEGIONS_PATH
+    reporter = reporter or Reporter("format")
+
+    if not base_path.exists():
+        reporter.warn("Error: 'space marine legions' folder not found!")
+        return
+
+    # One directory walk per tree, shared by every stage
+    manifest = load_manifest()
+    legion_index = scan_collection(base_path.parent, [base_path.name])
+    wall_index = scan_collection(top_dirs=WALL_DIRS)
+    legionnaire_jobs, legionnaire_skipped, _ = collect_legionnaire_jobs(
+        manifest, base_path, force, legion_index, fit or DEFAULT_FIT, focus, profiles,
+        derivatives, min_dpi)
+    primarch_jobs, primarch_skipped, _ = collect_primarch_jobs(
+        manifest, base_path, force, legion_index, fit or DEFAULT_FIT, focus, profiles,
+        derivatives, min_dpi)
+    wall_jobs, wall_skipped = collect_wall_jobs(
+        manifest, wall_index, force, fit, focus, profiles, derivatives, min_dpi, reporter)
+
+    jobs = legionnaire_jobs + primarch_jobs + wall_jobs
+    skipped = legionnaire_skipped + primarch_skipped + wall_skipped
+
+    # Duplicates of another pending image copy its outputs instead
+    leaders = cluster_leaders([job[0] for job in jobs], near=share_near)
+    jobs, shared = share_jobs(jobs, leaders)
+
+    reporter.total = len(jobs) + len(shared)
+    for (input_path, output_path, *_), reason in skipped:
+        outcome = skip_outcome(reason)
+        if outcome == "up to date":
+            reporter.note(input_path, outcome, reason=reason)
+        else:
+            reporter.note(input_path, outcome, f"  ⚠️  {input_path} - not formatted, {reason}",
+                          reason=reason)
+
+    reporter.info(f"Legionnaires: {len(legionnaire_jobs)} to format")
+    reporter.info(f"Primarchs:    {len(primarch_jobs)} to format")
+    reporter.info(f"Wall posters: {len(wall_jobs)} to format")
+    reporter.info(f"Duplicates:   {len(shared)} to copy")
+    reporter.info(f"Workers:      {workers or default_workers()}")
+    reporter.info("-" * 60)
+
+    stats = {}
+    timings = []
+
+    for job, (success, message) in format_batch(jobs, workers, memory_limit=memory_limit,
+                                                stats=stats, timings=timings):
+        input_path, output_path = job[:2]
+        if success:
+            record_job(manifest, job)
+            reporter.event(input_path, "formatted", timings[-1], *job_bytes(job),
+                           f"  ✓ {output_path.parent}/{message}", outputs=message)
+        else:
+            reporter.event(input_path, "error", timings[-1], line=f"  ✗ {input_path} - {message}",
+                           message=message)
+
+    for job, leader in shared:
+        start = time.perf_counter()
+        success, message = copy_outputs(job, leader)
+        if success:
+            record_job(manifest, job)
+            reporter.event(job[0], "copied", time.perf_counter() - start, *job_bytes(job),
+                           f"  ↪ {job[1].parent}/{message} (same as {leader[0].name})",
+                           leader=str(leader[0]))
+        else:
+            reporter.event(job[0], "error", line=f"  ✗ {job[0]} - {message}", message=message)
+
+    save_manifest(manifest)
+    summary = reporter.close(peak_rss_mb=round(max(stats.values(), default=0), 1))
+
+    # Print summary
+    reporter.report("\n" + "="*60)
+    reporter.report("COLLECTION FORMATTING COMPLETE")
+    reporter.report("="*60)
+    reporter.report(f"Images formatted: {reporter.count('formatted')}")
+    reporter.report(f"Copied from duplicates: {reporter.count('copied')}")
+    reporter.report(f"Up to date: {reporter.count('up to date')}")
+    if min_dpi:
+        reporter.report(f"Refused (below {min_dpi} dpi): {reporter.count('refused')}")
+    if reporter.count('conflict'):
+        reporter.report(f"Output conflicts: {reporter.count('conflict')}")
+    reporter.report(f"Errors: {reporter.count('error')}")
+    reporter.report(f"Time: {summary['seconds']:.1f}s ({summary['images_per_second']} images/s, "
+                    f"{summary['mb_per_second']} MB/s)")
+    reporter.report(memory_report(stats))
+    reporter.report("="*60)
+    return summary
+
+if __name__ == "__main__":
+    parser = add_engine_arguments(argparse.ArgumentParser(description=__doc__))
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild A4 versions even if they are up to date")
+    parser.add_argument("--share-near-duplicates", action="store_true",
+                        help="also copy outputs between near-duplicates (from the largest copy)")
+    args = parser.parse_args()
+    reporter = reporter_for(args, "format")
+
+    reporter.info("Collection A4 Formatter")
+    reporter.info("="*60 + "\n")
+
+    format_collection(args.workers, args.force, args.fit, args.focus, selected_profiles(args),
+                      selected_derivatives(args), args.memory_limit, args.share_near_duplicates,
+                      args.min_dpi, reporter)
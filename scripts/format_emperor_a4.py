@@ -3,59 +3,63 @@
 Format Emperor image for A4 printing.
 """
 
-from PIL import Image
-from pathlib import Path
+import argparse
 
-# A4 dimensions at 300 DPI
-A4_WIDTH_PX = 2480
-A4_HEIGHT_PX = 3508
+from a4_engine import A4_WIDTH_PX, A4_HEIGHT_PX, format_image, plan_jobs, record_job
+from a4_manifest import load_manifest, save_manifest
+from format_new_images_a4 import poster_fit
+from paths import BASE_DIR
 
-def format_emperor():
-    """Format the Emperor image for A4 printing."""
-    emperor_path = Path("emperor")
+EMPEROR_DIR = BASE_DIR / "main_wall" / "row_2_emperor_forces" / "emperor"
+
+def format_emperor(force=False):
+    """
+    Format the Emperor image for A4 printing, unless the build manifest
+    shows Emperor_A4.jpeg is up to date with the original.
+    """
+    emperor_path = EMPEROR_DIR
 
     if not emperor_path.exists():
         print("Error: emperor folder not found!")
         return
 
     # Find the original image
-    original = emperor_path / "Emperor.jpg"
+    original = emperor_path / "Emperor.jpeg"
 
     if not original.exists():
-        print("Error: Emperor.jpg not found!")
+        print("Error: Emperor.jpeg not found!")
         return
 
     # Output path
     output = emperor_path / "Emperor_A4.jpeg"
 
-    if output.exists():
-        print("✅ Emperor already formatted: Emperor_A4.jpeg")
+    manifest = load_manifest()
+    # Same fit as format_new_images_a4.py, so the two agree on what is current
+    jobs, skipped = plan_jobs(manifest, [(original, output, poster_fit(original))], force)
+    if not jobs:
+        print(f"✅ Emperor already formatted: Emperor_A4.jpeg ({skipped[0][1]})")
+        save_manifest(manifest)
         return
 
-    try:
-        print(f"🖼️  Formatting Emperor image for A4...")
-
-        # Open and process
-        img = Image.open(original)
-
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
+    print(f"🖼️  Formatting Emperor image for A4...")
 
-        # Resize to A4
-        img_resized = img.resize((A4_WIDTH_PX, A4_HEIGHT_PX), Image.Resampling.LANCZOS)
-
-        # Save
-        img_resized.save(output, 'JPEG', quality=95, dpi=(300, 300))
+    success, message = format_image(*jobs[0])
 
+    if success:
+        record_job(manifest, jobs[0])
+        save_manifest(manifest)
         print(f"✅ Emperor formatted successfully!")
-        print(f"   Original: Emperor.jpg")
-        print(f"   Formatted: Emperor_A4.jpeg (2480x3508px @ 300 DPI)")
-
-    except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"   Original: Emperor.jpeg")
+        print(f"   Formatted: Emperor_A4.jpeg ({A4_WIDTH_PX}x{A4_HEIGHT_PX}px @ 300 DPI)")
+    else:
+        print(f"❌ {message}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild Emperor_A4.jpeg even if it is up to date")
+    args = parser.parse_args()
     print("Emperor A4 Formatter")
     print("="*60)
-    format_emperor()
+    format_emperor(args.force)
     print("="*60)
@@ -4,124 +4,158 @@ Format Space Marine images for A4 printing without white spaces or cropped edges
 This script resizes all images in subfolders 1 and 4 to fit A4 paper perfectly.
 """
 
-from PIL import Image
-import os
-from pathlib import Path
+import argparse
 
-# A4 dimensions at 300 DPI for high-quality printing
-A4_WIDTH_PX = 2480   # 210mm at 300 DPI
-A4_HEIGHT_PX = 3508  # 297mm at 300 DPI
+from a4_engine import (
+    A4_WIDTH_PX, A4_HEIGHT_PX, DEFAULT_FIT, DEFAULT_FOCUS, DEFAULT_PROFILE,
+    add_engine_arguments, format_batch, job_bytes, memory_report, plan_jobs, record_job,
+    selected_derivatives, selected_profiles, skip_outcome,
+)
+from a4_manifest import load_manifest, save_manifest
+from events import Reporter, reporter_for
+from image_index import LEGIONS_PATH, scan_collection
 
-def format_image_for_a4(input_path, output_path):
+
+def legionnaire_output_path(img_path):
     """
-    Resize image to fit A4 perfectly without white space or cropping.
-    Images are scaled to fill the entire A4 page.
+    A4 version of a legionnaire original: {stem}_A4{suffix} in the same pose
+    folder (Blood_Angels_legionnaire_1_A4.jpeg), the name reorganize_images.py
+    gives it and the manifest key the pipeline and catalog use.
     """
-    try:
-        # Open the image
-        img = Image.open(input_path)
-
-        # Convert to RGB if necessary (for JPEG compatibility)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        # Resize to A4 dimensions (this will stretch slightly to fit perfectly)
-        img_resized = img.resize((A4_WIDTH_PX, A4_HEIGHT_PX), Image.Resampling.LANCZOS)
-
-        # Save with high quality
-        img_resized.save(output_path, 'JPEG', quality=95, dpi=(300, 300))
-
-        return True
-    except Exception as e:
-        print(f"Error processing {input_path}: {e}")
-        return False
+    return img_path.parent / f"{img_path.stem}_A4{img_path.suffix}"
 
-def process_legion_folders():
-    """Process all images in subfolders 1 and 4 for all legions."""
-    base_path = Path("space marine legions")
 
-    if not base_path.exists():
-        print("Error: 'space marine legions' folder not found!")
-        return
+def collect_legionnaire_jobs(manifest, base_path=LEGIONS_PATH, force=False,
+                             index=None, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS,
+                             profiles=(DEFAULT_PROFILE,), derivatives=(), min_dpi=None):
+    """
+    Find every legionnaire image in subfolders 1 and 4 whose A4 (or other
+    profile) version next to it is missing or stale according to the build
+    manifest.
+    Sources that would print below min_dpi are skipped.
+    Returns (jobs, skipped, empty_folders) where jobs are
+    (input, output, fit, focus, profiles, derivatives) tuples.
+    """
+    if index is None:
+        index = scan_collection(base_path.parent, [base_path.name])
 
-    # Track statistics
-    processed_count = 0
-    skipped_count = 0
-    error_count = 0
+    pairs = []
     empty_folders = []
 
     # Process each legion
-    for legion_path in sorted(base_path.iterdir()):
-        if not legion_path.is_dir():
-            continue
-
+    for legion_path in index.subfolders(base_path):
         legion_name = legion_path.name
         legionnaire_path = legion_path / "legionnaire"
 
-        if not legionnaire_path.exists():
+        if not index.exists(legionnaire_path):
             continue
 
         # Process subfolders 1 and 4
         for subfolder in ["1", "4"]:
             source_folder = legionnaire_path / subfolder
 
-            if not source_folder.exists():
+            if not index.exists(source_folder):
                 continue
 
             # Check if folder is empty
-            image_files = list(source_folder.glob("*.jpeg")) + \
-                         list(source_folder.glob("*.jpg")) + \
-                         list(source_folder.glob("*.png"))
+            image_files = index.originals(source_folder)
 
             if not image_files:
                 empty_folders.append(f"{legion_name}/legionnaire/{subfolder}")
                 continue
 
-            # Create output folder
-            output_folder = legionnaire_path / f"{subfolder}_A4_formatted"
-            output_folder.mkdir(exist_ok=True)
-
-            # Process each image
             for img_path in image_files:
-                output_path = output_folder / img_path.name
+                pairs.append((img_path, legionnaire_output_path(img_path),
+                              fit, focus, profiles, derivatives))
 
-                # Skip if already processed
-                if output_path.exists():
-                    print(f"Skipping (already exists): {legion_name}/{subfolder}/{img_path.name}")
-                    skipped_count += 1
-                    continue
+    # Skip if already processed from the same source with the same settings
+    jobs, skipped = plan_jobs(manifest, pairs, force, min_dpi)
+    return jobs, skipped, empty_folders
 
-                print(f"Processing: {legion_name}/{subfolder}/{img_path.name}")
 
-                if format_image_for_a4(img_path, output_path):
-                    processed_count += 1
-                else:
-                    error_count += 1
+def process_legion_folders(workers=None, force=False, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS,
+                           profiles=(DEFAULT_PROFILE,), derivatives=(), memory_limit=None,
+                           min_dpi=None, reporter=None):
+    """Process all images in subfolders 1 and 4 for all legions."""
+    base_path = LEGIONS_PATH
+    reporter = reporter or Reporter("format")
+
+    if not base_path.exists():
+        reporter.warn("Error: 'space marine legions' folder not found!")
+        return
+
+    manifest = load_manifest()
+    jobs, skipped, empty_folders = collect_legionnaire_jobs(
+        manifest, base_path, force, fit=fit, focus=focus, profiles=profiles,
+        derivatives=derivatives, min_dpi=min_dpi)
+
+    reporter.total = len(jobs)
+    for (img_path, *_), reason in skipped:
+        legion_name = img_path.parent.parent.parent.name
+        outcome = skip_outcome(reason)
+        reporter.note(img_path, outcome,
+                      f"Skipping ({reason}): {legion_name}/{img_path.parent.name}/{img_path.name}",
+                      reason=reason)
+
+    stats = {}
+    timings = []
+
+    for job, (success, message) in format_batch(jobs, workers, memory_limit=memory_limit,
+                                                stats=stats, timings=timings):
+        img_path = job[0]
+        legion_name = img_path.parent.parent.parent.name
+        subfolder = img_path.parent.name
+        line = f"Processing: {legion_name}/{subfolder}/{img_path.name}"
+
+        if success:
+            record_job(manifest, job)
+            reporter.event(img_path, "formatted", timings[-1], *job_bytes(job), line,
+                           outputs=message)
+        else:
+            reporter.event(img_path, "error", timings[-1],
+                           line=f"{line}\nError processing {img_path}: {message}",
+                           message=message)
+
+    save_manifest(manifest)
+    reporter.close(peak_rss_mb=round(max(stats.values(), default=0), 1))
 
     # Print summary
-    print("\n" + "="*60)
-    print("PROCESSING COMPLETE")
-    print("="*60)
-    print(f"Images processed: {processed_count}")
-    print(f"Images skipped (already formatted): {skipped_count}")
-    print(f"Errors: {error_count}")
+    reporter.report("\n" + "="*60)
+    reporter.report("PROCESSING COMPLETE")
+    reporter.report("="*60)
+    reporter.report(f"Images processed: {reporter.count('formatted')}")
+    reporter.report(f"Images skipped (already formatted): {reporter.count('up to date')}")
+    if min_dpi:
+        reporter.report(f"Images refused (below {min_dpi} dpi): {reporter.count('refused')}")
+    if reporter.count('conflict'):
+        reporter.report(f"Images with conflicting outputs: {reporter.count('conflict')}")
+    reporter.report(f"Errors: {reporter.count('error')}")
+    reporter.report(memory_report(stats))
 
     if empty_folders:
-        print(f"\nEmpty folders found ({len(empty_folders)}):")
+        reporter.report(f"\nEmpty folders found ({len(empty_folders)}):")
         for folder in empty_folders:
-            print(f"  - {folder}")
+            reporter.report(f"  - {folder}")
 
-    print("\n" + "="*60)
-    print("IMPORTANT: Print the images from the *_A4_formatted folders")
-    print("These images are sized at 2480x3508 pixels (300 DPI)")
-    print("They will fill A4 paper completely with no white space")
-    print("="*60)
+    reporter.report("\n" + "="*60)
+    reporter.info("IMPORTANT: Print the *_A4 images next to each original in folders 1 and 4")
+    reporter.info(f"These images are sized at {A4_WIDTH_PX}x{A4_HEIGHT_PX} pixels (300 DPI)")
+    reporter.info("They will fill A4 paper completely with no white space")
+    reporter.info("="*60)
 
 if __name__ == "__main__":
-    print("Space Marine A4 Image Formatter")
-    print("="*60)
-    print("This script formats images in subfolders 1 and 4")
-    print("to fit A4 paper perfectly (no white space, no cropping)")
-    print("="*60 + "\n")
-
-    process_legion_folders()
+    parser = add_engine_arguments(argparse.ArgumentParser(description=__doc__))
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild A4 versions even if they are up to date")
+    args = parser.parse_args()
+    reporter = reporter_for(args, "format")
+
+    reporter.info("Space Marine A4 Image Formatter")
+    reporter.info("="*60)
+    reporter.info("This script formats images in subfolders 1 and 4")
+    reporter.info("to fit A4 paper perfectly (no white space, no cropping)")
+    reporter.info("="*60 + "\n")
+
+    process_legion_folders(args.workers, args.force, args.fit or DEFAULT_FIT, args.focus,
+                           selected_profiles(args), selected_derivatives(args), args.memory_limit,
+                           args.min_dpi, reporter)
@@ -4,187 +4,185 @@ Create A4 versions of all newly renamed images.
 Resizes to 2480x3508px (A4 @ 300 DPI) and saves as *_A4.jpeg
 """
 
-from PIL import Image
+import argparse
 import os
-from pathlib import Path
-
-# Base directory
-BASE_DIR = Path(__file__).parent.parent
-
-# A4 dimensions at 300 DPI
-A4_WIDTH = 2480
-A4_HEIGHT = 3508
-
-# All folders with new images that need A4 versions
-TARGET_FOLDERS = [
-    # Main wall - row 2 emperor forces
-    "main_wall/row_2_emperor_forces/malcador",
-    "main_wall/row_2_emperor_forces/sisters_of_battle",
-    "main_wall/row_2_emperor_forces/tech_priest",
-    "main_wall/row_2_emperor_forces/grey_knights",
-    "main_wall/row_2_emperor_forces/assassins/culexus",
-    "main_wall/row_2_emperor_forces/assassins/eversor",
-    "main_wall/row_2_emperor_forces/assassins/callidus",
-    "main_wall/row_2_emperor_forces/assassins/vindicare",
-    "main_wall/row_2_emperor_forces/emperor_class_titan",
-    "main_wall/row_2_emperor_forces/constantine_valdor",
-    "main_wall/row_2_emperor_forces/sisters_of_silence",
-    "main_wall/row_2_emperor_forces/inquisition",
-
-    # Main wall - row 1 primarchs (I, III-X)
-    "main_wall/row_1_primarchs/lion_el_jonson",
-    "main_wall/row_1_primarchs/fulgrim",
-    "main_wall/row_1_primarchs/perturabo",
-    "main_wall/row_1_primarchs/jaghatai_khan",
-    "main_wall/row_1_primarchs/leman_russ",
-    "main_wall/row_1_primarchs/rogal_dorn",
-    "main_wall/row_1_primarchs/konrad_curze",
-    "main_wall/row_1_primarchs/sanguinius",
-    "main_wall/row_1_primarchs/ferrus_manus",
-
-    # Main wall - row 3 primarchs (XII-XX)
-    "main_wall/row_3_primarchs/angron",
-    "main_wall/row_3_primarchs/roboute_guilliman",
-    "main_wall/row_3_primarchs/mortarion",
-    "main_wall/row_3_primarchs/magnus",
-    "main_wall/row_3_primarchs/horus",
-    "main_wall/row_3_primarchs/lorgar",
-    "main_wall/row_3_primarchs/vulkan",
-    "main_wall/row_3_primarchs/corvus_corax",
-    "main_wall/row_3_primarchs/alpharius",
-
-    # Main wall - chaos gods
-    "main_wall/chaos_gods/tzeentch",
-    "main_wall/chaos_gods/khorne",
-    "main_wall/chaos_gods/slaanesh",
-    "main_wall/chaos_gods/nurgle",
-
-    # Main wall - xenos
-    "main_wall/xenos/tau",
-    "main_wall/xenos/tyranids",
-    "main_wall/xenos/necrons",
-    "main_wall/xenos/eldar",
-
-    # Wall 1 - traitor primarchs (special art set)
-    "wall_1_right/traitor_primarchs/fulgrim",
-    "wall_1_right/traitor_primarchs/angron",
-    "wall_1_right/traitor_primarchs/magnus",
-    "wall_1_right/traitor_primarchs/mortarion",
-    "wall_1_right/traitor_primarchs/lorgar",
-    "wall_1_right/traitor_primarchs/perturabo",
-
-    # Wall 1 - assassins (remaining temples)
-    "wall_1_right/assassins/venenum",
-    "wall_1_right/assassins/vanus",
-
-    # Wall 2 - chaos champions
-    "wall_2_left/chaos_champions/sevatar",
-    "wall_2_left/chaos_champions/abaddon",
-    "wall_2_left/chaos_champions/ahriman",
-    "wall_2_left/chaos_champions/kharn",
-
-    # Wall 2 - loyalist champions
-    "wall_2_left/loyalist_champions/amit",
-    "wall_2_left/loyalist_champions/logan_grimnar",
-    "wall_2_left/loyalist_champions/tyberos",
-    "wall_2_left/loyalist_champions/sigismund",
-]
-
-
-def format_image_to_a4(image_path):
+import time
+
+from a4_engine import (
+    A4_WIDTH_PX, A4_HEIGHT_PX, DEFAULT_FIT, DEFAULT_FOCUS, DEFAULT_PROFILE, add_engine_arguments,
+    format_batch, format_image, job_bytes, job_outputs, memory_report, plan_jobs, record_job,
+    selected_derivatives, selected_profiles, skip_outcome,
+)
+from a4_manifest import build_seconds, load_manifest, save_manifest
+from events import Reporter, reporter_for
+from image_index import scan_collection
+from paths import BASE_DIR
+from wall_layout import load_layout
+
+# Every poster folder on the three walls, in layout order (see wall_layout.json)
+LAYOUT = load_layout()
+TARGET_FOLDERS = LAYOUT.folders()
+
+
+def a4_output_path(image_path):
     """
-    Resize image to A4 format (2480x3508px @ 300 DPI).
-    Returns True if successful, False otherwise.
+    A4 version of an original lives next to it as {stem}_A4.jpeg, unless
+    the wall layout names the output (e.g. Angron_traitor_A4.jpeg).
     """
-    try:
-        # Open image
-        img = Image.open(image_path)
+    poster = LAYOUT.by_folder(os.path.relpath(image_path.parent, BASE_DIR))
+    if poster is not None:
+        return poster.a4_output_path(image_path)
+    return image_path.parent / f"{image_path.stem}_A4.jpeg"
 
-        # Convert to RGB if needed (for JPEG compatibility)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
 
-        # Resize to A4 dimensions (stretch to fit)
-        img_resized = img.resize((A4_WIDTH, A4_HEIGHT), Image.Resampling.LANCZOS)
+def poster_fit(image_path, fit=None):
+    """Fit mode for an original: fit if given, else the poster's, else stretch."""
+    if fit:
+        return fit
+    poster = LAYOUT.by_folder(os.path.relpath(image_path.parent, BASE_DIR))
+    return (poster and poster.fit) or DEFAULT_FIT
 
-        # Generate output filename
-        base_name = image_path.stem  # filename without extension
-        output_path = image_path.parent / f"{base_name}_A4.jpeg"
 
-        # Skip if A4 version already exists
-        if output_path.exists():
-            return False, "A4 version already exists"
+def format_image_to_a4(image_path, overwrite=False, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS,
+                       profiles=(DEFAULT_PROFILE,), derivatives=()):
+    """
+    Resize image to A4 format (2480x3508px @ 300 DPI) with the given fit mode,
+    plus any other print profiles and derivatives, from a single decode.
+    Existing versions are only replaced when overwrite is set.
+    Returns (success, result, seconds spent).
+    """
+    start = time.perf_counter()
+    output_path = a4_output_path(image_path)
+
+    # Skip before touching pixel data if the versions already exist
+    if not overwrite:
+        job = (image_path, output_path, fit, focus, profiles)
+        profiles = tuple(name for name, path, _ in job_outputs(job) if not path.exists())
+        if not profiles and not derivatives:
+            return False, "A4 version already exists", time.perf_counter() - start
 
-        # Save as JPEG with high quality
-        img_resized.save(output_path, 'JPEG', quality=95)
+    success, result = format_image(image_path, output_path, fit, focus, profiles, derivatives)
+    return success, result, time.perf_counter() - start
 
-        return True, output_path.name
 
-    except Exception as e:
-        return False, f"Error: {str(e)}"
+def saved_seconds(manifest, skipped, fallback=None):
+    """
+    Estimated decode + resize time a no-op run saved: the build time the
+    manifest recorded for each skipped output, or the average of the
+    recorded ones (else fallback) for outputs built before it was recorded.
+    Returns (seconds, number of outputs with a recorded time).
+    """
+    recorded = [build_seconds(manifest, path) for (_, path, *_), _ in skipped]
+    known = [seconds for seconds in recorded if seconds is not None]
+    average = sum(known) / len(known) if known else fallback
+    if average is None:
+        return None, 0
+    return sum(known) + average * (len(recorded) - len(known)), len(known)
 
 
-def process_folder(folder_path):
-    """Process all images in a folder."""
+def collect_folder_images(folder_path, index, reporter):
+    """Find the original (non-A4) images in a target folder."""
     folder_path = BASE_DIR / folder_path
 
-    if not folder_path.exists():
-        print(f"⚠️  Folder not found: {folder_path}")
-        return 0
+    if not index.exists(folder_path):
+        reporter.warn(f"⚠️  Folder not found: {folder_path}")
+        return []
 
     # Find all image files (originals, not A4 versions)
-    image_files = []
-    for ext in ['*.jpg', '*.jpeg', '*.png', '*.JPG', '*.JPEG', '*.PNG']:
-        for img_file in folder_path.glob(ext):
-            # Skip if it's already an A4 version
-            if '_A4' not in img_file.stem:
-                image_files.append(img_file)
+    image_files = index.originals(folder_path)
 
     if not image_files:
-        print(f"⚠️  No original images found in: {folder_path.name}")
-        return 0
-
-    processed_count = 0
-
-    for img_file in image_files:
-        success, result = format_image_to_a4(img_file)
+        reporter.warn(f"⚠️  No original images found in: {folder_path.name}")
+
+    return image_files
+
+
+def main(workers=None, force=False, fit=None, focus=DEFAULT_FOCUS, profiles=(DEFAULT_PROFILE,),
+         derivatives=(), memory_limit=None, min_dpi=None, reporter=None):
+    reporter = reporter or Reporter("format")
+    reporter.info("=" * 70)
+    reporter.info("CREATING A4 VERSIONS OF NEW IMAGES")
+    reporter.info(f"Target dimensions: {A4_WIDTH_PX}x{A4_HEIGHT_PX}px (A4 @ 300 DPI)")
+    reporter.info("=" * 70)
+    reporter.info()
+
+    # Decide skip or rebuild up front from the build manifest, before any
+    # pixel data is decoded. Replaced originals are rebuilt automatically.
+    check_start = time.perf_counter()
+    manifest = load_manifest()
+    index = scan_collection()
+    pairs = [
+        (img_file, a4_output_path(img_file), poster_fit(img_file, fit), focus, profiles,
+         derivatives)
+        for target in TARGET_FOLDERS
+        for img_file in collect_folder_images(target, index, reporter)
+    ]
+    planned, skipped = plan_jobs(manifest, pairs, force, min_dpi)
+    jobs = [(img_file, True, *settings) for img_file, _, *settings in planned]
+    check_seconds = time.perf_counter() - check_start
+
+    reporter.total = len(jobs)
+    not_formatted = [entry for entry in skipped if skip_outcome(entry[1]) != "up to date"]
+    skipped = [entry for entry in skipped if entry not in not_formatted]
+    for (img_file, *_), reason in not_formatted:
+        reporter.note(img_file, skip_outcome(reason),
+                      f"  ⚠️  Not formatted: {img_file.relative_to(BASE_DIR)} ({reason})",
+                      reason=reason)
+    for (img_file, *_), reason in skipped:
+        reporter.note(img_file, "up to date", reason=reason)
+
+    format_seconds = []
+    current_folder = None
+    stats = {}
+
+    for (img_file, _, *settings), (success, result, seconds) in format_batch(
+            jobs, workers, format_image_to_a4, memory_limit, stats):
+        if img_file.parent != current_folder:
+            current_folder = img_file.parent
+            reporter.say(f"\n📁 Processing: {current_folder.relative_to(BASE_DIR)}\n" + "-" * 70)
 
         if success:
-            print(f"  ✓ Created: {result}")
-            processed_count += 1
+            job = (img_file, a4_output_path(img_file), *settings)
+            record_job(manifest, job, seconds)
+            format_seconds.append(seconds)
+            reporter.event(img_file, "formatted", seconds, *job_bytes(job),
+                           f"  ✓ Created: {result}", outputs=result)
+        elif "already exists" in result:
+            reporter.event(img_file, "exists", seconds,
+                           line=f"  → Skipped: {img_file.name} ({result})")
         else:
-            if "already exists" in result:
-                print(f"  → Skipped: {img_file.name} ({result})")
-            else:
-                print(f"  ✗ Failed: {img_file.name} - {result}")
-
-    return processed_count
-
-
-def main():
-    print("=" * 70)
-    print("CREATING A4 VERSIONS OF NEW IMAGES")
-    print(f"Target dimensions: {A4_WIDTH}x{A4_HEIGHT}px (A4 @ 300 DPI)")
-    print("=" * 70)
-    print()
-
-    total_processed = 0
-
-    for target in TARGET_FOLDERS:
-        print(f"\n📁 Processing: {target}")
-        print("-" * 70)
-        count = process_folder(target)
-        total_processed += count
-
-    print()
-    print("=" * 70)
-    print(f"COMPLETE! Created {total_processed} A4 versions")
-    print("=" * 70)
-    print()
-    print("All images are now ready for A4 printing!")
-    print("Print settings: A4 paper, 100% scale, no margins, best quality")
-    print()
+            reporter.event(img_file, "error", seconds,
+                           line=f"  ✗ Failed: {img_file.name} - {result}", message=result)
+
+    save_manifest(manifest)
+    reporter.close(peak_rss_mb=round(max(stats.values(), default=0), 1))
+
+    if skipped:
+        reporter.report()
+        reporter.report(f"→ Skipped {len(skipped)} images with up-to-date A4 versions "
+                        f"(checked in {check_seconds * 1000:.1f}ms, no decoding)")
+        average = sum(format_seconds) / len(format_seconds) if format_seconds else None
+        seconds, known = saved_seconds(manifest, skipped, average)
+        if seconds is not None:
+            reporter.report(f"  Saved ~{seconds:.1f}s of decode + resize "
+                            f"(recorded build times of {known}/{len(skipped)} outputs)")
+
+    reporter.report()
+    reporter.report("=" * 70)
+    reporter.report(f"COMPLETE! Created {reporter.count('formatted')} A4 versions")
+    reporter.report(memory_report(stats))
+    reporter.report("=" * 70)
+    reporter.info()
+    reporter.info("All images are now ready for A4 printing!")
+    reporter.info("Print settings: A4 paper, 100% scale, no margins, best quality")
+    reporter.info()
 
 
 if __name__ == "__main__":
-    main()
+    parser = add_engine_arguments(argparse.ArgumentParser(description=__doc__))
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild A4 versions even if they are up to date")
+    args = parser.parse_args()
+    main(args.workers, args.force, args.fit, args.focus, selected_profiles(args),
+         selected_derivatives(args), args.memory_limit, args.min_dpi,
+         reporter_for(args, "format"))
@@ -4,112 +4,142 @@ Format primarch images for A4 printing and save alongside originals.
 Pattern: {Legion}_primarch_A4.{ext}
 """
 
-from PIL import Image
-from pathlib import Path
+import argparse
 
-# A4 dimensions at 300 DPI for high-quality printing
-A4_WIDTH_PX = 2480   # 210mm at 300 DPI
-A4_HEIGHT_PX = 3508  # 297mm at 300 DPI
+from a4_engine import (
+    DEFAULT_FIT, DEFAULT_FOCUS, DEFAULT_PROFILE, add_engine_arguments,
+    format_batch, job_bytes, memory_report, plan_jobs, record_job, selected_derivatives,
+    selected_profiles, skip_outcome,
+)
+from a4_manifest import load_manifest, save_manifest
+from events import Reporter, reporter_for
+from image_index import LEGIONS_PATH, scan_collection
 
-def format_primarch_for_a4(input_path, output_path):
+
+def collect_primarch_jobs(manifest, base_path=LEGIONS_PATH, force=False,
+                          index=None, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS,
+                          profiles=(DEFAULT_PROFILE,), derivatives=(), min_dpi=None):
     """
-    Resize primarch image to fit A4 perfectly without white space or cropping.
+    Find every primarch image whose A4 (or other profile) version is missing
+    or stale according to the build manifest. Sources that would print below
+    min_dpi are skipped.
+    Returns (jobs, skipped, empty) where jobs are
+    (input, output, fit, focus, profiles, derivatives) tuples.
     """
-    try:
-        # Open the image
-        img = Image.open(input_path)
-
-        # Convert to RGB if necessary (for JPEG compatibility)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        # Resize to A4 dimensions (stretches to fit perfectly)
-        img_resized = img.resize((A4_WIDTH_PX, A4_HEIGHT_PX), Image.Resampling.LANCZOS)
-
-        # Save with high quality
-        img_resized.save(output_path, 'JPEG', quality=95, dpi=(300, 300))
-
-        return True
-    except Exception as e:
-        print(f"  ❌ Error processing {input_path.name}: {e}")
-        return False
-
-def format_all_primarchs():
-    """Format all primarch images for A4 printing."""
-    base_path = Path("space marine legions")
-
-    if not base_path.exists():
-        print("Error: 'space marine legions' folder not found!")
-        return
+    if index is None:
+        index = scan_collection(base_path.parent, [base_path.name])
 
-    processed_count = 0
-    skipped_count = 0
-    error_count = 0
-    empty_count = 0
+    pairs = []
+    empty = []
 
     # Process each legion
-    for legion_path in sorted(base_path.iterdir()):
-        if not legion_path.is_dir():
-            continue
-
+    for legion_path in index.subfolders(base_path):
         legion_name = legion_path.name
         primarch_path = legion_path / "primarch"
 
-        if not primarch_path.exists():
+        if not index.exists(primarch_path):
             continue
 
-        # Find image files (should match the pattern {Legion}_primarch.{ext})
-        image_files = list(primarch_path.glob("*.jpeg")) + \
-                     list(primarch_path.glob("*.jpg")) + \
-                     list(primarch_path.glob("*.png"))
-
-        # Filter out already formatted images (with _A4 suffix)
-        original_images = [img for img in image_files if "_A4" not in img.stem]
+        # Original images only (should match the pattern {Legion}_primarch.{ext})
+        original_images = index.originals(primarch_path)
 
         if not original_images:
-            empty_count += 1
-            print(f"❌ {legion_name} - no primarch image found")
+            empty.append(legion_name)
             continue
 
         # Process the primarch image
         for img_path in original_images[:1]:  # Should only be one
             # Build output filename with _A4 suffix
-            stem = img_path.stem
-            output_name = f"{stem}_A4.jpeg"
-            output_path = primarch_path / output_name
+            pairs.append((img_path, primarch_path / f"{img_path.stem}_A4.jpeg",
+                          fit, focus, profiles, derivatives))
 
-            # Check if already formatted
-            if output_path.exists():
-                print(f"⏭️  {legion_name} - already formatted: {output_name}")
-                skipped_count += 1
-                continue
+    # Check if already formatted from the same source with the same settings
+    jobs, skipped = plan_jobs(manifest, pairs, force, min_dpi)
+    return jobs, skipped, empty
 
-            # Format the image
-            print(f"🖼️  {legion_name} - formatting: {img_path.name} → {output_name}")
 
-            if format_primarch_for_a4(img_path, output_path):
-                processed_count += 1
-            else:
-                error_count += 1
+def format_all_primarchs(workers=None, force=False, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS,
+                         profiles=(DEFAULT_PROFILE,), derivatives=(), memory_limit=None,
+                         min_dpi=None, reporter=None):
+    """Format all primarch images for A4 printing."""
+    base_path = LEGIONS_PATH
+    reporter = reporter or Reporter("format")
+
+    if not base_path.exists():
+        reporter.warn("Error: 'space marine legions' folder not found!")
+        return
+
+    manifest = load_manifest()
+    jobs, skipped, empty = collect_primarch_jobs(
+        manifest, base_path, force, fit=fit, focus=focus, profiles=profiles,
+        derivatives=derivatives, min_dpi=min_dpi)
+
+    reporter.total = len(jobs)
+    for legion_name in empty:
+        reporter.warn(f"❌ {legion_name} - no primarch image found")
+    for (img_path, output_path, *_), reason in skipped:
+        outcome = skip_outcome(reason)
+        if outcome != "up to date":
+            reporter.note(img_path, outcome,
+                          f"⚠️  {img_path.parent.parent.name} - not formatted ({reason}): {img_path.name}",
+                          reason=reason)
+        else:
+            reporter.note(img_path, "up to date",
+                          f"⏭️  {img_path.parent.parent.name} - already formatted ({reason}): {output_path.name}",
+                          reason=reason)
+
+    stats = {}
+    timings = []
+
+    for job, (success, message) in format_batch(jobs, workers, memory_limit=memory_limit,
+                                                stats=stats, timings=timings):
+        img_path = job[0]
+        legion_name = img_path.parent.parent.name
+        line = f"🖼️  {legion_name} - formatting: {img_path.name} → {message if success else job[1].name}"
+
+        if success:
+            record_job(manifest, job)
+            reporter.event(img_path, "formatted", timings[-1], *job_bytes(job), line,
+                           outputs=message)
+        else:
+            reporter.event(img_path, "error", timings[-1],
+                           line=f"{line}\n  ❌ Error processing {img_path.name}: {message}",
+                           message=message)
+
+    save_manifest(manifest)
+    reporter.close(peak_rss_mb=round(max(stats.values(), default=0), 1))
 
     # Print summary
-    print("\n" + "="*60)
-    print("PRIMARCH A4 FORMATTING COMPLETE")
-    print("="*60)
-    print(f"Primarchs formatted: {processed_count}")
-    print(f"Already formatted: {skipped_count}")
-    print(f"Errors: {error_count}")
-    print(f"Empty folders: {empty_count}")
-    print("="*60)
-    print("\nEach primarch folder now contains:")
-    print("  - {Legion}_primarch.jpg (original)")
-    print("  - {Legion}_primarch_A4.jpeg (formatted for A4 printing)")
-    print("="*60)
+    reporter.report("\n" + "="*60)
+    reporter.report("PRIMARCH A4 FORMATTING COMPLETE")
+    reporter.report("="*60)
+    reporter.report(f"Primarchs formatted: {reporter.count('formatted')}")
+    reporter.report(f"Already formatted: {reporter.count('up to date')}")
+    if min_dpi:
+        reporter.report(f"Refused (below {min_dpi} dpi): {reporter.count('refused')}")
+    if reporter.count('conflict'):
+        reporter.report(f"Output conflicts: {reporter.count('conflict')}")
+    reporter.report(f"Errors: {reporter.count('error')}")
+    reporter.report(f"Empty folders: {len(empty)}")
+    reporter.report(memory_report(stats))
+    reporter.report("="*60)
+    reporter.info("\nEach primarch folder now contains:")
+    reporter.info("  - {Legion}_primarch.jpg (original)")
+    reporter.info("  - {Legion}_primarch_A4.jpeg (formatted for A4 printing)")
+    reporter.info("="*60)
 
 if __name__ == "__main__":
-    print("Primarch A4 Formatter")
-    print("="*60)
-    print("Formatting primarch images for A4 printing (2480x3508px @ 300 DPI)")
-    print("="*60 + "\n")
-
-    format_all_primarchs()
+    parser = add_engine_arguments(argparse.ArgumentParser(description=__doc__))
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild A4 versions even if they are up to date")
+    args = parser.parse_args()
+    reporter = reporter_for(args, "format")
+
+    reporter.info("Primarch A4 Formatter")
+    reporter.info("="*60)
+    reporter.info("Formatting primarch images for A4 printing (2480x3508px @ 300 DPI)")
+    reporter.info("="*60 + "\n")
+
+    format_all_primarchs(args.workers, args.force, args.fit or DEFAULT_FIT, args.focus,
+                         selected_profiles(args), selected_derivatives(args), args.memory_limit,
+                         args.min_dpi, reporter)
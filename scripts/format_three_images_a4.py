@@ -4,32 +4,21 @@ Format three specific images to A4 print specifications.
 Processes: Sanguinius, Emperor, and Ahriman
 """
 
-from PIL import Image
+import argparse
 import os
 
-# A4 dimensions at 300 DPI
-A4_WIDTH = 2480
-A4_HEIGHT = 3508
-QUALITY = 95
+from a4_engine import (
+    A4_WIDTH_PX, A4_HEIGHT_PX, DEFAULT_FIT, DEFAULT_FOCUS, DEFAULT_PROFILE, add_engine_arguments,
+    format_batch, job_bytes, memory_report, plan_jobs, record_job, selected_derivatives,
+    selected_profiles, skip_outcome,
+)
+from a4_manifest import load_manifest, save_manifest
+from events import Reporter, reporter_for
+from paths import BASE_DIR
 
-def format_to_a4(input_path, output_path):
-    """Resize image to A4 specifications"""
-    print(f"Processing: {input_path}")
-
-    # Open and convert to RGB (for JPEG compatibility)
-    img = Image.open(input_path)
-    if img.mode != 'RGB':
-        img = img.convert('RGB')
-
-    # Resize to exact A4 dimensions (stretch to fill)
-    img_resized = img.resize((A4_WIDTH, A4_HEIGHT), Image.Resampling.LANCZOS)
-
-    # Save as JPEG
-    img_resized.save(output_path, 'JPEG', quality=QUALITY)
-    print(f"  → Saved: {output_path}")
-
-def main():
-    base_dir = "/home/musyonchez/Code/warhammer-40k-posters"
+def main(workers=None, fit=DEFAULT_FIT, focus=DEFAULT_FOCUS, profiles=(DEFAULT_PROFILE,),
+         derivatives=(), memory_limit=None, min_dpi=None, reporter=None):
+    base_dir = BASE_DIR
 
     images_to_process = [
         {
@@ -46,22 +35,58 @@ def main():
         }
     ]
 
-    print("=" * 60)
-    print("Formatting 3 images to A4 print specifications")
-    print(f"Target dimensions: {A4_WIDTH}x{A4_HEIGHT}px @ 300 DPI")
-    print("=" * 60)
-    print()
+    reporter = reporter or Reporter("format")
+    reporter.info("=" * 60)
+    reporter.info("Formatting 3 images to A4 print specifications")
+    reporter.info(f"Target dimensions: {A4_WIDTH_PX}x{A4_HEIGHT_PX}px @ 300 DPI")
+    reporter.info("=" * 60)
+    reporter.info()
 
+    jobs = []
     for img_data in images_to_process:
         if os.path.exists(img_data["input"]):
-            format_to_a4(img_data["input"], img_data["output"])
+            jobs.append((img_data["input"], img_data["output"], fit, focus, profiles, derivatives))
+        else:
+            reporter.note(img_data["input"], "missing")
+            reporter.warn(f"WARNING: File not found - {img_data['input']}\n")
+
+    # Always rebuilt (unless below min_dpi), but recorded so the other
+    # formatters see them as up to date
+    manifest = load_manifest()
+    jobs, skipped = plan_jobs(manifest, jobs, force=True, min_dpi=min_dpi)
+    for (input_path, *_), reason in skipped:
+        reporter.note(input_path, skip_outcome(reason),
+                      f"Not formatted: {input_path} ({reason})\n", reason=reason)
+    reporter.total = len(jobs)
+    stats = {}
+    timings = []
+    for job, (success, message) in format_batch(jobs, workers, memory_limit=memory_limit,
+                                                stats=stats, timings=timings):
+        input_path, output_path = job[:2]
+        if success:
+            record_job(manifest, job)
+            reporter.event(input_path, "formatted", timings[-1], *job_bytes(job),
+                           f"Processing: {input_path}\n"
+                           f"  → Saved: {os.path.dirname(output_path)}/{message}\n",
+                           outputs=message)
         else:
-            print(f"WARNING: File not found - {img_data['input']}")
-        print()
+            reporter.event(input_path, "error", timings[-1],
+                           line=f"Processing: {input_path}\n  ✗ Failed: {message}\n",
+                           message=message)
+    save_manifest(manifest)
+    reporter.close(peak_rss_mb=round(max(stats.values(), default=0), 1))
 
-    print("=" * 60)
-    print("Processing complete!")
-    print("=" * 60)
+    reporter.report("=" * 60)
+    reporter.report(f"Processing complete! Formatted {reporter.count('formatted')}, "
+                    f"failed {reporter.count('error')}")
+    if min_dpi:
+        reporter.report(f"Refused (below {min_dpi} dpi): {reporter.count('refused')}")
+    reporter.report(memory_report(stats))
+    reporter.report("=" * 60)
 
 if __name__ == "__main__":
-    main()
+    parser = add_engine_arguments(argparse.ArgumentParser(description=__doc__))
+    args = parser.parse_args()
+    main(args.workers, args.fit or DEFAULT_FIT, args.focus, selected_profiles(args),
+         selected_derivatives(args), args.memory_limit, args.min_dpi,
+         reporter_for(args, "format"))
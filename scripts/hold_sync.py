@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Sync A4 images into the hold folder for printing.
+Hold entries are reflinked or hardlinked when the hold folder is on the same
+filesystem as the source, and copied otherwise. Entries that already exist
+are compared by content hash, so a re-formatted image replaces its stale
+copy in hold/. Transfers run concurrently on a thread pool.
+"""
+
+import argparse
+import errno
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from a4_manifest import file_sha256
+from events import Reporter, add_report_arguments, reporter_for
+from image_index import LEGIONS_DIR, is_a4_name, scan_collection
+from paths import BASE_DIR
+from stage_trace import add_trace_argument, span
+from wall_layout import load_layout
+
+HOLD_DIR = BASE_DIR / "hold"
+
+# Linux FICLONE ioctl (copy-on-write clone), not exposed by fcntl before 3.12
+FICLONE = 0x40049409
+
+TRANSFER_MODES = ["auto", "reflink", "hardlink", "copy"]
+
+
+def reflink(source, dest):
+    """Clone source into dest with FICLONE (btrfs, XFS, ...)."""
+    import fcntl
+
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(dest)
+            raise
+    shutil.copystat(source, dest)
+
+
+def hardlink(source, dest):
+    """Hardlink dest to source."""
+    os.link(source, dest)
+
+
+def copy(source, dest):
+    """Plain copy, keeping timestamps."""
+    shutil.copy2(source, dest)
+
+
+def _same_filesystem(source, hold_folder):
+    return os.stat(source).st_dev == os.stat(hold_folder).st_dev
+
+
+def transfer(source, dest, mode="auto"):
+    """
+    Place source at dest atomically using the requested mode.
+    auto tries reflink, then hardlink (same filesystem only), then copy.
+    Returns the method that was used.
+    """
+    if mode == "auto":
+        if _same_filesystem(source, dest.parent):
+            methods = [("reflink", reflink), ("hardlink", hardlink), ("copy", copy)]
+        else:
+            methods = [("copy", copy)]
+    else:
+        methods = [(mode, {"reflink": reflink, "hardlink": hardlink, "copy": copy}[mode])]
+
+    tmp_dest = dest.with_name(f".{dest.name}.tmp")
+    for name, method in methods:
+        if tmp_dest.exists():
+            tmp_dest.unlink()
+        try:
+            with span("copy", method=name, file=dest.name):
+                method(source, tmp_dest)
+        except OSError as e:
+            if mode != "auto" or e.errno not in (
+                errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL,
+                errno.EPERM, errno.EMLINK, errno.ENOSYS,
+            ):
+                raise
+            continue
+        os.replace(tmp_dest, dest)
+        return name
+    raise OSError(f"Could not transfer {source} to {dest}")
+
+
+def hold_status(source, dest):
+    """
+    Compare a hold entry with its source.
+    Returns "new", "linked" (same inode), "current" (same content) or "stale".
+    """
+    with span("stat", file=dest.name):
+        try:
+            dest_st = os.stat(dest)
+        except FileNotFoundError:
+            return "new"
+        source_st = os.stat(source)
+        if (source_st.st_dev, source_st.st_ino) == (dest_st.st_dev, dest_st.st_ino):
+            return "linked"
+        if source_st.st_size != dest_st.st_size:
+            return "stale"
+        if file_sha256(source) == file_sha256(dest):
+            return "current"
+        return "stale"
+
+
+def _sync_one(source, hold_folder, mode, dry_run):
+    start = time.perf_counter()
+    dest = hold_folder / source.name
+    status = hold_status(source, dest)
+    if status in ("linked", "current") or dry_run:
+        return source, status, None, time.perf_counter() - start
+    method = transfer(source, dest, mode)
+    return source, status, method, time.perf_counter() - start
+
+
+def sync_to_hold(sources, hold_folder=HOLD_DIR, mode="auto", workers=8, dry_run=False):
+    """
+    Sync A4 images into hold_folder.
+    Yields (source, status, method, seconds) in source order, where method
+    is None for entries that were already up to date (or with dry_run).
+    """
+    hold_folder = Path(hold_folder)
+    hold_folder.mkdir(exist_ok=True)
+
+    # Hold entries are keyed by file name; the first source wins
+    unique = {}
+    for source in sources:
+        unique.setdefault(Path(source).name, Path(source))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [
+            pool.submit(_sync_one, source, hold_folder, mode, dry_run)
+            for source in unique.values()
+        ]
+        for future in futures:
+            yield future.result()
+
+
+def legionnaire_a4_images(index, base_path=BASE_DIR / LEGIONS_DIR):
+    """A4 images from legionnaire folders 1 and 4 of every legion."""
+    images = []
+    for legion_path in index.subfolders(base_path):
+        for subfolder in ["1", "4"]:
+            images.extend(index.a4_outputs(legion_path / "legionnaire" / subfolder))
+    return images
+
+
+def formatted_folder_images(index, base_path=BASE_DIR / LEGIONS_DIR):
+    """Images still waiting in legionnaire *_A4_formatted folders."""
+    images = []
+    for legion_path in index.subfolders(base_path):
+        for folder in index.subfolders(legion_path / "legionnaire"):
+            if folder.name.endswith("_A4_formatted"):
+                images.extend(index.images(folder))
+    return images
+
+
+def primarch_a4_images(index, base_path=BASE_DIR / LEGIONS_DIR):
+    """A4 images from every legion's primarch folder."""
+    images = []
+    for legion_path in index.subfolders(base_path):
+        images.extend(index.a4_outputs(legion_path / "primarch"))
+    return images
+
+
+def wall_a4_images(index, layout, wall=None):
+    """A4 images of the wall posters, in layout order."""
+    images = []
+    for poster in layout.posters(wall):
+        images.extend(index.a4_outputs(poster.folder_path(BASE_DIR)))
+    return images
+
+
+def run_sync(sources, hold_folder=HOLD_DIR, mode="auto", workers=8, dry_run=False,
+             reporter=None):
+    """
+    Sync sources into hold, reporting one event per file (outcome new,
+    stale, current or linked), and print a summary. Returns the counts.
+    """
+    hold_folder = Path(hold_folder)
+    reporter = reporter or Reporter("hold")
+    reporter.info(f"Hold folder: {hold_folder.absolute()}\n")
+
+    sources = list(sources)
+    reporter.total = len(sources)
+    methods = {}
+
+    for source, status, method, seconds in sync_to_hold(sources, hold_folder, mode, workers,
+                                                        dry_run):
+        if method:
+            methods[method] = methods.get(method, 0) + 1
+        if status == "new":
+            line = f"📁 {source.name}" + (f" ({method})" if method else "")
+        elif status == "stale":
+            line = f"🔄 {source.name} - replaced stale copy" + (f" ({method})" if method else "")
+        else:
+            line = f"⏭️  {source.name}"
+        size = os.stat(source).st_size if method else None
+        reporter.event(source, status, seconds, size, size, line, method=method)
+    reporter.close(dry_run=dry_run)
+    counts = {status: reporter.count(status) for status in ("new", "stale", "current", "linked")}
+
+    # Print summary
+    reporter.report("\n" + "="*60)
+    reporter.report("HOLD SYNC COMPLETE" + (" (dry run)" if dry_run else ""))
+    reporter.report("="*60)
+    reporter.report(f"New in hold: {counts['new']}")
+    reporter.report(f"Stale copies replaced: {counts['stale']}")
+    reporter.report(f"Already up to date: {counts['current'] + counts['linked']}")
+    for method, count in sorted(methods.items()):
+        reporter.report(f"  via {method}: {count}")
+    with os.scandir(hold_folder) as entries:
+        total = sum(1 for entry in entries if is_a4_name(entry.name))
+    reporter.report(f"Total A4 images in hold: {total}")
+    reporter.report("="*60)
+    reporter.info(f"\n📁 All print-ready images in: {hold_folder.absolute()}")
+    reporter.info("="*60)
+    return counts
+
+
+def add_sync_arguments(parser):
+    """Add the shared hold-sync options to an argument parser."""
+    parser.add_argument("--mode", choices=TRANSFER_MODES, default="auto",
+                        help="how to place files in hold/ (default: auto)")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="concurrent transfers (default: 8)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report what would change without touching hold/")
+    add_trace_argument(parser)
+    return add_report_arguments(parser)
+
+
+def main():
+    parser = add_sync_arguments(argparse.ArgumentParser(description=__doc__))
+    parser.add_argument("--legionnaires", action="store_true",
+                        help="legionnaire A4 images (folders 1 and 4)")
+    parser.add_argument("--primarchs", action="store_true",
+                        help="legion primarch A4 images")
+    parser.add_argument("--wall", action="append", default=[],
+                        help="A4 images of one wall (repeatable), or 'all'")
+    parser.add_argument("paths", nargs="*", type=Path, help="extra A4 images to stage")
+    args = parser.parse_args()
+
+    index = scan_collection()
+    sources = []
+    if args.legionnaires:
+        sources += legionnaire_a4_images(index)
+    if args.primarchs:
+        sources += primarch_a4_images(index)
+    if args.wall:
+        layout = load_layout()
+        walls = list(layout.walls) if "all" in args.wall else args.wall
+        for wall in walls:
+            sources += wall_a4_images(index, layout, wall)
+    sources += args.paths
+
+    if not sources:
+        parser.error("nothing selected: use --legionnaires, --primarchs, --wall or paths")
+
+    reporter = reporter_for(args, "hold")
+    reporter.info("Hold Folder Sync")
+    reporter.info("="*60 + "\n")
+    run_sync(sources, HOLD_DIR, args.mode, args.workers, args.dry_run, reporter)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Read image dimensions (and the JPEG comment) from JPEG and PNG headers
+without decoding pixels.
+Only the first few hundred bytes of a file are touched (JPEG segments are
+skipped with seek), so this is cheap enough to run over the whole collection.
+"""
+
+import struct
+from collections import namedtuple
+
+ImageHeader = namedtuple(
+    "ImageHeader",
+    ["format", "width", "height", "bits", "components", "progressive", "adobe", "comment"],
+)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG colour type -> number of channels
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# JPEG start-of-frame markers (C4 DHT, C8 JPG and CC DAC are not frames)
+JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+JPEG_PROGRESSIVE_MARKERS = {0xC2, 0xC6, 0xCA, 0xCE}
+
+# Markers that carry no length field
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+
+def _read_jpeg_header(f):
+    """Walk JPEG segments up to the first start-of-frame marker."""
+    adobe = False
+    comment = None
+    while True:
+        byte = f.read(1)
+        if not byte:
+            raise ValueError("no JPEG frame header found")
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            raise ValueError("truncated JPEG")
+        code = marker[0]
+        if code in JPEG_STANDALONE_MARKERS:
+            continue
+        if code == 0xD9:
+            raise ValueError("no JPEG frame header found")
+
+        (length,) = struct.unpack(">H", f.read(2))
+        if code in JPEG_SOF_MARKERS:
+            bits, height, width, components = struct.unpack(">BHHB", f.read(6))
+            return ImageHeader("JPEG", width, height, bits, components,
+                               code in JPEG_PROGRESSIVE_MARKERS, adobe, comment)
+        if code == 0xEE and length >= 7:  # APP14 Adobe (inverted CMYK)
+            adobe = f.read(5) == b"Adobe"
+            f.seek(length - 2 - 5, 1)
+            continue
+        if code == 0xFE and comment is None:  # COM (first one wins)
+            comment = f.read(length - 2).decode("utf-8", "replace")
+            continue
+        f.seek(length - 2, 1)
+
+
+def _read_png_header(f):
+    """Read the IHDR chunk that must follow the PNG signature (Adam7 counts as progressive)."""
+    length, chunk_type = struct.unpack(">I4s", f.read(8))
+    if chunk_type != b"IHDR" or length < 13:
+        raise ValueError("PNG without IHDR")
+    width, height, bits, color_type, _, _, interlace = struct.unpack(">IIBBBBB", f.read(13))
+    return ImageHeader("PNG", width, height, bits, PNG_CHANNELS.get(color_type, 0),
+                       interlace == 1, False, None)
+
+
+def read_image_header(path):
+    """
+    Return an ImageHeader for a JPEG or PNG file.
+    Raises ValueError for other formats or damaged headers.
+    """
+    with open(path, "rb") as f:
+        start = f.read(8)
+        if start[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _read_jpeg_header(f)
+        if start == PNG_SIGNATURE:
+            return _read_png_header(f)
+    raise ValueError(f"not a JPEG or PNG file: {path}")
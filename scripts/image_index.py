@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Single-pass directory scanner for the poster collection.
+Walks the collection folders once with os.scandir and sorts every image into
+originals, _A4 outputs and other print-profile outputs (_A3, _Letter, ...) by
+case-insensitive extension. The resulting index
+is kept in memory and reused, so scripts never glob the same folder twice.
+"""
+
+import os
+from collections import namedtuple
+from pathlib import Path
+
+from paths import BASE_DIR
+from print_profiles import output_suffixes
+from stage_trace import span
+
+# Top-level folders that hold poster images
+LEGIONS_DIR = "space marine legions"
+WALL_DIRS = ["main_wall", "wall_1_right", "wall_2_left"]
+COLLECTION_DIRS = [LEGIONS_DIR] + WALL_DIRS
+LEGIONS_PATH = BASE_DIR / LEGIONS_DIR
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+# Images found directly inside one folder, sorted by name
+FolderImages = namedtuple("FolderImages", ["originals", "a4_outputs", "subfolders",
+                                           "other_outputs"])
+
+EMPTY_FOLDER = FolderImages((), (), (), ())
+
+OUTPUT_SUFFIXES = output_suffixes()
+
+
+def is_image_name(name):
+    """True for .jpg/.jpeg/.png files in any letter case."""
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def is_a4_name(name):
+    """A4 outputs carry _A4 in their stem (e.g. Horus_A4.jpeg, Angron_traitor_A4.jpeg)."""
+    return "_a4" in os.path.splitext(name)[0].lower()
+
+
+def is_output_name(name):
+    """Outputs of any print profile (_A4, _A3, _Letter, ...)."""
+    stem = os.path.splitext(name)[0].lower()
+    return any(suffix in stem for suffix in OUTPUT_SUFFIXES)
+
+
+def _key(path):
+    """Normalised absolute path used as the index key (no filesystem access)."""
+    return os.path.abspath(path)
+
+
+class ImageIndex:
+    """In-memory map of folder -> FolderImages built by scan_collection()."""
+
+    def __init__(self, folders):
+        self._folders = folders
+
+    def folder(self, path):
+        """FolderImages for path, or an empty entry if it was not scanned."""
+        return self._folders.get(_key(path), EMPTY_FOLDER)
+
+    def originals(self, path):
+        """Original (non-A4) images directly inside path."""
+        return list(self.folder(path).originals)
+
+    def a4_outputs(self, path):
+        """A4 outputs directly inside path."""
+        return list(self.folder(path).a4_outputs)
+
+    def other_outputs(self, path):
+        """Outputs of non-A4 print profiles directly inside path."""
+        return list(self.folder(path).other_outputs)
+
+    def images(self, path):
+        """All images directly inside path, originals first."""
+        entry = self.folder(path)
+        return list(entry.originals) + list(entry.a4_outputs)
+
+    def subfolders(self, path):
+        """Sub-folders of path, sorted by name."""
+        return list(self.folder(path).subfolders)
+
+    def exists(self, path):
+        """True if path is a scanned folder."""
+        return _key(path) in self._folders
+
+    def contains(self, path):
+        """True if path is a scanned folder or an image found in one."""
+        if self.exists(path):
+            return True
+        entry = self.folder(os.path.dirname(_key(path)))
+        key = _key(path)
+        return any(_key(image) == key
+                   for image in entry.originals + entry.a4_outputs + entry.other_outputs)
+
+    def folders(self):
+        """Every scanned folder."""
+        return [Path(key) for key in sorted(self._folders)]
+
+    def __len__(self):
+        return len(self._folders)
+
+
+def _scan_tree(top, folders):
+    """Iteratively scan one folder tree into folders."""
+    stack = [top]
+    while stack:
+        current = stack.pop()
+        originals = []
+        a4_outputs = []
+        other_outputs = []
+        subfolders = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subfolders.append(Path(entry.path))
+                    elif entry.is_file() and is_image_name(entry.name):
+                        if is_a4_name(entry.name):
+                            a4_outputs.append(Path(entry.path))
+                        elif is_output_name(entry.name):
+                            other_outputs.append(Path(entry.path))
+                        else:
+                            originals.append(Path(entry.path))
+        except FileNotFoundError:
+            continue
+
+        subfolders.sort()
+        folders[_key(current)] = FolderImages(
+            tuple(sorted(originals)), tuple(sorted(a4_outputs)), tuple(subfolders),
+            tuple(sorted(other_outputs)),
+        )
+        stack.extend(reversed(subfolders))
+
+
+def scan_collection(root=BASE_DIR, top_dirs=COLLECTION_DIRS):
+    """
+    Walk the collection folders under root once and return an ImageIndex.
+    Paths in the index are built from root, so a relative root gives
+    relative paths just like Path("space marine legions") did.
+    """
+    folders = {}
+    with span("scan", dirs=", ".join(top_dirs)):
+        for top in top_dirs:
+            top_path = Path(root) / top
+            if top_path.is_dir():
+                _scan_tree(top_path, folders)
+    return ImageIndex(folders)
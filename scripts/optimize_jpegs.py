@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Losslessly shrink the A4 (and other print profile) outputs.
+Each JPEG is re-packed with jpegtran -optimize (optimal Huffman tables) and,
+by default, -progressive. The DCT coefficients are copied, not re-quantised,
+and every result is decoded and compared with the original before it
+replaces it, so outputs stay pixel-identical. Files are processed in
+parallel and a report of bytes saved per wall is printed.
+
+New outputs are already encoded with optimised Huffman tables; this is for
+the ones written before that, or to switch existing outputs to progressive.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from a4_engine import default_workers, format_batch
+from a4_manifest import BASE_DIR, load_manifest, refresh_output, save_manifest
+from events import Reporter, add_report_arguments, reporter_for
+from image_index import scan_collection
+
+JPEGTRAN = os.environ.get("JPEGTRAN", "jpegtran")
+
+JPEG_EXTENSIONS = {".jpg", ".jpeg"}
+
+
+def output_jpegs(index):
+    """Every A4 and print profile output in the collection that is a JPEG file."""
+    outputs = []
+    for folder in index.folders():
+        outputs += index.a4_outputs(folder) + index.other_outputs(folder)
+    return [path for path in outputs if path.suffix.lower() in JPEG_EXTENSIONS]
+
+
+def wall_of(path):
+    """Top-level collection folder of path (main_wall, space marine legions, ...)."""
+    return Path(os.path.relpath(path, BASE_DIR)).parts[0]
+
+
+def same_pixels(a, b):
+    """True if two image files decode to exactly the same pixels."""
+    with Image.open(a) as img_a, Image.open(b) as img_b:
+        if img_a.size != img_b.size or img_a.mode != img_b.mode:
+            return False
+        return img_a.tobytes() == img_b.tobytes()
+
+
+def optimize_jpeg(path, progressive=True, dry_run=False):
+    """
+    Re-pack one JPEG with jpegtran. The result only replaces path (keeping
+    its timestamps) when it is smaller and decodes pixel-identical.
+    Returns (success, message, bytes saved).
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.opt.tmp")
+    command = [JPEGTRAN, "-copy", "all", "-optimize"]
+    if progressive:
+        command.append("-progressive")
+    command += ["-outfile", str(tmp_path), str(path)]
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            return False, f"jpegtran failed: {result.stderr.strip()}", 0
+
+        saved = path.stat().st_size - tmp_path.stat().st_size
+        if saved <= 0:
+            return True, "already optimal", 0
+        if not same_pixels(path, tmp_path):
+            return False, "re-packed file decodes differently, kept original", 0
+        if dry_run:
+            return True, "would shrink", saved
+
+        shutil.copystat(path, tmp_path)
+        os.replace(tmp_path, path)
+        return True, "optimized", saved
+    except OSError as e:
+        return False, str(e), 0
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def optimize_outputs(paths, workers=None, progressive=True, dry_run=False, reporter=None):
+    """
+    Optimize paths in parallel and report one event per file (a line per
+    changed file). Returns {wall: [files, bytes before, bytes saved, errors]}.
+    """
+    manifest = load_manifest()
+    report = {}
+    sizes = {path: path.stat().st_size for path in paths}
+    jobs = [(path, progressive, dry_run) for path in paths]
+    reporter = reporter or Reporter("optimize")
+    reporter.total = len(jobs)
+    timings = []
+
+    for (path, *_), (success, message, saved) in format_batch(jobs, workers, optimize_jpeg,
+                                                              timings=timings):
+        wall = report.setdefault(wall_of(path), [0, 0, 0, 0])
+        wall[0] += 1
+        wall[1] += sizes[path]
+        wall[2] += saved
+        label = os.path.relpath(path, BASE_DIR)
+        if not success:
+            wall[3] += 1
+            reporter.event(path, "error", timings[-1], line=f"  ✗ {label} - {message}",
+                           message=message)
+        elif saved:
+            reporter.event(path, "optimized", timings[-1], sizes[path], sizes[path] - saved,
+                           f"  ✓ {label} - {message}, -{saved / 1024:.0f} KB")
+            if not dry_run:
+                # Same pixels, new bytes: keep the build manifest in step
+                refresh_output(manifest, path)
+        else:
+            reporter.event(path, "optimal", timings[-1], sizes[path], sizes[path])
+
+    if not dry_run:
+        save_manifest(manifest)
+    reporter.close(dry_run=dry_run)
+    return report
+
+
+def print_report(report, dry_run=False, reporter=None):
+    """Per-wall table of bytes saved."""
+    reporter = reporter or Reporter("optimize")
+    reporter.report("\n" + "="*60)
+    reporter.report("JPEG OPTIMIZATION COMPLETE" + (" (dry run)" if dry_run else ""))
+    reporter.report("="*60)
+    reporter.report(f"{'Wall':24} {'Files':>6} {'Before':>10} {'Saved':>10} {'%':>6}")
+    total = [0, 0, 0, 0]
+    for wall, (files, before, saved, errors) in sorted(report.items()):
+        reporter.report(f"{wall:24} {files:6} {before / 1e6:8.1f}MB {saved / 1e6:8.1f}MB "
+                        f"{100 * saved / (before or 1):5.1f}%")
+        total = [t + v for t, v in zip(total, (files, before, saved, errors))]
+    reporter.report("-" * 60)
+    reporter.report(f"{'Total':24} {total[0]:6} {total[1] / 1e6:8.1f}MB {total[2] / 1e6:8.1f}MB "
+                    f"{100 * total[2] / (total[1] or 1):5.1f}%")
+    reporter.report(f"Errors: {total[3]}")
+    reporter.report("="*60)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", type=Path,
+                        help="JPEGs to optimize (default: every output in the collection)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel files (default: $A4_WORKERS or CPU count)")
+    parser.add_argument("--baseline", action="store_true",
+                        help="keep baseline (non-progressive) JPEGs, only optimize Huffman tables")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report the savings without replacing any file")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    reporter = reporter_for(args, "optimize")
+
+    reporter.info("Lossless JPEG Optimizer")
+    reporter.info("="*60 + "\n")
+
+    if shutil.which(JPEGTRAN) is None:
+        reporter.warn(f"❌ {JPEGTRAN} not found - "
+                      "install libjpeg-turbo (jpegtran) or set JPEGTRAN")
+        reporter.warn("   Nothing was changed.")
+        sys.exit(1)
+
+    paths = args.paths or output_jpegs(scan_collection())
+    reporter.info(f"Outputs: {len(paths)}")
+    reporter.info(f"Workers: {args.workers or default_workers()}")
+    reporter.info("-" * 60)
+
+    start = time.perf_counter()
+    report = optimize_outputs(paths, args.workers, not args.baseline, args.dry_run, reporter)
+    total = print_report(report, args.dry_run, reporter)
+    reporter.report(f"Time: {time.perf_counter() - start:.1f}s")
+    if not args.dry_run and total[2]:
+        reporter.info("\nRun hold_sync.py to refresh hold/ copies of the optimized files")
+    sys.exit(1 if total[3] else 0)
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Collection root shared by every script.
+POSTERS_ROOT points the scripts at another copy of the collection; by
+default it is the repository the scripts live in. Nothing resolves paths
+against the current directory, so the scripts run the same from anywhere.
+"""
+
+import os
+from pathlib import Path
+
+# Environment variable that overrides the collection root
+ROOT_ENV = "POSTERS_ROOT"
+
+# Base directory
+BASE_DIR = Path(os.environ.get(ROOT_ENV) or Path(__file__).parent.parent).resolve()
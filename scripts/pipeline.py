@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Run the new-image workflow in one pass: rename → format → hold.
+There is no separate reorganize step: every A4 version, legionnaires
+included, is written straight to the *_A4 name next to its original.
+The collection is scanned once and the renames are applied up front through a
+journal (file_journal.py), so an interrupted run can be resumed or rolled
+back. Every original then streams through the stages on its own as an asyncio
+task: resizing runs on a process pool while hold transfers run on threads, so
+each image reaches hold/ as soon as its own A4 version is done instead of
+waiting for the whole batch.
+With --watch it keeps running and feeds new or replaced originals through
+the same stages once they have stopped changing for a few seconds.
+
+  wall posters  - renamed after their folder (rename_new_images), A4 next to it
+  primarchs     - {Legion}_primarch.ext, A4 next to it
+  legionnaires  - {Legion}_legionnaire_{1,4}.ext, A4 next to it (the name
+                  reorganize_images gives it, no *_A4_formatted detour)
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, UnidentifiedImageError
+
+from a4_engine import (
+    DEFAULT_FIT, DEFAULT_FOCUS, FIT_MODES, FOCUS_METHODS, default_workers, format_image,
+    output_params,
+)
+from a4_manifest import BASE_DIR, load_manifest, needs_rebuild, record_build, save_manifest
+from events import Reporter, add_report_arguments
+from file_journal import (
+    FilePlan, add_journal_arguments, finish_pending, refuse_if_pending, run_plan,
+)
+from format_for_a4_printing import legionnaire_output_path
+from format_new_images_a4 import TARGET_FOLDERS, a4_output_path, poster_fit
+from hold_sync import HOLD_DIR, TRANSFER_MODES, hold_status, transfer
+from image_index import (
+    COLLECTION_DIRS, LEGIONS_DIR, is_image_name, is_output_name, scan_collection,
+)
+from rename_new_images import get_proper_name
+
+JOURNAL_NAME = "pipeline"
+
+# kind is "poster", "primarch" or "legionnaire"; target is the clean file name
+PipelineItem = namedtuple("PipelineItem", ["kind", "source", "target", "fit"])
+
+ItemResult = namedtuple("ItemResult", ["item", "source", "final", "formatted", "hold", "error"])
+
+# Errors that fail one item without stopping the others: unreadable or
+# oversized images, bad parameters, file system errors and a worker that died
+ITEM_ERRORS = (OSError, UnidentifiedImageError, Image.DecompressionBombError, ValueError,
+               BrokenProcessPool)
+
+# Watch mode: seconds between snapshots, and how long a new or changed
+# original must stay the same size and mtime before it is processed
+WATCH_INTERVAL = 2.0
+SETTLE_SECONDS = 3.0
+
+
+def collect_items(index, fit=None):
+    """Every original in the collection, in the order the manual workflow visits them."""
+    items = []
+    for folder in TARGET_FOLDERS:
+        folder_path = BASE_DIR / folder
+        proper_name = get_proper_name(folder_path.name)
+        for img_path in index.originals(folder_path):
+            target = img_path.name if img_path.name.startswith(proper_name) else \
+                f"{proper_name}{img_path.suffix.lower()}"
+            items.append(PipelineItem("poster", img_path, target, poster_fit(img_path, fit)))
+
+    for legion_path in index.subfolders(BASE_DIR / LEGIONS_DIR):
+        legion_name = legion_path.name.replace(" ", "_")
+        for img_path in index.originals(legion_path / "primarch")[:1]:
+            items.append(PipelineItem("primarch", img_path,
+                                      f"{legion_name}_primarch{img_path.suffix}",
+                                      fit or DEFAULT_FIT))
+        for subfolder in ["1", "4"]:
+            for img_path in index.originals(legion_path / "legionnaire" / subfolder):
+                items.append(PipelineItem("legionnaire", img_path,
+                                          f"{legion_name}_legionnaire_{subfolder}{img_path.suffix}",
+                                          fit or DEFAULT_FIT))
+    return items
+
+
+def item_output(kind, source):
+    """A4 path of an original after renaming."""
+    if kind == "poster":
+        return a4_output_path(source)
+    if kind == "primarch":
+        return source.parent / f"{source.stem}_A4.jpeg"
+    return legionnaire_output_path(source)
+
+
+def find_conflicts(items):
+    """
+    Split items into those that can run and (item, reason) conflicts: items
+    whose clean name (ignoring the extension) or A4 output another original
+    also maps to, e.g. newart.png → Tau.png next to Tau.jpeg. An original
+    that already has its clean name keeps it; if none has, all claimants are
+    left for the user to sort out. Nothing is renamed.
+    """
+    def claim_keys(item):
+        renamed = item.source.with_name(item.target)
+        return renamed.with_suffix(""), item_output(item.kind, renamed)
+
+    claims = {}
+    for item in items:
+        for key in claim_keys(item):
+            claims.setdefault(key, []).append(item)
+
+    runnable = []
+    conflicts = []
+    for item in items:
+        renamed = item.source.with_name(item.target)
+        claimants = list({id(other): other for key in claim_keys(item)
+                          for other in claims[key]}.values())
+        others = [other for other in claimants if other is not item]
+        named = [other for other in claimants if other.source.name == other.target]
+        if others and (len(named) != 1 or named[0] is not item):
+            names = ", ".join(other.source.name for other in others)
+            conflicts.append((item, f"{renamed.stem} is also claimed by {names}"))
+        else:
+            runnable.append(item)
+    return runnable, conflicts
+
+
+def plan_renames(items, index):
+    """
+    Rename stage plan: a FilePlan giving each original its clean name.
+    Returns (plan, {item: source after the rename}, conflicts) where
+    conflicts are (item, reason) for clean names that are already taken.
+    """
+    plan = FilePlan(index, JOURNAL_NAME)
+    sources = {}
+    conflicts = []
+    for item in items:
+        renamed = item.source.with_name(item.target)
+        if renamed == item.source:
+            sources[item] = item.source
+        elif plan.move(item.source, renamed):
+            sources[item] = renamed
+        else:
+            conflicts.append((item, f"{renamed.name} already exists"))
+    return plan, sources, conflicts
+
+
+def hold_stage_status(final, hold_folder, formatted):
+    """
+    Hold stage check: hold_status of the A4 image's hold/ entry, or None if
+    it should not be staged. hold/ only collects what needs (re)printing, so
+    an image that was not formatted this run is only refreshed when an older
+    copy of it is already waiting there.
+    """
+    status = hold_status(final, hold_folder / final.name)
+    if status == "new" and not formatted:
+        return None
+    return status
+
+
+class Pipeline:
+    """Streams PipelineItems through the four stages, sharing one manifest and pool."""
+
+    def __init__(self, manifest, pool, focus=DEFAULT_FOCUS, force=False, hold_folder=HOLD_DIR,
+                 mode="auto", reporter=None):
+        self.manifest = manifest
+        self.pool = pool
+        self.focus = focus
+        self.force = force
+        self.hold_folder = hold_folder
+        self.mode = mode
+        self.hold_names = set()
+        self.start = time.perf_counter()
+        self.first_hold = None
+        # One event per item; rename, format and hold steps are noted on the way
+        self.reporter = reporter or Reporter("pipeline")
+
+    def _label(self, path):
+        return os.path.relpath(path, BASE_DIR)
+
+    async def process(self, item, source):
+        """Run one (already renamed) item through the other stages; returns an ItemResult."""
+        try:
+            return await self._process(item, source)
+        except ITEM_ERRORS as e:
+            message = str(e) or type(e).__name__
+            self.reporter.event(source, "error", line=f"❌ {self._label(source)} - {message}",
+                                message=message)
+            return ItemResult(item, source, None, False, None, message)
+
+    async def _process(self, item, source):
+        loop = asyncio.get_running_loop()
+        reporter = self.reporter
+        start = time.perf_counter()
+
+        final = item_output(item.kind, source)
+        params = output_params(item.fit, self.focus)
+        rebuild = self.force or (await asyncio.to_thread(
+            needs_rebuild, self.manifest, source, final, params))[0]
+
+        if rebuild:
+            format_start = time.perf_counter()
+            success, message = await loop.run_in_executor(
+                self.pool, format_image, source, final, item.fit, self.focus)
+            if not success:
+                reporter.event(source, "error", time.perf_counter() - start,
+                               line=f"❌ {self._label(source)} - {message}", stage="format",
+                               message=message)
+                return ItemResult(item, source, final, False, None, message)
+            await asyncio.to_thread(record_build, self.manifest, source, final, params)
+            reporter.note(final, "formatted", f"🖼️  {self._label(final)}", stage="format",
+                          seconds=round(time.perf_counter() - format_start, 4))
+
+        outcome = "formatted" if rebuild else "up to date"
+        bytes_in, bytes_out = os.stat(source).st_size, os.stat(final).st_size
+        status = await asyncio.to_thread(hold_stage_status, final, self.hold_folder, rebuild)
+        if status is None:
+            reporter.event(source, outcome, time.perf_counter() - start, bytes_in, bytes_out)
+            return ItemResult(item, source, final, rebuild, None, None)
+
+        # hold/ is keyed by file name; the first image with a name keeps it
+        if final.name in self.hold_names:
+            reporter.note(final, "name taken",
+                          f"⚠️  {self._label(final)} - another image is already staged as {final.name}",
+                          stage="hold")
+            reporter.event(source, outcome, time.perf_counter() - start, bytes_in, bytes_out)
+            return ItemResult(item, source, final, rebuild, None, None)
+        self.hold_names.add(final.name)
+
+        line = None
+        if status in ("new", "stale"):
+            await asyncio.to_thread(transfer, final, self.hold_folder / final.name, self.mode)
+            if self.first_hold is None:
+                self.first_hold = time.perf_counter() - self.start
+            line = f"📁 {final.name} → hold/" + (" (replaced stale copy)" if status == "stale" else "")
+        reporter.note(final, status, line, stage="hold")
+        reporter.event(source, outcome, time.perf_counter() - start, bytes_in, bytes_out,
+                       hold=status)
+        return ItemResult(item, source, final, rebuild, status, None)
+
+    def report_conflict(self, item, reason):
+        self.reporter.event(item.source, "conflict",
+                            line=f"⚠️  {self._label(item.source)} - not processed, {reason}",
+                            reason=reason)
+        return ItemResult(item, item.source, None, False, None, reason)
+
+    async def run(self, items, index, selected=None):
+        """
+        Rename all items through one journaled FilePlan, then process them
+        concurrently; with selected, only those whose source path is in it
+        (conflicts are still checked against all of them). Returns their
+        ItemResults, conflicting items (see find_conflicts) first, or None if
+        the renames stopped and left their journal to --resume or --rollback.
+        """
+        self.hold_folder.mkdir(exist_ok=True)
+        items, conflicts = find_conflicts(items)
+        if selected is not None:
+            items = [item for item in items if str(item.source) in selected]
+            conflicts = [entry for entry in conflicts if str(entry[0].source) in selected]
+        plan, sources, taken = plan_renames(items, index)
+        conflicts += taken
+        results = [self.report_conflict(item, reason) for item, reason in conflicts]
+
+        if not await asyncio.to_thread(run_plan, plan):
+            return None
+        items = [item for item in items if item in sources]
+        for item in items:
+            if sources[item] != item.source:
+                self.reporter.note(item.source, "renamed",
+                                   f"✏️  {self._label(item.source)} → {sources[item].name}",
+                                   stage="rename", to=sources[item].name)
+        return results + await asyncio.gather(*(self.process(item, sources[item])
+                                                for item in items))
+
+
+def snapshot(root=BASE_DIR, top_dirs=COLLECTION_DIRS):
+    """
+    {path: (size, mtime_ns)} of every original under the collection folders.
+    Outputs and *_A4_formatted folders are left out, so the pipeline's own
+    writes never look like new art.
+    """
+    stats = {}
+    stack = [os.path.join(root, top) for top in top_dirs]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.endswith("_A4_formatted"):
+                            stack.append(entry.path)
+                    elif is_image_name(entry.name) and not is_output_name(entry.name) \
+                            and not entry.name.startswith("."):
+                        st = entry.stat()
+                        stats[entry.path] = (st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            continue
+    return stats
+
+
+async def watch_collection(manifest, pool, fit=None, focus=DEFAULT_FOCUS, mode="auto",
+                           interval=WATCH_INTERVAL, settle=SETTLE_SECONDS, output=None,
+                           events=None):
+    """
+    Poll snapshot() every interval seconds and run originals that appeared or
+    changed through the pipeline once they have been stable for settle seconds.
+    output and events configure the Reporter of each batch (see events.py).
+    Returns False if a batch's renames stopped with their journal pending.
+    """
+    previous = await asyncio.to_thread(snapshot)
+    changed = {}  # path -> monotonic time of its last observed change
+    while True:
+        await asyncio.sleep(interval)
+        current = await asyncio.to_thread(snapshot)
+        now = time.monotonic()
+        for path, stat in current.items():
+            if previous.get(path) != stat:
+                changed[path] = now
+        for path in list(changed):
+            if path not in current:
+                del changed[path]
+        previous = current
+
+        ready = {path for path, seen in changed.items() if now - seen >= settle}
+        if not ready:
+            continue
+        for path in ready:
+            del changed[path]
+
+        index = scan_collection()
+        items = collect_items(index, fit)
+        count = sum(1 for item in items if str(item.source) in ready)
+        if not count:
+            continue
+        reporter = Reporter("pipeline", count, output, events)
+        reporter.info(f"\n👀 {count} new or changed original(s)")
+        pipeline = Pipeline(manifest, pool, focus, False, HOLD_DIR, mode, reporter)
+        results = await pipeline.run(items, index, ready)
+        await asyncio.to_thread(save_manifest, manifest)
+        summary = reporter.close()
+        if results is None:
+            return False
+        reporter.report(f"✅ Done in {summary['seconds']:.1f}s "
+                        f"({summary['images_per_second']} images/s)")
+
+        # Our own renames are not new art. Only the renamed paths are updated,
+        # so originals dropped in while the batch ran still differ from the
+        # pre-batch snapshot and are picked up by the next poll.
+        for result in results:
+            if result.source != result.item.source:
+                previous.pop(str(result.item.source), None)
+                try:
+                    st = os.stat(result.source)
+                except FileNotFoundError:
+                    continue
+                previous[str(result.source)] = (st.st_size, st.st_mtime_ns)
+
+
+def run_watch(workers=None, fit=None, focus=DEFAULT_FOCUS, mode="auto", interval=WATCH_INTERVAL,
+              output=None, events=None):
+    """
+    Catch up with one full pipeline pass, then watch until interrupted.
+    Returns False if renames stopped with their journal pending.
+    """
+    if run_pipeline(workers, False, fit, focus, mode, output, events) is None:
+        return False
+
+    workers = workers or default_workers()
+    manifest = load_manifest()
+    console = Reporter("pipeline", 0, output, events)
+    console.info(f"\n👀 Watching {', '.join(COLLECTION_DIRS)} "
+                 f"(every {interval:g}s, Ctrl+C to stop)")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            return asyncio.run(watch_collection(manifest, pool, fit, focus, mode, interval,
+                                                output=output, events=events))
+        except KeyboardInterrupt:
+            console.info("\nStopped watching")
+            return True
+        finally:
+            save_manifest(manifest)
+
+
+def run_pipeline(workers=None, force=False, fit=None, focus=DEFAULT_FOCUS, mode="auto",
+                 output=None, events=None):
+    """
+    Scan once, stream every original through the pipeline and print a
+    summary. Returns the ItemResults, or None if the renames stopped.
+    """
+    workers = workers or default_workers()
+    manifest = load_manifest()
+    index = scan_collection()
+    items = collect_items(index, fit)
+    reporter = Reporter("pipeline", len(items), output, events)
+    reporter.info(f"Originals: {len(items)}")
+    reporter.info(f"Workers:   {workers}")
+    reporter.info("-" * 60)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pipeline = Pipeline(manifest, pool, focus, force, HOLD_DIR, mode, reporter)
+        try:
+            results = asyncio.run(pipeline.run(items, index))
+        finally:
+            save_manifest(manifest)
+    summary = reporter.close(
+        first_hold_seconds=pipeline.first_hold and round(pipeline.first_hold, 3))
+    if results is None:
+        return None
+
+    # Print summary
+    reporter.report("\n" + "="*60)
+    reporter.report("PIPELINE COMPLETE")
+    reporter.report("="*60)
+    reporter.report(f"Renamed: {sum(1 for r in results if r.source != r.item.source)}")
+    reporter.report(f"Formatted: {sum(1 for r in results if r.formatted)}")
+    reporter.report(f"Up to date: {sum(1 for r in results if not r.formatted and not r.error)}")
+    reporter.report(f"Staged in hold: {sum(1 for r in results if r.hold in ('new', 'stale'))}")
+    reporter.report(f"Conflicts: {reporter.count('conflict')}")
+    reporter.report(f"Errors: {reporter.count('error')}")
+    if pipeline.first_hold is not None:
+        reporter.report(f"First image in hold after {pipeline.first_hold:.1f}s")
+    reporter.report(f"Time: {summary['seconds']:.1f}s ({summary['images_per_second']} images/s, "
+                    f"{summary['mb_per_second']} MB/s)")
+    reporter.report("="*60)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="resize processes (default: $A4_WORKERS or CPU count)")
+    parser.add_argument("--fit", choices=FIT_MODES, default=None,
+                        help="fit mode for every image (default: each poster's own, else stretch)")
+    parser.add_argument("--focus", choices=FOCUS_METHODS, default=DEFAULT_FOCUS,
+                        help=f"focal point method for --fit cover (default: {DEFAULT_FOCUS})")
+    parser.add_argument("--mode", choices=TRANSFER_MODES, default="auto",
+                        help="how to place files in hold/ (default: auto)")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild A4 versions even if they are up to date")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and process new or replaced originals as they appear")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL,
+                        help=f"seconds between checks in watch mode (default: {WATCH_INTERVAL:g})")
+    add_journal_arguments(parser, dry_run=False)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    if args.watch and args.force:
+        parser.error("--force cannot be combined with --watch")
+
+    if args.resume or args.rollback:
+        sys.exit(0 if finish_pending(JOURNAL_NAME, args.rollback) else 1)
+    if refuse_if_pending(JOURNAL_NAME):
+        sys.exit(1)
+
+    console = Reporter("pipeline", 0, args.output, args.events)
+    console.info("Poster Pipeline")
+    console.info("="*60)
+    console.info("rename → format → hold")
+    console.info("="*60 + "\n")
+
+    if args.watch:
+        ok = run_watch(args.workers, args.fit, args.focus, args.mode, args.interval, args.output,
+                       args.events)
+    else:
+        ok = run_pipeline(args.workers, args.force, args.fit, args.focus, args.mode, args.output,
+                          args.events) is not None
+    sys.exit(0 if ok else 1)
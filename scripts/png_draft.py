@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Draft decoding for large PNG scans, the PNG counterpart of JPEG Image.draft.
+The pixel data is inflated and unfiltered a band of rows at a time, and
+each band is box-reduced (Image.reduce) by an integer factor before the
+next one is read, so only the reduced image and one band of full-resolution
+rows are ever in memory. The result is the same as decoding the whole image,
+converting it to RGB (or leaving it greyscale) and reducing it.
+Each band goes through Pillow's own PNG decoder: it is fed the band's
+filtered rows re-wrapped in an uncompressed zlib stream, after a copy of
+the previous band's last row so the row filters have the row above them.
+Only non-interlaced PNGs with 8 bits per channel qualify.
+"""
+
+import struct
+import zlib
+
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Modes whose 8-bit PNG rows Pillow stores byte for byte, with bytes per pixel
+DRAFT_MODES = {"L": 1, "P": 1, "LA": 2, "RGB": 3, "RGBA": 4}
+
+# Source rows decoded per band (rounded up to a multiple of the reduction factor)
+BAND_ROWS = 256
+
+# Bytes read from the file at a time
+READ_SIZE = 1 << 20
+
+
+def draft_factor(source_size, size):
+    """Largest integer reduction of source_size that still covers size (1: none)."""
+    factor = 1
+    while (-(-source_size[0] // (factor + 1)) >= size[0]
+           and -(-source_size[1] // (factor + 1)) >= size[1]):
+        factor += 1
+    return factor
+
+
+def can_draft(img):
+    """True if img is an unloaded PNG that draft_png can decode band by band."""
+    if img.format != "PNG" or img.info.get("interlace") or len(img.tile) != 1:
+        return False
+    tile = img.tile[0]
+    return tile[0] == "zip" and img.mode in DRAFT_MODES and tile[3] == img.mode
+
+
+def _idat_chunks(f):
+    """Yield the compressed pixel data of the PNG file f, in pieces."""
+    f.seek(len(PNG_SIGNATURE))
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            return
+        length, kind = struct.unpack(">I4s", head)
+        if kind == b"IEND":
+            return
+        if kind != b"IDAT":
+            f.seek(length + 4, 1)
+            continue
+        while length:
+            data = f.read(min(length, READ_SIZE))
+            if not data:
+                raise ValueError("truncated PNG")
+            length -= len(data)
+            yield data
+        f.seek(4, 1)
+
+
+def _filtered_rows(f, row_bytes, band_rows):
+    """Yield the filtered (still PNG-encoded) bytes of band_rows rows at a time."""
+    inflate = zlib.decompressobj()
+    chunks = _idat_chunks(f)
+    pending = b""
+    want = band_rows * row_bytes
+    while True:
+        parts = [pending]
+        have = len(pending)
+        while have < want:
+            data = inflate.unconsumed_tail or next(chunks, b"")
+            if not data:
+                break
+            part = inflate.decompress(data, want - have)
+            parts.append(part)
+            have += len(part)
+        band = b"".join(parts)
+        if not band:
+            return
+        pending = band[want:]
+        yield band[:want]
+        if len(band) < want:
+            return
+
+
+def _unfilter(mode, width, seed, filtered):
+    """Decode filtered rows into an image, using seed as the row above the first."""
+    rows = len(filtered) // (width * DRAFT_MODES[mode] + 1)
+    im = Image.new(mode, (width, rows + 1))
+    decoder = Image._getdecoder(mode, "zip", mode)
+    decoder.setimage(im.im, (0, 0, width, rows + 1))
+    try:
+        _, err = decoder.decode(zlib.compress(b"\x00" + seed + filtered, 0))
+    finally:
+        decoder.cleanup()
+    if err < 0:
+        raise ValueError(f"PNG decoder error {err}")
+    band = im.crop((0, 1, width, rows + 1))
+    new_seed = im.crop((0, rows, width, rows + 1)).tobytes()
+    im.close()
+    return band, new_seed
+
+
+def draft_png(img, size, band_rows=BAND_ROWS):
+    """
+    Decode the PNG img reduced by the largest integer factor that still
+    covers size, converting it to RGB unless it is greyscale. Returns None
+    if img does not qualify (see can_draft) or is not large enough to reduce.
+    """
+    factor = draft_factor(img.size, size)
+    if factor < 2 or not can_draft(img):
+        return None
+
+    width, height = img.size
+    row_bytes = width * DRAFT_MODES[img.mode] + 1
+    out_mode = "L" if img.mode == "L" else "RGB"
+    out = Image.new(out_mode, (-(-width // factor), -(-height // factor)))
+    seed = bytes(row_bytes - 1)
+    y = 0
+    with open(img.filename, "rb") as f:
+        for filtered in _filtered_rows(f, row_bytes, -(-band_rows // factor) * factor):
+            band, seed = _unfilter(img.mode, width, seed, filtered)
+            if img.mode == "P":
+                band.palette = img.palette.copy()
+            rgb = band.convert(out_mode) if band.mode != out_mode else band
+            reduced = rgb.reduce(factor)
+            out.paste(reduced, (0, y))
+            y += reduced.height
+            if rgb is not band:
+                rgb.close()
+            band.close()
+            reduced.close()
+    if y != out.height:
+        out.close()
+        raise ValueError(f"truncated PNG: {img.filename}")
+    return out
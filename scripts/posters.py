@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+One entry point for the poster scripts.
+
+  posters scan                                   what is in the collection
+  posters rename [new|primarchs|formatted]       rename originals to the convention
+  posters format [collection|legionnaires|primarchs|new|three|emperor]
+  posters reorganize                             move legionnaire outputs next to originals
+  posters hold [sync|legionnaires|primarchs|formatted]
+  posters export [pdf|preview|optimize]
+  posters catalog [refresh|report NAME|sql QUERY]   indexed queries (catalog.py)
+
+The first word after a command picks its target (the first one listed is
+the default); the rest goes to the script behind it, so
+`posters format new --fit cover` runs format_new_images_a4.py --fit cover,
+and `posters format new --help` lists its options. Scripts are only
+imported when their command runs, so scan, rename, reorganize, hold and
+catalog never load Pillow or NumPy. The collection root is --root, else
+$POSTERS_ROOT, else the repository the scripts live in.
+"""
+
+import argparse
+import os
+import runpy
+import sys
+import time
+
+# command -> {target: script module}; the first target is the default
+COMMANDS = {
+    "scan": {},
+    "rename": {"new": "rename_new_images", "primarchs": "rename_primarchs",
+               "formatted": "rename_images"},
+    "format": {"collection": "format_collection_a4", "legionnaires": "format_for_a4_printing",
+               "primarchs": "format_primarchs_a4", "new": "format_new_images_a4",
+               "three": "format_three_images_a4", "emperor": "format_emperor_a4"},
+    "reorganize": {"legionnaires": "reorganize_images"},
+    "hold": {"sync": "hold_sync", "legionnaires": "copy_legionnaires_to_hold",
+             "primarchs": "copy_primarchs_emperor_to_hold", "formatted": "copy_to_hold"},
+    "export": {"pdf": "export_pdf", "preview": "wall_preview", "optimize": "optimize_jpegs"},
+    "catalog": {"images": "catalog"},
+}
+
+
+def scan(argv):
+    """Count originals and outputs per top-level folder and list posters without an A4 image."""
+    parser = argparse.ArgumentParser(prog="posters scan", description=scan.__doc__)
+    parser.parse_args(argv)
+
+    from image_index import scan_collection
+    from paths import BASE_DIR
+    from wall_layout import load_layout
+
+    start = time.perf_counter()
+    index = scan_collection()
+    counts = {}
+    for folder in index.folders():
+        top = os.path.relpath(folder, BASE_DIR).split(os.sep)[0]
+        entry = counts.setdefault(top, [0, 0, 0, 0])
+        entry[0] += 1
+        entry[1] += len(index.originals(folder))
+        entry[2] += len(index.a4_outputs(folder))
+        entry[3] += len(index.other_outputs(folder))
+    missing = [poster for poster in load_layout().posters() if poster.find_a4(index) is None]
+    elapsed = time.perf_counter() - start
+
+    print(f"Collection: {BASE_DIR}")
+    print("="*60)
+    print(f"{'Folder':24} {'Folders':>8} {'Originals':>10} {'A4':>6} {'Other':>6}")
+    for top, (folders, originals, a4, other) in sorted(counts.items()):
+        print(f"{top:24} {folders:8} {originals:10} {a4:6} {other:6}")
+    print("="*60)
+    if missing:
+        print(f"⚠️  Posters without an A4 image: {len(missing)}")
+        for poster in missing:
+            print(f"   {poster.wall} row {poster.row} spot {poster.spot}: {poster.name}")
+    else:
+        print("✅ Every poster has an A4 image")
+    print(f"Time: {elapsed * 1000:.0f}ms")
+
+
+def run_script(command, argv):
+    """Run the script behind command as if it was started directly with argv."""
+    targets = COMMANDS[command]
+    if argv and argv[0] in targets:
+        target, argv = argv[0], argv[1:]
+    else:
+        target = next(iter(targets))
+    sys.argv = [f"posters {command} {target}", *argv]
+    runpy.run_module(targets[target], run_name="__main__", alter_sys=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="posters", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=None,
+                        help="collection root (default: $POSTERS_ROOT or the repository)")
+    parser.add_argument("command", choices=list(COMMANDS))
+    parser.add_argument("args", nargs=argparse.REMAINDER,
+                        help="target and options of the command")
+    args = parser.parse_args(argv)
+
+    if args.root:
+        # Read by paths.py when the command imports its first module
+        os.environ["POSTERS_ROOT"] = os.path.abspath(args.root)
+    if args.command == "scan":
+        scan(args.args)
+    else:
+        run_script(args.command, args.args)
+
+
+if __name__ == "__main__":
+    main()
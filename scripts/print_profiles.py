@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Named print profiles: paper size, DPI and JPEG settings for each output size.
+The built-in a4, a3 and letter profiles can be extended or overridden with a
+print_profiles.json at the repository root, e.g.
+
+    {"a5": {"paper_mm": [148, 210], "dpi": 300, "quality": 92, "suffix": "_A5"}}
+
+Profiles are resolved once at import (pixel size, save options, manifest
+parameters), so formatting code only looks them up by name.
+"""
+
+import json
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+from paths import BASE_DIR
+
+PROFILES_PATH = BASE_DIR / "print_profiles.json"
+
+DEFAULT_PROFILE = "a4"
+DEFAULT_SUBSAMPLING = "4:2:0"
+
+# Prefix of the JPEG comment that records how an output was made
+COMMENT_PREFIX = "print-profile "
+
+BUILTIN_PROFILES = {
+    "a4": {"paper_mm": [210, 297], "dpi": 300, "quality": 95, "suffix": "_A4"},
+    "a3": {"paper_mm": [297, 420], "dpi": 300, "quality": 95, "suffix": "_A3"},
+    "letter": {"paper_mm": [215.9, 279.4], "dpi": 300, "quality": 95, "suffix": "_Letter"},
+}
+
+PrintProfile = namedtuple("PrintProfile", [
+    "name", "width_mm", "height_mm", "dpi", "quality", "subsampling", "progressive",
+    "suffix", "size", "save_options", "params",
+])
+
+
+def make_profile(name, paper_mm, dpi=300, quality=95, subsampling=DEFAULT_SUBSAMPLING,
+                 progressive=False, suffix=None):
+    """Resolve one profile definition into a PrintProfile."""
+    width_mm, height_mm = paper_mm
+    size = (round(width_mm / 25.4 * dpi), round(height_mm / 25.4 * dpi))
+    # optimize (optimal Huffman tables) only changes the entropy coding, so
+    # files get smaller but decode to the same pixels
+    save_options = {
+        "quality": quality,
+        "dpi": (dpi, dpi),
+        "subsampling": subsampling,
+        "progressive": progressive,
+        "optimize": True,
+    }
+
+    # Manifest parameters. Settings at their defaults are left out so the
+    # a4 parameters match the ones recorded before profiles existed.
+    params = {
+        "width": size[0],
+        "height": size[1],
+        "dpi": [dpi, dpi],
+        "quality": quality,
+    }
+    if name != DEFAULT_PROFILE:
+        params["profile"] = name
+    if subsampling != DEFAULT_SUBSAMPLING:
+        params["subsampling"] = subsampling
+    if progressive:
+        params["progressive"] = True
+
+    return PrintProfile(name, width_mm, height_mm, dpi, quality, subsampling, progressive,
+                        suffix or f"_{name.upper()}", size, save_options, params)
+
+
+# Keys a profile definition may set (the arguments of make_profile)
+PROFILE_KEYS = ("paper_mm", "dpi", "quality", "subsampling", "progressive", "suffix")
+
+
+def check_definition(name, options, path=PROFILES_PATH):
+    """
+    Options of a print_profiles.json entry that make_profile accepts, on
+    top of the built-in profile of the same name if any. Unknown keys are
+    ignored with a warning; a missing paper_mm or an entry that is not an
+    object raises ValueError naming the profile.
+    """
+    if not isinstance(options, dict):
+        raise ValueError(f"{path.name}: profile {name!r} must be an object")
+    options = dict(BUILTIN_PROFILES.get(name, {}), **options)
+    if "paper_mm" not in options:
+        raise ValueError(f"{path.name}: profile {name!r} has no paper_mm")
+    for key in options:
+        if key not in PROFILE_KEYS:
+            print(f"⚠️  {path.name}: ignoring unknown key {key!r} in profile {name!r} "
+                  f"(known keys: {', '.join(PROFILE_KEYS)})", file=sys.stderr)
+    return {key: value for key, value in options.items() if key in PROFILE_KEYS}
+
+
+def load_profiles(path=PROFILES_PATH):
+    """Built-in profiles plus any defined in print_profiles.json."""
+    definitions = dict(BUILTIN_PROFILES)
+    try:
+        with open(path, encoding="utf-8") as f:
+            custom = json.load(f)
+    except FileNotFoundError:
+        custom = {}
+    for name, options in custom.items():
+        definitions[name] = check_definition(name, options, path)
+    return {name: make_profile(name, **options) for name, options in definitions.items()}
+
+
+PROFILES = load_profiles()
+
+
+def get_profile(name):
+    """Look up a profile by name (ValueError if unknown)."""
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown print profile: {name}") from None
+
+
+def output_suffixes():
+    """Lower-case file name markers of every profile's outputs (_a4, _a3, ...)."""
+    return tuple(profile.suffix.lower() for profile in PROFILES.values())
+
+
+def profile_output_path(a4_output_path, profile):
+    """
+    Output path of profile, next to the A4 output: the last _A4 in the file
+    name is swapped (X_legionnaire_1_A4.jpeg -> X_legionnaire_1_A3.jpeg),
+    or the suffix is added if the name has none.
+    """
+    a4_output_path = Path(a4_output_path)
+    a4_suffix = PROFILES[DEFAULT_PROFILE].suffix
+    if profile.name == DEFAULT_PROFILE:
+        return a4_output_path
+
+    name = a4_output_path.name
+    if a4_suffix in name:
+        head, _, tail = name.rpartition(a4_suffix)
+        return a4_output_path.with_name(head + profile.suffix + tail)
+
+    return a4_output_path.with_name(f"{a4_output_path.stem}{profile.suffix}{a4_output_path.suffix}")
+
+
+def profile_comment(params):
+    """JPEG comment that records the parameters an output was built with."""
+    return COMMENT_PREFIX + json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+
+def parse_profile_comment(comment):
+    """Parameters stored by profile_comment(), or None for other comments."""
+    if not comment or not comment.startswith(COMMENT_PREFIX):
+        return None
+    try:
+        return json.loads(comment[len(COMMENT_PREFIX):])
+    except ValueError:
+        return None
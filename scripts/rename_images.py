@@ -1,79 +1,102 @@
 #!/usr/bin/env python3
 """
 Rename formatted images to: {Legion_Name}_legionnaire_{subfolder}.{extension}
+Renames are planned first and applied through a journal (file_journal.py).
 """
 
-import os
-from pathlib import Path
+import argparse
+import sys
 
-def rename_formatted_images():
+from events import Reporter, add_report_arguments, reporter_for
+from file_journal import (
+    FilePlan, add_journal_arguments, finish_pending, refuse_if_pending, run_plan,
+)
+from image_index import LEGIONS_PATH, scan_collection
+
+JOURNAL_NAME = "rename_formatted"
+
+def rename_formatted_images(dry_run=False, reporter=None):
     """Rename all images in *_A4_formatted folders with standardized names."""
-    base_path = Path("space marine legions")
+    base_path = LEGIONS_PATH
+    reporter = reporter or Reporter("rename")
 
     if not base_path.exists():
-        print("Error: 'space marine legions' folder not found!")
+        reporter.warn("Error: 'space marine legions' folder not found!")
         return
 
-    renamed_count = 0
-    skipped_count = 0
+    index = scan_collection(base_path.parent, [base_path.name])
+    plan = FilePlan(index, JOURNAL_NAME)
 
     # Process each legion
-    for legion_path in sorted(base_path.iterdir()):
-        if not legion_path.is_dir():
-            continue
-
+    for legion_path in index.subfolders(base_path):
         legion_name = legion_path.name.replace(" ", "_")
         legionnaire_path = legion_path / "legionnaire"
 
-        if not legionnaire_path.exists():
+        if not index.exists(legionnaire_path):
             continue
 
         # Process formatted subfolders
-        for formatted_folder in legionnaire_path.glob("*_A4_formatted"):
+        formatted_folders = [folder for folder in index.subfolders(legionnaire_path)
+                             if folder.name.endswith("_A4_formatted")]
+        for formatted_folder in formatted_folders:
             # Extract subfolder number (1 or 4)
             subfolder_num = formatted_folder.name.replace("_A4_formatted", "")
 
             # Process each image in the folder
-            for img_path in formatted_folder.iterdir():
-                if img_path.is_file() and img_path.suffix.lower() in ['.jpeg', '.jpg', '.png']:
-                    # Build new filename
-                    new_name = f"{legion_name}_legionnaire_{subfolder_num}{img_path.suffix}"
-                    new_path = formatted_folder / new_name
-
-                    # Check if already renamed
-                    if img_path.name == new_name:
-                        print(f"Already named: {legion_name}/{subfolder_num}_A4_formatted/{new_name}")
-                        skipped_count += 1
-                        continue
-
-                    # Check if target filename already exists
-                    if new_path.exists():
-                        print(f"WARNING: Target exists, skipping: {new_path}")
-                        skipped_count += 1
-                        continue
-
-                    # Rename the file
-                    print(f"Renaming: {img_path.name} → {new_name}")
-                    img_path.rename(new_path)
-                    renamed_count += 1
+            for img_path in index.images(formatted_folder):
+                # Build new filename
+                new_name = f"{legion_name}_legionnaire_{subfolder_num}{img_path.suffix}"
+                new_path = formatted_folder / new_name
+
+                # Check if already renamed
+                if img_path.name == new_name:
+                    reporter.note(img_path, "named",
+                                  f"Already named: {legion_name}/{subfolder_num}_A4_formatted/{new_name}")
+                    continue
+
+                # Rename the file, unless the target filename already exists
+                if not plan.move(img_path, new_path):
+                    reporter.note(img_path, "conflict",
+                                  f"WARNING: Target exists, skipping: {new_path}", to=new_name)
+                    continue
+
+                reporter.event(img_path, "renamed", line=f"Renaming: {img_path.name} → {new_name}",
+                               to=new_name)
+
+    applied = run_plan(plan, dry_run)
+    reporter.close(dry_run=dry_run, applied=applied)
+    if not applied:
+        return False
 
     # Print summary
-    print("\n" + "="*60)
-    print("RENAMING COMPLETE")
-    print("="*60)
-    print(f"Images renamed: {renamed_count}")
-    print(f"Images skipped: {skipped_count}")
-    print("="*60)
-    print("\nExample filenames:")
-    print("  - World_Eaters_legionnaire_1.jpeg")
-    print("  - World_Eaters_legionnaire_4.jpeg")
-    print("  - Blood_Angels_legionnaire_1.jpeg")
-    print("="*60)
+    reporter.report("\n" + "="*60)
+    reporter.report("RENAMING " + ("PLANNED (dry run, nothing changed)" if dry_run else "COMPLETE"))
+    reporter.report("="*60)
+    reporter.report(f"Images renamed: {reporter.count('renamed')}")
+    reporter.report(f"Images skipped: {reporter.count('named', 'conflict')}")
+    reporter.report("="*60)
+    reporter.info("\nExample filenames:")
+    reporter.info("  - World_Eaters_legionnaire_1.jpeg")
+    reporter.info("  - World_Eaters_legionnaire_4.jpeg")
+    reporter.info("  - Blood_Angels_legionnaire_1.jpeg")
+    reporter.info("="*60)
+    return True
 
 if __name__ == "__main__":
-    print("Space Marine Image Renamer")
-    print("="*60)
-    print("Renaming pattern: {Legion_Name}_legionnaire_{subfolder}.ext")
-    print("="*60 + "\n")
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_journal_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    reporter = reporter_for(args, "rename")
+
+    reporter.info("Space Marine Image Renamer")
+    reporter.info("="*60)
+    reporter.info("Renaming pattern: {Legion_Name}_legionnaire_{subfolder}.ext")
+    reporter.info("="*60 + "\n")
 
-    rename_formatted_images()
+    if args.resume or args.rollback:
+        sys.exit(0 if finish_pending(JOURNAL_NAME, args.rollback) else 1)
+    if refuse_if_pending(JOURNAL_NAME):
+        sys.exit(1)
+    sys.exit(0 if rename_formatted_images(args.dry_run, reporter) is not False else 1)
@@ -2,80 +2,24 @@
 """
 Rename newly added images to follow standard naming convention.
 Converts folder name to proper filename format.
+Renames are planned first and applied through a journal (file_journal.py).
 """
 
-import os
-from pathlib import Path
-
-# Base directory
-BASE_DIR = Path(__file__).parent.parent
-
-# Define all folders that need renaming (excluding primarchs which are already good)
-RENAME_TARGETS = [
-    # Main wall - row 2 emperor forces
-    "main_wall/row_2_emperor_forces/malcador",
-    "main_wall/row_2_emperor_forces/sisters_of_battle",
-    "main_wall/row_2_emperor_forces/tech_priest",
-    "main_wall/row_2_emperor_forces/grey_knights",
-    "main_wall/row_2_emperor_forces/assassins/culexus",
-    "main_wall/row_2_emperor_forces/assassins/eversor",
-    "main_wall/row_2_emperor_forces/assassins/callidus",
-    "main_wall/row_2_emperor_forces/assassins/vindicare",
-    "main_wall/row_2_emperor_forces/emperor_class_titan",
-    "main_wall/row_2_emperor_forces/constantine_valdor",
-    "main_wall/row_2_emperor_forces/sisters_of_silence",
-    "main_wall/row_2_emperor_forces/inquisition",
-
-    # Main wall - row 1 primarchs (I, III-X)
-    "main_wall/row_1_primarchs/lion_el_jonson",
-    "main_wall/row_1_primarchs/fulgrim",
-    "main_wall/row_1_primarchs/perturabo",
-    "main_wall/row_1_primarchs/jaghatai_khan",
-    "main_wall/row_1_primarchs/leman_russ",
-    "main_wall/row_1_primarchs/rogal_dorn",
-    "main_wall/row_1_primarchs/konrad_curze",
-    "main_wall/row_1_primarchs/sanguinius",
-    "main_wall/row_1_primarchs/ferrus_manus",
-
-    # Main wall - row 3 primarchs (XII-XX)
-    "main_wall/row_3_primarchs/angron",
-    "main_wall/row_3_primarchs/roboute_guilliman",
-    "main_wall/row_3_primarchs/mortarion",
-    "main_wall/row_3_primarchs/magnus",
-    "main_wall/row_3_primarchs/horus",
-    "main_wall/row_3_primarchs/lorgar",
-    "main_wall/row_3_primarchs/vulkan",
-    "main_wall/row_3_primarchs/corvus_corax",
-    "main_wall/row_3_primarchs/alpharius",
-
-    # Main wall - chaos gods
-    "main_wall/chaos_gods/tzeentch",
-    "main_wall/chaos_gods/khorne",
-    "main_wall/chaos_gods/slaanesh",
-    "main_wall/chaos_gods/nurgle",
-
-    # Main wall - xenos
-    "main_wall/xenos/tau",
-    "main_wall/xenos/tyranids",
-    "main_wall/xenos/necrons",
-    "main_wall/xenos/eldar",
-
-    # Wall 1 - assassins (remaining temples)
-    "wall_1_right/assassins/venenum",
-    "wall_1_right/assassins/vanus",
-
-    # Wall 2 - chaos champions
-    "wall_2_left/chaos_champions/sevatar",
-    "wall_2_left/chaos_champions/abaddon",
-    "wall_2_left/chaos_champions/ahriman",
-    "wall_2_left/chaos_champions/kharn",
-
-    # Wall 2 - loyalist champions
-    "wall_2_left/loyalist_champions/amit",
-    "wall_2_left/loyalist_champions/logan_grimnar",
-    "wall_2_left/loyalist_champions/tyberos",
-    "wall_2_left/loyalist_champions/sigismund",
-]
+import argparse
+import sys
+
+from events import Reporter, add_report_arguments, reporter_for
+from file_journal import (
+    FilePlan, add_journal_arguments, finish_pending, refuse_if_pending, run_plan,
+)
+from image_index import is_a4_name, scan_collection
+from paths import BASE_DIR
+from wall_layout import load_layout
+
+# Every poster folder on the three walls, in layout order (see wall_layout.json)
+RENAME_TARGETS = load_layout().folders()
+
+JOURNAL_NAME = "rename_new"
 
 
 def get_proper_name(folder_name):
@@ -87,28 +31,27 @@ def get_proper_name(folder_name):
     return proper_name
 
 
-def rename_images_in_folder(folder_path):
-    """Rename all images in a folder to match the folder name."""
+def rename_images_in_folder(folder_path, plan, reporter=None):
+    """Plan renaming all images in a folder to match the folder name."""
     folder_path = BASE_DIR / folder_path
+    index = plan.index
+    reporter = reporter or Reporter("rename")
 
-    if not folder_path.exists():
-        print(f"⚠️  Folder not found: {folder_path}")
+    if not index.exists(folder_path):
+        reporter.note(folder_path, "missing")
+        reporter.warn(f"⚠️  Folder not found: {folder_path}")
         return
 
     # Get folder name (last part of path)
     folder_name = folder_path.name
     proper_name = get_proper_name(folder_name)
 
-    # Find all image files
-    image_files = list(folder_path.glob("*.jpg")) + \
-                  list(folder_path.glob("*.jpeg")) + \
-                  list(folder_path.glob("*.png")) + \
-                  list(folder_path.glob("*.JPG")) + \
-                  list(folder_path.glob("*.JPEG")) + \
-                  list(folder_path.glob("*.PNG"))
+    # Find all image files (any extension case)
+    image_files = index.images(folder_path)
 
     if not image_files:
-        print(f"⚠️  No images found in: {folder_path}")
+        reporter.note(folder_path, "empty")
+        reporter.warn(f"⚠️  No images found in: {folder_path}")
         return
 
     for img_file in image_files:
@@ -116,14 +59,14 @@ def rename_images_in_folder(folder_path):
 
         # Skip if already properly named
         if old_name.startswith(proper_name):
-            print(f"✓ Already correct: {folder_path.name}/{old_name}")
+            reporter.note(img_file, "named", f"✓ Already correct: {folder_path.name}/{old_name}")
             continue
 
         # Determine extension
         ext = img_file.suffix.lower()
 
         # Check if this is an A4 version (unlikely for new images, but handle it)
-        if "_A4" in old_name or "_a4" in old_name:
+        if is_a4_name(old_name):
             new_name = f"{proper_name}_A4{ext}"
         else:
             # This is the original, keep original extension
@@ -131,40 +74,61 @@ def rename_images_in_folder(folder_path):
 
         new_path = folder_path / new_name
 
-        # Check if target already exists
-        if new_path.exists():
-            print(f"⚠️  Target exists, skipping: {folder_path.name}/{old_name} -> {new_name}")
+        # Rename the file, unless the target already exists
+        if not plan.move(img_file, new_path):
+            reporter.note(img_file, "conflict",
+                          f"⚠️  Target exists, skipping: {folder_path.name}/{old_name} -> {new_name}",
+                          to=new_name)
             continue
 
-        # Rename the file
-        img_file.rename(new_path)
-        print(f"✓ Renamed: {folder_path.name}/{old_name} -> {new_name}")
+        reporter.event(img_file, "renamed",
+                       line=f"✓ Renamed: {folder_path.name}/{old_name} -> {new_name}", to=new_name)
 
 
-def main():
-    print("=" * 70)
-    print("RENAMING NEW IMAGES TO STANDARD FORMAT")
-    print("=" * 70)
-    print()
+def main(dry_run=False, reporter=None):
+    reporter = reporter or Reporter("rename")
+    reporter.info("=" * 70)
+    reporter.info("RENAMING NEW IMAGES TO STANDARD FORMAT")
+    reporter.info("=" * 70)
+    reporter.info()
 
-    renamed_count = 0
+    plan = FilePlan(scan_collection(), JOURNAL_NAME)
 
     for target in RENAME_TARGETS:
-        print(f"\nProcessing: {target}")
-        print("-" * 70)
-        rename_images_in_folder(target)
-        renamed_count += 1
-
-    print()
-    print("=" * 70)
-    print(f"COMPLETE! Processed {renamed_count} folders")
-    print("=" * 70)
-    print()
-    print("Next steps:")
-    print("1. Review the renamed files")
-    print("2. Run format_primarchs_a4.py to create A4 versions")
-    print()
+        reporter.say(f"\nProcessing: {target}\n" + "-" * 70)
+        rename_images_in_folder(target, plan, reporter)
+
+    applied = run_plan(plan, dry_run)
+    reporter.close(dry_run=dry_run, applied=applied, folders=len(RENAME_TARGETS))
+    if not applied:
+        return False
+
+    reporter.report()
+    reporter.report("=" * 70)
+    if dry_run:
+        reporter.report(f"DRY RUN! Planned {len(plan)} renames in {len(RENAME_TARGETS)} folders, "
+                        "nothing changed")
+    else:
+        reporter.report(f"COMPLETE! Processed {len(RENAME_TARGETS)} folders, "
+                        f"renamed {reporter.count('renamed')} images")
+    reporter.report("=" * 70)
+    reporter.info()
+    reporter.info("Next steps:")
+    reporter.info("1. Review the renamed files")
+    reporter.info("2. Run format_primarchs_a4.py to create A4 versions")
+    reporter.info()
+    return True
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_journal_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    if args.resume or args.rollback:
+        sys.exit(0 if finish_pending(JOURNAL_NAME, args.rollback) else 1)
+    if refuse_if_pending(JOURNAL_NAME):
+        sys.exit(1)
+    sys.exit(0 if main(args.dry_run, reporter_for(args, "rename")) else 1)
@@ -1,41 +1,46 @@
 #!/usr/bin/env python3
 """
 Rename primarch images to: {Legion_Name}_primarch.{extension}
+Renames are planned first and applied through a journal (file_journal.py).
 """
 
-from pathlib import Path
+import argparse
+import sys
 
-def rename_primarch_images():
+from events import Reporter, add_report_arguments, reporter_for
+from file_journal import (
+    FilePlan, add_journal_arguments, finish_pending, refuse_if_pending, run_plan,
+)
+from image_index import LEGIONS_PATH, scan_collection
+
+JOURNAL_NAME = "rename_primarchs"
+
+def rename_primarch_images(dry_run=False, reporter=None):
     """Rename all primarch images with standardized names."""
-    base_path = Path("space marine legions")
+    base_path = LEGIONS_PATH
+    reporter = reporter or Reporter("rename")
 
     if not base_path.exists():
-        print("Error: 'space marine legions' folder not found!")
+        reporter.warn("Error: 'space marine legions' folder not found!")
         return
 
-    renamed_count = 0
-    skipped_count = 0
-    empty_count = 0
+    index = scan_collection(base_path.parent, [base_path.name])
+    plan = FilePlan(index, JOURNAL_NAME)
 
     # Process each legion
-    for legion_path in sorted(base_path.iterdir()):
-        if not legion_path.is_dir():
-            continue
-
+    for legion_path in index.subfolders(base_path):
         legion_name = legion_path.name.replace(" ", "_")
         primarch_path = legion_path / "primarch"
 
-        if not primarch_path.exists():
+        if not index.exists(primarch_path):
             continue
 
-        # Find image files
-        image_files = list(primarch_path.glob("*.jpeg")) + \
-                     list(primarch_path.glob("*.jpg")) + \
-                     list(primarch_path.glob("*.png"))
+        # Find original image files (A4 versions are left alone)
+        image_files = index.originals(primarch_path)
 
         if not image_files:
-            empty_count += 1
-            print(f"❌ {legion_path.name} - no primarch image")
+            reporter.note(primarch_path, "empty")
+            reporter.warn(f"❌ {legion_path.name} - no primarch image")
             continue
 
         # Process first image found (should only be one per legion)
@@ -46,43 +51,60 @@ def rename_primarch_images():
 
             # Check if already renamed
             if img_path.name == new_name:
-                print(f"✅ {legion_path.name} - already named: {new_name}")
-                skipped_count += 1
+                reporter.note(img_path, "named", f"✅ {legion_path.name} - already named: {new_name}")
                 continue
 
-            # Check if target exists
-            if new_path.exists():
-                print(f"⚠️  {legion_path.name} - WARNING: {new_name} already exists, skipping")
-                skipped_count += 1
+            # Rename the file, unless the target exists
+            if not plan.move(img_path, new_path):
+                reporter.note(img_path, "conflict",
+                              f"⚠️  {legion_path.name} - WARNING: {new_name} already exists, skipping",
+                              to=new_name)
                 continue
 
-            # Rename the file
-            print(f"✏️  {legion_path.name} - Renaming: {img_path.name} → {new_name}")
-            img_path.rename(new_path)
-            renamed_count += 1
+            reporter.event(img_path, "renamed",
+                           line=f"✏️  {legion_path.name} - Renaming: {img_path.name} → {new_name}",
+                           to=new_name)
 
         # Warn if multiple images found
         if len(image_files) > 1:
-            print(f"   ⚠️  Multiple images found, only renamed first one")
+            reporter.warn(f"   ⚠️  Multiple images found, only renamed first one")
+
+    applied = run_plan(plan, dry_run)
+    reporter.close(dry_run=dry_run, applied=applied)
+    if not applied:
+        return False
 
     # Print summary
-    print("\n" + "="*60)
-    print("PRIMARCH RENAMING COMPLETE")
-    print("="*60)
-    print(f"Primarchs renamed: {renamed_count}")
-    print(f"Already named correctly: {skipped_count}")
-    print(f"Empty primarch folders: {empty_count}")
-    print("="*60)
-    print("\nExample filenames:")
-    print("  - World_Eaters_primarch.jpeg")
-    print("  - Death_Guard_primarch.jpeg")
-    print("  - Space_Wolves_primarch.jpeg")
-    print("="*60)
+    reporter.report("\n" + "="*60)
+    reporter.report("PRIMARCH RENAMING "
+                    + ("PLANNED (dry run, nothing changed)" if dry_run else "COMPLETE"))
+    reporter.report("="*60)
+    reporter.report(f"Primarchs renamed: {reporter.count('renamed')}")
+    reporter.report(f"Already named correctly: {reporter.count('named', 'conflict')}")
+    reporter.report(f"Empty primarch folders: {reporter.count('empty')}")
+    reporter.report("="*60)
+    reporter.info("\nExample filenames:")
+    reporter.info("  - World_Eaters_primarch.jpeg")
+    reporter.info("  - Death_Guard_primarch.jpeg")
+    reporter.info("  - Space_Wolves_primarch.jpeg")
+    reporter.info("="*60)
+    return True
 
 if __name__ == "__main__":
-    print("Primarch Image Renamer")
-    print("="*60)
-    print("Renaming pattern: {Legion_Name}_primarch.ext")
-    print("="*60 + "\n")
-
-    rename_primarch_images()
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_journal_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    reporter = reporter_for(args, "rename")
+
+    reporter.info("Primarch Image Renamer")
+    reporter.info("="*60)
+    reporter.info("Renaming pattern: {Legion_Name}_primarch.ext")
+    reporter.info("="*60 + "\n")
+
+    if args.resume or args.rollback:
+        sys.exit(0 if finish_pending(JOURNAL_NAME, args.rollback) else 1)
+    if refuse_if_pending(JOURNAL_NAME):
+        sys.exit(1)
+    sys.exit(0 if rename_primarch_images(args.dry_run, reporter) is not False else 1)
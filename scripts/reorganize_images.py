@@ -1,17 +1,45 @@
 #!/usr/bin/env python3
 """
 Reorganize images: consolidate originals and formatted into folders 1 and 4.
-- Rename original images to clean pattern
-- Move formatted images back to parent folders with _A4 suffix
+- Rename original images to clean pattern, together with their _A4 (and
+  other print profile) versions
+- Move formatted images back to parent folders with _A4 suffix; a newer
+  one replaces the existing _A4 (kept in the journal's trash until the run
+  is done), an older one is deleted
 - Delete empty _A4_formatted folders
+Every operation is planned first and applied through a journal
+(file_journal.py), so an interrupted run can be resumed or rolled back.
+Build manifest entries follow the outputs they describe.
 """
 
-import shutil
-from pathlib import Path
+import argparse
+import os
+import sys
 
-def reorganize_legion_images():
+from a4_manifest import load_manifest, move_output, save_manifest
+from file_journal import (
+    FilePlan, add_journal_arguments, finish_pending, refuse_if_pending, run_plan,
+)
+from format_for_a4_printing import legionnaire_output_path
+from image_index import LEGIONS_PATH, scan_collection
+from print_profiles import PROFILES, profile_output_path
+
+JOURNAL_NAME = "reorganize"
+
+
+def newer_than(path, existing, index):
+    """
+    True if path was modified after existing, False if not, None if existing
+    only appears once the planned operations are applied.
+    """
+    if not index.contains(existing):
+        return None
+    return os.stat(path).st_mtime_ns > os.stat(existing).st_mtime_ns
+
+
+def reorganize_legion_images(dry_run=False):
     """Consolidate original and formatted images into folders 1 and 4."""
-    base_path = Path("space marine legions")
+    base_path = LEGIONS_PATH
 
     if not base_path.exists():
         print("Error: 'space marine legions' folder not found!")
@@ -21,16 +49,18 @@ def reorganize_legion_images():
     moved_formatted = 0
     deleted_folders = 0
     errors = []
+    index = scan_collection(base_path.parent, [base_path.name])
+    plan = FilePlan(index, JOURNAL_NAME)
+    # (output, new output, new source) for the manifest once the plan is applied
+    moved_outputs = []
 
     # Process each legion
-    for legion_path in sorted(base_path.iterdir()):
-        if not legion_path.is_dir():
-            continue
+    for legion_path in index.subfolders(base_path):
 
         legion_name = legion_path.name.replace(" ", "_")
         legionnaire_path = legion_path / "legionnaire"
 
-        if not legionnaire_path.exists():
+        if not index.exists(legionnaire_path):
             continue
 
         # Process subfolders 1 and 4
@@ -38,17 +68,15 @@ def reorganize_legion_images():
             original_folder = legionnaire_path / subfolder
             formatted_folder = legionnaire_path / f"{subfolder}_A4_formatted"
 
-            if not original_folder.exists():
+            if not index.exists(original_folder):
                 continue
 
             print(f"\n{'='*60}")
             print(f"Processing: {legion_path.name} - Subfolder {subfolder}")
             print('='*60)
 
-            # Step 1: Rename original images in folder 1 or 4
-            image_files = list(original_folder.glob("*.jpeg")) + \
-                         list(original_folder.glob("*.jpg")) + \
-                         list(original_folder.glob("*.png"))
+            # Step 1: Rename original images in folder 1 or 4, their print versions with them
+            image_files = index.originals(original_folder)
 
             for img_path in image_files:
                 # Build new clean filename
@@ -60,23 +88,34 @@ def reorganize_legion_images():
                     print(f"  Original already named: {new_name}")
                     continue
 
-                # Check if target exists
-                if new_path.exists():
+                # Rename original, unless the target exists
+                if not plan.move(img_path, new_path):
                     error_msg = f"  WARNING: Can't rename {img_path.name}, {new_name} already exists"
                     print(error_msg)
                     errors.append(error_msg)
                     continue
 
-                # Rename original
                 print(f"  Renaming original: {img_path.name} → {new_name}")
-                img_path.rename(new_path)
                 renamed_originals += 1
 
+                # Its print versions keep following it
+                for profile in PROFILES.values():
+                    output = profile_output_path(legionnaire_output_path(img_path), profile)
+                    if not plan.exists(output):
+                        continue
+                    new_output = profile_output_path(legionnaire_output_path(new_path), profile)
+                    if not plan.move(output, new_output):
+                        error_msg = (f"  WARNING: Can't rename {output.name}, "
+                                     f"{new_output.name} already exists")
+                        print(error_msg)
+                        errors.append(error_msg)
+                        continue
+                    print(f"  Renaming formatted: {output.name} → {new_output.name}")
+                    moved_outputs.append((output, new_output, new_path))
+
             # Step 2: Move formatted images from *_A4_formatted folder
-            if formatted_folder.exists():
-                formatted_images = list(formatted_folder.glob("*.jpeg")) + \
-                                  list(formatted_folder.glob("*.jpg")) + \
-                                  list(formatted_folder.glob("*.png"))
+            if index.exists(formatted_folder):
+                formatted_images = index.images(formatted_folder)
 
                 for formatted_img in formatted_images:
                     # Add _A4 suffix before extension
@@ -88,31 +127,51 @@ def reorganize_legion_images():
                         new_name = formatted_img.name
 
                     dest_path = original_folder / new_name
-
-                    # Check if already exists
-                    if dest_path.exists():
-                        print(f"  Formatted already exists: {new_name}")
-                        # Delete the formatted folder version
-                        formatted_img.unlink()
-                        continue
-
-                    # Move formatted image
-                    print(f"  Moving formatted: {formatted_img.name} → {new_name}")
-                    shutil.move(str(formatted_img), str(dest_path))
+                    # Formatted images carry their original's name
+                    original = original_folder / formatted_img.name
+                    source = original if plan.exists(original) else None
+
+                    # Move formatted image, unless it already exists
+                    if not plan.move(formatted_img, dest_path):
+                        newer = newer_than(formatted_img, dest_path, index)
+                        if newer is None:
+                            error_msg = (f"  WARNING: {new_name} is being renamed in this run, "
+                                         f"keeping {formatted_img.name}")
+                            print(error_msg)
+                            errors.append(error_msg)
+                            continue
+                        if not newer:
+                            print(f"  Formatted already exists: {new_name}")
+                            # Delete the older formatted folder version
+                            plan.delete(formatted_img)
+                            continue
+                        # Newer output: the existing one goes to the trash
+                        plan.delete(dest_path)
+                        plan.move(formatted_img, dest_path)
+                        print(f"  Replacing older {new_name} with {formatted_img.name}")
+                    else:
+                        print(f"  Moving formatted: {formatted_img.name} → {new_name}")
+                    moved_outputs.append((formatted_img, dest_path, source))
                     moved_formatted += 1
 
                 # Step 3: Delete empty _A4_formatted folder
-                remaining = list(formatted_folder.iterdir())
-                if not remaining:
+                if plan.rmdir(formatted_folder):
                     print(f"  Deleting empty folder: {formatted_folder.name}")
-                    formatted_folder.rmdir()
                     deleted_folders += 1
                 else:
                     print(f"  WARNING: {formatted_folder.name} not empty, skipping deletion")
 
+    if not run_plan(plan, dry_run):
+        return False
+    if moved_outputs and not dry_run:
+        manifest = load_manifest()
+        for output, new_output, source in moved_outputs:
+            move_output(manifest, output, new_output, source)
+        save_manifest(manifest)
+
     # Print summary
     print("\n" + "="*60)
-    print("REORGANIZATION COMPLETE")
+    print("REORGANIZATION " + ("PLANNED (dry run, nothing changed)" if dry_run else "COMPLETE"))
     print("="*60)
     print(f"Original images renamed: {renamed_originals}")
     print(f"Formatted images moved: {moved_formatted}")
@@ -128,11 +187,21 @@ def reorganize_legion_images():
     print("  - {Legion}_legionnaire_{#}.jpeg (original)")
     print("  - {Legion}_legionnaire_{#}_A4.jpeg (formatted)")
     print("="*60)
+    return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_journal_arguments(parser)
+    args = parser.parse_args()
+
     print("Image Reorganization Script")
     print("="*60)
     print("Consolidating original and formatted images into folders 1 and 4")
     print("="*60)
 
-    reorganize_legion_images()
+    if args.resume or args.rollback:
+        sys.exit(0 if finish_pending(JOURNAL_NAME, args.rollback) else 1)
+    if refuse_if_pending(JOURNAL_NAME):
+        sys.exit(1)
+    sys.exit(0 if reorganize_legion_images(args.dry_run) is not False else 1)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Rank the originals by the resolution they would print at.
+Only image headers are read (no decode), so the whole collection is checked
+in milliseconds. For each source the effective DPI on the print profile's
+page is worked out from its pixel size and fit mode; anything under 300 dpi
+is upscaled when formatted, and the lower it goes the softer the print.
+Use --min-dpi here to fail on weak sources, or on the format_* scripts to
+refuse formatting them.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from a4_engine import DEFAULT_FIT, effective_dpi, source_size
+from a4_manifest import load_manifest
+from format_for_a4_printing import collect_legionnaire_jobs
+from format_primarchs_a4 import collect_primarch_jobs
+from image_index import LEGIONS_PATH, scan_collection
+from print_profiles import DEFAULT_PROFILE, PROFILES, get_profile
+from wall_layout import load_layout
+
+# (lowest dpi, label) from best to worst
+BANDS = (
+    (300, "✅ print quality"),
+    (200, "🟡 slightly soft"),
+    (150, "🟠 visibly soft"),
+    (0, "🔴 too low"),
+)
+
+
+def band(dpi):
+    """Label of the quality band dpi falls in."""
+    return next(label for lowest, label in BANDS if dpi >= lowest)
+
+
+def layout_sources(index):
+    """(original, fit, label) for every poster on the walls."""
+    sources = []
+    for poster in load_layout().posters():
+        for path in index.originals(poster.folder_path()):
+            label = f"{poster.wall} r{poster.row}s{poster.spot} {poster.name}"
+            sources.append((path, poster.fit or DEFAULT_FIT, label))
+    return sources
+
+
+def legion_sources():
+    """(original, fit, label) for every legionnaire and primarch image."""
+    manifest = load_manifest()
+    index = scan_collection(LEGIONS_PATH.parent, [LEGIONS_PATH.name])
+    jobs = (collect_legionnaire_jobs(manifest, LEGIONS_PATH, True, index)[0]
+            + collect_primarch_jobs(manifest, LEGIONS_PATH, True, index)[0])
+    return [(job[0], job[2], os.path.relpath(job[0], LEGIONS_PATH)) for job in jobs]
+
+
+def rate_sources(sources, profile=DEFAULT_PROFILE):
+    """
+    (dpi, (width, height), bytes, fit, label) of each source, worst first.
+    Unreadable files are rated 0 dpi so they top the list.
+    """
+    page = get_profile(profile)
+    rated = []
+    for path, fit, label in sources:
+        try:
+            size = source_size(path)
+            dpi = effective_dpi(size, fit, page)
+            file_size = os.stat(path).st_size
+        except OSError:
+            size, dpi, file_size = (0, 0), 0, 0
+        rated.append((dpi, size, file_size, fit, label))
+    rated.sort(key=lambda entry: (entry[0], entry[4]))
+    return rated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--legions", action="store_true",
+                        help="also check the legionnaire and primarch images")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help=f"print profile to rate against (default: {DEFAULT_PROFILE})")
+    parser.add_argument("--top", type=int, default=20,
+                        help="how many of the worst sources to list (default: 20, 0 for all)")
+    parser.add_argument("--min-dpi", type=int, default=None, metavar="DPI",
+                        help="exit with status 1 if any source is below this resolution")
+    args = parser.parse_args()
+
+    print("Source Quality Report")
+    print("="*60)
+    start = time.perf_counter()
+    index = scan_collection()
+    sources = layout_sources(index)
+    if args.legions:
+        sources += legion_sources()
+    rated = rate_sources(sources, args.profile)
+    elapsed = time.perf_counter() - start
+
+    shown = rated[:args.top] if args.top else rated
+    print(f"{'DPI':>5} {'Pixels':>11} {'KB':>7} {'Fit':8} Source")
+    for dpi, (width, height), file_size, fit, label in shown:
+        print(f"{dpi:5.0f} {f'{width}x{height}':>11} {file_size / 1024:7.0f} {fit:8} {label}")
+    if len(shown) < len(rated):
+        print(f"  ... {len(rated) - len(shown)} more")
+
+    print("\n" + "="*60)
+    print(f"Sources: {len(rated)} (profile {args.profile})")
+    for _, label in BANDS:
+        count = sum(1 for entry in rated if band(entry[0]) == label)
+        print(f"  {label}: {count}")
+    below = [entry for entry in rated if args.min_dpi and entry[0] < args.min_dpi]
+    if args.min_dpi:
+        print(f"Below {args.min_dpi} dpi: {len(below)}")
+    print(f"Time: {elapsed * 1000:.0f}ms")
+    print("="*60)
+    sys.exit(1 if below else 0)
+
+
+if __name__ == "__main__":
+    main()
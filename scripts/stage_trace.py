@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Timing spans for the formatting and hold-sync stages.
+With --trace PATH, the shared engine functions record a span for every scan,
+stat, decode, convert, resample, encode, write and copy, per file and per
+worker process, and PATH is written in Chrome trace format when the script
+exits. Open it in chrome://tracing, https://ui.perfetto.dev or
+https://www.speedscope.app; a per-stage table is also printed. Without
+--trace, span() returns a shared no-op and nothing is recorded.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+# Set by start(), so worker processes that import this module fresh record too
+TRACE_ENV = "A4_TRACE"
+
+STAGES = ["scan", "stat", "decode", "convert", "resample", "encode", "write", "copy"]
+
+# Recorded Chrome trace events of this process, or None while tracing is off
+_events = [] if os.environ.get(TRACE_ENV) else None
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        event = {"name": self.name, "cat": "stage", "ph": "X",
+                 "ts": self.start / 1000, "dur": (end - self.start) / 1000,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        if self.args:
+            event["args"] = self.args
+        if _events is not None:
+            _events.append(event)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def tracing():
+    """True while spans are being recorded."""
+    return _events is not None
+
+
+def span(name, **args):
+    """Context manager timing one stage; args (file, size, ...) go into the trace."""
+    if _events is None:
+        return _NO_SPAN
+    return _Span(name, {key: str(value) for key, value in args.items()})
+
+
+def drain():
+    """Take the events recorded so far (a worker returns them with its result)."""
+    global _events
+    if _events is None:
+        return None
+    events, _events = _events, []
+    return events
+
+
+def merge(events):
+    """Add events drained in a worker to this process's trace."""
+    if events and _events is not None:
+        _events.extend(events)
+
+
+def _forget_parent():
+    # A forked worker starts with a copy of the parent's events; they are not its own
+    if _events is not None:
+        _events.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_parent)
+
+
+def stage_totals(events):
+    """{span name: [count, seconds]} over events, stages first."""
+    totals = {name: [0, 0.0] for name in STAGES}
+    for event in events:
+        entry = totals.setdefault(event["name"], [0, 0.0])
+        entry[0] += 1
+        entry[1] += event["dur"] / 1e6
+    return {name: entry for name, entry in totals.items() if entry[0]}
+
+
+def write_trace(path, events):
+    """Write events as a Chrome trace file, naming the main and worker processes."""
+    main_pid = os.getpid()
+    names = [
+        {"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+         "args": {"name": "main" if pid == main_pid else f"worker {pid}"}}
+        for pid in sorted({event["pid"] for event in events})
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": names + events, "displayTimeUnit": "ms"}, f)
+
+
+def finish(path):
+    """Write the trace to path and print where the time went, on stderr."""
+    global _events
+    events, _events = drain() or [], None
+    os.environ.pop(TRACE_ENV, None)
+    write_trace(path, events)
+
+    totals = stage_totals(events)
+    measured = sum(seconds for name, (_, seconds) in totals.items() if name in STAGES)
+    print("\n" + "="*60, file=sys.stderr)
+    print(f"TRACE: {path} ({len(events)} spans, {len({e['pid'] for e in events})} processes)",
+          file=sys.stderr)
+    print("="*60, file=sys.stderr)
+    print(f"{'Stage':12} {'Spans':>7} {'Seconds':>9} {'Share':>7}", file=sys.stderr)
+    for name, (count, seconds) in totals.items():
+        share = f"{100 * seconds / measured:6.1f}%" if name in STAGES and measured else ""
+        print(f"{name:12} {count:7} {seconds:9.2f} {share:>7}", file=sys.stderr)
+    print("="*60, file=sys.stderr)
+
+
+def start(path):
+    """Record spans from now on (also in worker processes) and write them to path at exit."""
+    global _events
+    if _events is None:
+        _events = []
+    os.environ[TRACE_ENV] = "1"
+    atexit.register(finish, path)
+
+
+class _TraceAction(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, values)
+        start(values)
+
+
+def add_trace_argument(parser):
+    """Add --trace PATH, which starts tracing as soon as the arguments are parsed."""
+    parser.add_argument("--trace", metavar="PATH", default=None, action=_TraceAction,
+                        help="record per-stage timing spans (scan, stat, decode, convert, "
+                             "resample, encode, write, copy) and write them to PATH as a "
+                             "Chrome trace")
+    return parser
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Wall layout manifest loader.
+wall_layout.json at the repository root is the single source of truth for
+which poster hangs where: wall, row, spot and source folder for all 55
+posters. The loader validates it and builds in-memory indexes so any stage
+can look a poster up by wall/row/spot or by folder in O(1).
+"""
+
+import json
+from collections import namedtuple
+from pathlib import Path
+
+from paths import BASE_DIR
+
+LAYOUT_PATH = BASE_DIR / "wall_layout.json"
+
+Wall = namedtuple("Wall", ["name", "columns", "rows", "description"])
+
+_PosterFields = namedtuple("Poster", ["wall", "row", "spot", "name", "folder", "a4", "fit"])
+
+
+class Poster(_PosterFields):
+    """
+    One poster position. folder is relative to the repository root; a4 and
+    fit optionally override the output file name and the A4 fit mode.
+    """
+
+    __slots__ = ()
+
+    @property
+    def position(self):
+        """(wall, row, spot) key of this poster."""
+        return self.wall, self.row, self.spot
+
+    def folder_path(self, base_dir=BASE_DIR):
+        """Absolute path of the poster's folder."""
+        return Path(base_dir) / self.folder
+
+    def a4_output_path(self, image_path):
+        """
+        A4 version of an original in this poster's folder. Defaults to
+        {stem}_A4.jpeg next to it unless the layout names the output.
+        """
+        image_path = Path(image_path)
+        if self.a4:
+            return image_path.parent / self.a4
+        return image_path.parent / f"{image_path.stem}_A4.jpeg"
+
+    def find_a4(self, index, base_dir=BASE_DIR):
+        """The poster's existing A4 image from an ImageIndex, or None."""
+        outputs = index.a4_outputs(self.folder_path(base_dir))
+        if self.a4:
+            outputs = [path for path in outputs if path.name == self.a4]
+        return outputs[0] if outputs else None
+
+
+class WallLayout:
+    """Validated layout with lookups by position and by folder."""
+
+    def __init__(self, walls, posters):
+        self.walls = walls
+        self._posters = sorted(posters, key=lambda p: (list(walls).index(p.wall), p.row, p.spot))
+        self._by_position = {}
+        self._by_folder = {}
+
+        for poster in self._posters:
+            wall = walls.get(poster.wall)
+            if wall is None:
+                raise ValueError(f"{poster.name}: unknown wall '{poster.wall}'")
+            if not (1 <= poster.row <= wall.rows and 1 <= poster.spot <= wall.columns):
+                raise ValueError(f"{poster.name}: row {poster.row} spot {poster.spot} "
+                                 f"is outside {wall.name} ({wall.columns}x{wall.rows})")
+            if poster.position in self._by_position:
+                other = self._by_position[poster.position]
+                raise ValueError(f"{poster.name} and {other.name} share {poster.position}")
+            if poster.folder in self._by_folder:
+                raise ValueError(f"Folder used twice: {poster.folder}")
+            self._by_position[poster.position] = poster
+            self._by_folder[poster.folder] = poster
+
+    def poster(self, wall, row, spot):
+        """Poster at a wall position, or None if the spot is empty."""
+        return self._by_position.get((wall, row, spot))
+
+    def by_folder(self, folder):
+        """Poster whose folder (relative to the repository root) is folder."""
+        return self._by_folder.get(str(folder).replace("\\", "/").strip("/"))
+
+    def posters(self, wall=None):
+        """Posters in layout order (wall, then row, then spot)."""
+        if wall is None:
+            return list(self._posters)
+        return [poster for poster in self._posters if poster.wall == wall]
+
+    def folders(self, wall=None):
+        """Poster folders in layout order."""
+        return [poster.folder for poster in self.posters(wall)]
+
+    def grid(self, wall):
+        """Rows of the wall as lists of posters (None for empty spots)."""
+        info = self.walls[wall]
+        return [
+            [self.poster(wall, row, spot) for spot in range(1, info.columns + 1)]
+            for row in range(1, info.rows + 1)
+        ]
+
+    def __len__(self):
+        return len(self._posters)
+
+
+def load_layout(path=LAYOUT_PATH):
+    """Load and validate the wall layout manifest."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    walls = {
+        name: Wall(name, info["columns"], info["rows"], info.get("description", ""))
+        for name, info in data["walls"].items()
+    }
+    posters = [
+        Poster(entry["wall"], entry["row"], entry["spot"], entry["name"],
+               entry["folder"], entry.get("a4"), entry.get("fit"))
+        for entry in data["posters"]
+    ]
+    return WallLayout(walls, posters)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Render a scaled mock-up of each wall from the existing *_A4.jpeg outputs.
+Posters are placed on the wall grid from wall_layout.json (main_wall 13x3,
+wall_1_right and wall_2_left 2x4). Thumbnails are kept in a persistent cache
+keyed by the A4 image's content hash, so after the first run a preview only
+stats the A4 files and pastes small cached JPEGs - no full-size decode.
+format_* scripts run with --derivative thumb fill the same cache as they go.
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from a4_engine import THUMB_CACHE_DIR, THUMB_SIZE, thumb_cache_path
+from a4_manifest import file_sha256
+from image_index import scan_collection
+from wall_layout import BASE_DIR, load_layout
+
+CACHE_DIR = THUMB_CACHE_DIR
+CACHE_INDEX = CACHE_DIR / "index.json"
+PREVIEW_DIR = BASE_DIR / "prints"
+
+THUMB_QUALITY = 85
+
+GAP = 12
+BACKGROUND = (40, 40, 40)
+EMPTY_SPOT = (90, 90, 90)
+
+
+class ThumbnailCache:
+    """
+    Content-addressed thumbnail store.
+    index.json maps each A4 image (relative path) to its last seen size,
+    mtime and SHA-256, so the hash is only recomputed when the file changed.
+    Thumbnails themselves are stored as {sha256}_{w}x{h}.jpg.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, size=THUMB_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.size = size
+        self.index_path = self.cache_dir / CACHE_INDEX.name
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def _source_hash(self, path):
+        """SHA-256 of path, reusing the indexed hash while size and mtime match."""
+        key = os.path.relpath(Path(path).resolve(), BASE_DIR)
+        st = os.stat(path)
+        entry = self.index.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["sha256"]
+        digest = file_sha256(path)
+        self.index[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        self._dirty = True
+        return digest
+
+    def thumbnail(self, path):
+        """Cached thumbnail of path as an RGB image, built on a miss."""
+        thumb_path = self.cache_dir / thumb_cache_path(self._source_hash(path), self.size).name
+        try:
+            with Image.open(thumb_path) as img:
+                img.load()
+                self.hits += 1
+                return img.convert("RGB")
+        except (OSError, ValueError):
+            pass
+
+        self.misses += 1
+        with Image.open(path) as img:
+            if img.format == "JPEG":
+                img.draft("RGB", self.size)
+            thumb = img.convert("RGB").resize(self.size, Image.Resampling.LANCZOS)
+
+        self.cache_dir.mkdir(exist_ok=True)
+        tmp_path = thumb_path.with_name(f".{thumb_path.name}.tmp")
+        thumb.save(tmp_path, "JPEG", quality=THUMB_QUALITY)
+        os.replace(tmp_path, thumb_path)
+        return thumb
+
+    def save(self):
+        """Persist the hash index if it changed."""
+        if not self._dirty:
+            return
+        self.cache_dir.mkdir(exist_ok=True)
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+
+def render_wall(layout, index, wall, cache):
+    """
+    Composite one wall's grid of thumbnails.
+    Returns (preview image, posters without an A4 image).
+    """
+    info = layout.walls[wall]
+    cell_width, cell_height = cache.size
+    canvas = Image.new("RGB", (
+        info.columns * cell_width + (info.columns + 1) * GAP,
+        info.rows * cell_height + (info.rows + 1) * GAP,
+    ), BACKGROUND)
+    draw = ImageDraw.Draw(canvas)
+
+    missing = []
+    for row_number, row in enumerate(layout.grid(wall)):
+        for spot_number, poster in enumerate(row):
+            x = GAP + spot_number * (cell_width + GAP)
+            y = GAP + row_number * (cell_height + GAP)
+            a4_image = poster.find_a4(index) if poster else None
+            if a4_image is not None:
+                canvas.paste(cache.thumbnail(a4_image), (x, y))
+                continue
+
+            # Empty spot or poster without an A4 version yet
+            draw.rectangle((x, y, x + cell_width - 1, y + cell_height - 1), fill=EMPTY_SPOT)
+            if poster:
+                missing.append(poster)
+                draw.text((x + 6, y + 6), poster.name, fill=(255, 255, 255))
+    return canvas, missing
+
+
+def render_previews(walls=None, output_dir=PREVIEW_DIR, cache=None):
+    """
+    Render preview images for walls (default: all) into output_dir.
+    Yields (wall, output path, missing posters).
+    """
+    layout = load_layout()
+    index = scan_collection()
+    cache = cache or ThumbnailCache()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        for wall in walls or list(layout.walls):
+            preview, missing = render_wall(layout, index, wall, cache)
+            output_path = output_dir / f"{wall}_preview.jpg"
+            preview.save(output_path, "JPEG", quality=90)
+            yield wall, output_path, missing
+    finally:
+        cache.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("walls", nargs="*", help="walls to render (default: all)")
+    parser.add_argument("-o", "--output-dir", type=Path, default=PREVIEW_DIR,
+                        help="where to write <wall>_preview.jpg (default: prints/)")
+    args = parser.parse_args()
+
+    unknown = set(args.walls) - set(load_layout().walls)
+    if unknown:
+        parser.error(f"unknown wall: {', '.join(sorted(unknown))}")
+
+    print("Wall Preview")
+    print("="*60)
+    start_time = time.time()
+    cache = ThumbnailCache()
+    for wall, output_path, missing in render_previews(args.walls, args.output_dir, cache):
+        print(f"🖼️  {wall} → {output_path}")
+        for poster in missing:
+            print(f"   ⚠️  No A4 image for row {poster.row} spot {poster.spot}: {poster.name}")
+    print("="*60)
+    print(f"Thumbnails: {cache.hits} cached, {cache.misses} built")
+    print(f"Time: {time.time() - start_time:.2f}s")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()